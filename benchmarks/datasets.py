@@ -0,0 +1,59 @@
+"""
+벤치마크용 마케팅 CSV 생성기
+- 같은 행 수면 항상 같은 내용(고정 seed)이 생성되어 실행 간 비교가 가능합니다.
+- 큰 파일(최대 수천만 행)도 chunk 단위로 써서 메모리 사용량이 제한됩니다.
+- 생성된 파일은 data_dir에 보관하고 다음 실행에서 재사용합니다.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+_CHUNK_ROWS = 1_000_000
+_CHANNELS = np.array(["search", "display", "social", "video", "email", "affiliate"])
+_REGIONS = np.array(["서울", "경기", "부산", "대구", "인천", "광주", "대전", "울산"])
+_DEVICES = np.array(["mobile", "desktop", "tablet"])
+_START = np.datetime64("2024-01-01")
+
+
+def _chunk(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    channel = rng.integers(0, len(_CHANNELS), rows)
+    impressions = rng.integers(100, 50_000, rows)
+    clicks = rng.binomial(impressions, 0.01 + 0.005 * channel / len(_CHANNELS))
+    spend = np.round(clicks * rng.uniform(200, 1500, rows), 0)
+    conversions = rng.binomial(clicks, 0.03)
+    revenue = np.round(conversions * rng.uniform(20_000, 120_000, rows), 0)
+    return pd.DataFrame(
+        {
+            "date": (_START + rng.integers(0, 365, rows).astype("timedelta64[D]")).astype(str),
+            "channel": _CHANNELS[channel],
+            "campaign": np.char.add("campaign_", rng.integers(0, 200, rows).astype(str)),
+            "region": _REGIONS[rng.integers(0, len(_REGIONS), rows)],
+            "device": _DEVICES[rng.integers(0, len(_DEVICES), rows)],
+            "impressions": impressions,
+            "clicks": clicks,
+            "spend": spend,
+            "conversions": conversions,
+            "revenue": revenue,
+        }
+    )
+
+
+def ensure_dataset(rows: int, data_dir: str) -> str:
+    """rows 행짜리 마케팅 CSV 경로 (없으면 생성)"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"marketing_{rows}.csv")
+    if os.path.exists(path):
+        return path
+
+    rng = np.random.default_rng(rows)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    written = 0
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        while written < rows:
+            n = min(_CHUNK_ROWS, rows - written)
+            _chunk(rng, n).to_csv(f, index=False, header=written == 0)
+            written += n
+    os.replace(tmp_path, path)
+    return path
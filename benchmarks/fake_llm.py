@@ -0,0 +1,181 @@
+"""
+벤치마크용 결정적(deterministic) 가짜 LLM
+- LLMFactory.create를 교체하여 API 키 없이 그래프 전체를 실행합니다.
+- 프롬프트 종류(Plan / Make / Insight / Eval / 보고서)를 판별해 고정된 응답을 반환합니다.
+- 호출당 지연(latency)과 스트리밍 토큰당 지연(token_latency)을 설정할 수 있어,
+  LLM 대기 시간과 파이프라인 자체(비-LLM) 시간을 분리해서 측정할 수 있습니다.
+"""
+
+import json
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+_IMG_NAME = re.compile(r"figure_\d+_\d+\.png")
+_SAVEFIG = re.compile(r"plt\.savefig\(r'([^']+)/figure_(\d+)_n\.png'\)")
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _record(kind: str, seconds: float) -> None:
+    with _stats_lock:
+        item = _stats.setdefault(kind, {"calls": 0, "total_s": 0.0})
+        item["calls"] += 1
+        item["total_s"] += seconds
+
+
+def llm_stats() -> Dict[str, Dict[str, float]]:
+    """응답 종류별 호출 수 / 누적 시간"""
+    with _stats_lock:
+        return {kind: dict(item) for kind, item in _stats.items()}
+
+
+def _message_text(messages: List[BaseMessage]) -> str:
+    parts = []
+    for message in messages:
+        if isinstance(message.content, str):
+            parts.append(message.content)
+            continue
+        for part in message.content:
+            if isinstance(part, dict) and part.get("type") == "text":
+                parts.append(part.get("text", ""))
+    return "\n".join(parts)
+
+
+def _plan() -> str:
+    return (
+        "1. 채널별 광고비(spend), 매출(revenue), 클릭(clicks), 노출(impressions)을 집계합니다.\n"
+        "2. 채널별 ROAS(revenue/spend)와 CTR(clicks/impressions)을 계산하고 막대그래프로 비교합니다.\n"
+        "3. 월별 매출 추이를 선그래프로 확인합니다."
+    )
+
+
+def _code(prompt: str) -> str:
+    match = _SAVEFIG.search(prompt)
+    img_dir, roop = (match.group(1), match.group(2)) if match else ("webapp/static/img/benchmark", "0")
+    return f"""summary = df.groupby('channel', observed=True)[['spend', 'revenue', 'clicks', 'impressions']].sum()
+summary['roas'] = summary['revenue'] / summary['spend']
+summary['ctr'] = summary['clicks'] / summary['impressions']
+fig, ax = plt.subplots(figsize=(8, 4))
+summary['roas'].sort_values().plot(kind='barh', ax=ax)
+ax.set_title('채널별 ROAS')
+plt.savefig(r'{img_dir}/figure_{roop}_0.png')
+plt.close(fig)
+monthly = df.groupby(pd.to_datetime(df['date']).dt.to_period('M'))['revenue'].sum()
+fig, ax = plt.subplots(figsize=(8, 4))
+monthly.plot(ax=ax)
+ax.set_title('월별 매출 추이')
+plt.savefig(r'{img_dir}/figure_{roop}_1.png')
+plt.close(fig)
+"""
+
+
+def _insight(prompt: str) -> str:
+    names = sorted(set(_IMG_NAME.findall(prompt)))
+    return json.dumps(
+        {
+            "overall_insight": "검색 광고의 ROAS가 가장 높으며, 디스플레이 예산 일부를 검색으로 재배분하는 것을 권장합니다.",
+            "image_specific_insights": [
+                {"img_name": name, "insight": f"{name}: 채널 간 성과 차이가 뚜렷합니다."} for name in names
+            ],
+        },
+        ensure_ascii=False,
+    )
+
+
+def _report() -> str:
+    return (
+        "# 마케팅 성과 분석 보고서\n\n"
+        "## 요약\n채널별 ROAS와 월별 매출 추이를 분석했습니다.\n\n"
+        "## 주요 인사이트\n- 검색 광고의 ROAS가 가장 높습니다.\n"
+        "- 월별 매출은 완만한 상승 추세입니다.\n\n"
+        "## 제안\n디스플레이 예산 일부를 검색 광고로 재배분하세요.\n"
+    )
+
+
+def canned_response(prompt: str, schema: Optional[str] = None):
+    """(응답 종류, 응답 텍스트)"""
+    if schema == "MakeCodeOutput":
+        return "make", json.dumps({"code": _code(prompt)}, ensure_ascii=False)
+    if schema == "InsightOutput":
+        return "insight", _insight(prompt)
+    if "LLM-as-a-judge" in prompt:
+        return "eval", "APPROVE"
+    if "분석 계획을 세우세요" in prompt:
+        return "plan", _plan()
+    if "이미지별 분석 결과" in prompt:
+        return "insight_overall", "채널별 성과 차이가 크므로 예산 재배분이 필요합니다."
+    if _IMG_NAME.search(prompt):
+        return "insight_image", "채널 간 성과 차이가 뚜렷합니다."
+    return "report", _report()
+
+
+class FakeChatModel(BaseChatModel):
+    latency: float = 0.0
+    token_latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        start = time.perf_counter()
+        kind, text = canned_response(_message_text(messages), kwargs.get("structured_schema"))
+        if self.latency:
+            time.sleep(self.latency)
+        _record(kind, time.perf_counter() - start)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        start = time.perf_counter()
+        kind, text = canned_response(_message_text(messages), kwargs.get("structured_schema"))
+        if self.latency:
+            time.sleep(self.latency)
+        for token in re.findall(r"\S+\s*|\s+", text):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        _record(kind, time.perf_counter() - start)
+
+    def with_structured_output(self, schema, **kwargs: Any):
+        # 스키마 이름을 호출 인자로 전달하고, JSON 응답을 pydantic 모델로 변환
+        parse = RunnableLambda(lambda message: schema.model_validate_json(message.content))
+        return self.bind(structured_schema=schema.__name__) | parse
+
+
+def install_fake_llm(latency: float = 0.0, token_latency: float = 0.0) -> FakeChatModel:
+    """LLMFactory.create를 가짜 모델을 반환하도록 교체합니다. (프로세스 전역)"""
+    from src.Orc_agent.core.cancellation import llm_cancellation_callback
+    from src.Orc_agent.core.llm_factory import LLMFactory
+
+    fake = FakeChatModel(latency=latency, token_latency=token_latency)
+
+    def create(provider: str, model: str, temperature: float = 0, cache=None, **bind_kwargs: Any):
+        llm = fake.bind(**bind_kwargs) if bind_kwargs else fake
+        return llm, [llm_cancellation_callback]
+
+    LLMFactory.create = staticmethod(create)
+    return fake
@@ -0,0 +1,331 @@
+"""
+오프라인 end-to-end 벤치마크
+- LLMFactory를 결정적 가짜 LLM(fake_llm)으로 교체하고, 생성한 마케팅 CSV(기본 1만~1천만 행)로
+  create_main_graph() 전체(Plan → Make → Validate → Run → Insight → Eval → 보고서)를 실행합니다.
+- 행 수마다 별도 프로세스에서 실행하여 캐시/메모리 측정이 서로 섞이지 않게 합니다.
+- 측정 항목 (JSON)
+  · 노드별 wall time (메인/서브그래프 노드, 서브그래프 노드는 상위 노드 시간에도 포함)
+  · Executor 실행 시간, 가짜 LLM 시간과 이를 뺀 비-LLM 시간
+  · 최대 RSS (서버 프로세스 / 샌드박스 워커), 체크포인트 DB/blob 크기
+- --baseline으로 저장된 결과와 비교하여 허용 범위를 넘는 회귀가 있으면 종료 코드 1을 반환합니다.
+
+사용 예시:
+    python -m benchmarks.run_benchmark --rows 10000 100000 --out bench.json
+    python -m benchmarks.run_benchmark --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmark --baseline benchmarks/baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_DATA_DIR = os.path.join(ROOT, "cache", "benchmark_data")
+USER_QUERY = "채널별 ROAS와 월별 매출 추이를 분석해줘"
+
+# 회귀 비교 대상 지표와 무시할 최소 차이 (노이즈)
+_COMPARE_KEYS = {
+    "non_llm_s": 0.05,
+    "executor_s": 0.05,
+    "peak_rss_mb": 32.0,
+    "worker_peak_rss_mb": 32.0,
+    "checkpoint_bytes": 64 * 1024,
+}
+_NODE_MIN_DELTA = 0.05
+
+
+# ---------------------------------------------------------------------------
+# 측정 도구 (자식 프로세스)
+# ---------------------------------------------------------------------------
+
+def _node_timer_class():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class NodeTimer(BaseCallbackHandler):
+        """LangGraph 노드 실행(run)마다 시작/종료 시각을 기록합니다."""
+
+        def __init__(self):
+            self._lock = threading.Lock()
+            self._starts: Dict[Any, tuple] = {}
+            self.nodes: Dict[str, Dict[str, float]] = {}
+
+        def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+            name = kwargs.get("name")
+            if metadata and name and metadata.get("langgraph_node") == name:
+                with self._lock:
+                    self._starts[run_id] = (name, time.perf_counter())
+
+        def _finish(self, run_id):
+            with self._lock:
+                started = self._starts.pop(run_id, None)
+                if started is None:
+                    return
+                name, start = started
+                item = self.nodes.setdefault(name, {"calls": 0, "total_s": 0.0})
+                item["calls"] += 1
+                item["total_s"] += time.perf_counter() - start
+
+        def on_chain_end(self, outputs, *, run_id, **kwargs):
+            self._finish(run_id)
+
+        def on_chain_error(self, error, *, run_id, **kwargs):
+            self._finish(run_id)
+
+    return NodeTimer
+
+
+class _RssSampler(threading.Thread):
+    """서버 프로세스와 샌드박스 워커의 RSS를 주기적으로 샘플링하여 최대값을 기록"""
+
+    def __init__(self, pids_fn, interval: float = 0.2):
+        super().__init__(daemon=True)
+        self.pids_fn = pids_fn
+        self.interval = interval
+        self.worker_peak_mb = 0.0
+        self._done = threading.Event()
+
+    def run(self):
+        from src.Orc_agent.core.sandbox import _rss_mb
+
+        while not self._done.wait(self.interval):
+            for pid in self.pids_fn():
+                rss = _rss_mb(pid)
+                if rss is not None:
+                    self.worker_peak_mb = max(self.worker_peak_mb, rss)
+
+    def stop(self):
+        self._done.set()
+        self.join(timeout=2)
+
+
+def _dir_bytes(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _drain(graph, input_data, config) -> None:
+    """스트림을 끝까지 소비합니다. 서브그래프 HITL 대기(NodeInterrupt)는 정상 종료로 취급"""
+    try:
+        for _ in graph.stream(input_data, config=config, stream_mode="updates"):
+            pass
+    except Exception as e:
+        if not ("서브그래프" in str(e) and "멈췄습니다" in str(e)):
+            raise
+
+
+def _run_child(rows: int, data_dir: str, workdir: str, formats: List[str], latency: float, token_latency: float) -> Dict[str, Any]:
+    # 모듈 import 시점에 읽는 설정이므로 import 전에 지정 (실행마다 빈 캐시/체크포인트에서 시작)
+    os.environ.setdefault("CHECKPOINT_BACKEND", "sqlite")
+    os.environ.setdefault("CHECKPOINT_DB_PATH", os.path.join(workdir, "checkpoints.sqlite"))
+    os.environ.setdefault("CHECKPOINT_BLOB_DIR", os.path.join(workdir, "blobs"))
+    os.environ.setdefault("DATASET_CACHE_DIR", os.path.join(workdir, "datasets"))
+    os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+    os.environ.setdefault("CODE_LIBRARY_ENABLED", "false")
+
+    from benchmarks.datasets import ensure_dataset
+    from benchmarks.fake_llm import install_fake_llm, llm_stats
+
+    csv_path = ensure_dataset(rows, data_dir)
+
+    import_start = time.perf_counter()
+    from src.Orc_agent.Graph.Main_graph import create_main_graph
+    from src.Orc_agent.Node.sub_node import analyze_data
+
+    import_s = time.perf_counter() - import_start
+    # 노드는 호출 시점에 LLMFactory.create를 조회하므로 import 이후에 교체해도 적용됨
+    install_fake_llm(latency=latency, token_latency=token_latency)
+
+    executor = analyze_data.executor_instance
+    warmup_start = time.perf_counter()
+    executor.run("pass", session_id="benchmark-warmup")
+    warmup_s = time.perf_counter() - warmup_start
+
+    executor_stats = {"calls": 0, "total_s": 0.0}
+    original_run = executor.run
+
+    def timed_run(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_run(*args, **kwargs)
+        finally:
+            executor_stats["calls"] += 1
+            executor_stats["total_s"] += time.perf_counter() - start
+
+    executor.run = timed_run
+
+    sampler = _RssSampler(lambda: [w.process.pid for w in getattr(executor, "_workers", [])])
+    sampler.start()
+
+    graph, sub_apps = create_main_graph()
+    timer = _node_timer_class()()
+    thread_id = f"benchmark-{rows}-{uuid.uuid4().hex[:8]}"
+    config = {
+        "configurable": {"thread_id": thread_id, "session_id": thread_id, "user_id": "benchmark"},
+        "callbacks": [timer],
+    }
+    sub_config = {"configurable": {"thread_id": f"{thread_id}_sub", "session_id": f"{thread_id}_sub"}}
+
+    start = time.perf_counter()
+    # 1) 분석 서브그래프 HITL(Wait)까지 → 2) 완료 선택 후 보고서까지 → 3) 메인 HITL 승인 후 종료
+    _drain(graph, {"file_path": csv_path, "user_query": USER_QUERY, "report_type": formats}, config)
+    sub_apps["analyze"].update_state(sub_config, {"user_choice": "완료"})
+    _drain(graph, None, config)
+    graph.update_state(config, {"human_feedback": "APPROVE"})
+    _drain(graph, None, config)
+    total_s = time.perf_counter() - start
+
+    sampler.stop()
+    state = graph.get_state(config)
+    llm = llm_stats()
+    llm_s = sum(item["total_s"] for item in llm.values())
+
+    import resource
+
+    shutil.rmtree(os.path.join(ROOT, "webapp", "static", "img", thread_id), ignore_errors=True)
+    return {
+        "rows": rows,
+        "file_mb": round(os.path.getsize(csv_path) / (1024 * 1024), 2),
+        "completed": not state.next and bool(state.values.get("final_report")),
+        "import_s": round(import_s, 4),
+        "executor_warmup_s": round(warmup_s, 4),
+        "total_s": round(total_s, 4),
+        "llm_s": round(llm_s, 4),
+        "non_llm_s": round(total_s - llm_s, 4),
+        "executor_s": round(executor_stats["total_s"], 4),
+        "executor_calls": executor_stats["calls"],
+        "nodes": {name: {"calls": v["calls"], "total_s": round(v["total_s"], 4)} for name, v in sorted(timer.nodes.items())},
+        "llm": llm,
+        # Linux에서 ru_maxrss는 KB 단위
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "worker_peak_rss_mb": round(sampler.worker_peak_mb, 1),
+        "checkpoint_bytes": _dir_bytes(workdir) - _dir_bytes(os.path.join(workdir, "datasets")),
+    }
+
+
+# ---------------------------------------------------------------------------
+# 실행 / 비교 (부모 프로세스)
+# ---------------------------------------------------------------------------
+
+def _run_scenario(rows: int, args) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix=f"bench_{rows}_")
+    result_path = os.path.join(workdir, "result.json")
+    cmd = [
+        sys.executable, "-m", "benchmarks.run_benchmark", "--child",
+        "--rows", str(rows),
+        "--data-dir", args.data_dir,
+        "--workdir", workdir,
+        "--result", result_path,
+        "--llm-latency", str(args.llm_latency),
+        "--token-latency", str(args.token_latency),
+        "--formats", *args.formats,
+    ]
+    try:
+        subprocess.run(cmd, cwd=ROOT, check=True)
+        with open(result_path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    """baseline 대비 (1 + tolerance)배를 넘고 최소 차이보다 크게 늘어난 지표 목록"""
+    regressions = []
+    base_by_rows = {item["rows"]: item for item in baseline}
+
+    def check(rows: int, label: str, current: float, base: Optional[float], min_delta: float):
+        if base is None:
+            return
+        if current > base * (1 + tolerance) and current - base > min_delta:
+            regressions.append(f"[{rows}행] {label}: {base} → {current} (+{(current / base - 1) * 100 if base else float('inf'):.1f}%)")
+
+    for item in results:
+        base = base_by_rows.get(item["rows"])
+        if base is None:
+            continue
+        for key, min_delta in _COMPARE_KEYS.items():
+            check(item["rows"], key, item.get(key, 0), base.get(key), min_delta)
+        for name, node in item.get("nodes", {}).items():
+            base_node = base.get("nodes", {}).get(name)
+            if name.startswith("Insight") or base_node is None:
+                continue  # Insight 계열은 가짜 LLM 지연이 대부분
+            check(item["rows"], f"node {name}", node["total_s"], base_node["total_s"], _NODE_MIN_DELTA)
+    return regressions
+
+
+def _print_summary(results: List[Dict[str, Any]]) -> None:
+    print(f"{'rows':>12} {'total_s':>9} {'non_llm_s':>10} {'executor_s':>11} {'rss_mb':>8} {'worker_mb':>10} {'ckpt_kb':>9}")
+    for item in results:
+        print(
+            f"{item['rows']:>12,} {item['total_s']:>9.2f} {item['non_llm_s']:>10.2f} {item['executor_s']:>11.2f} "
+            f"{item['peak_rss_mb']:>8.0f} {item['worker_peak_rss_mb']:>10.0f} {item['checkpoint_bytes'] / 1024:>9.0f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="가짜 LLM 기반 오프라인 파이프라인 벤치마크")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--formats", nargs="+", default=["markdown"])
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="가짜 LLM 호출당 지연 (초)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="스트리밍 토큰당 지연 (초)")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 baseline JSON")
+    parser.add_argument("--save-baseline", help="결과를 baseline으로 저장")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 증가율 (0.2 = 20%%)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        result = _run_child(args.rows[0], args.data_dir, args.workdir, args.formats, args.llm_latency, args.token_latency)
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        return 0
+
+    results = [_run_scenario(rows, args) for rows in args.rows]
+    _print_summary(results)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "llm_latency": args.llm_latency,
+        "token_latency": args.token_latency,
+        "results": results,
+    }
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if not all(item["completed"] for item in results):
+        print("일부 시나리오가 보고서 생성까지 완료되지 않았습니다.")
+        return 1
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("성능 회귀:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("baseline 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
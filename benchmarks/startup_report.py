@@ -0,0 +1,169 @@
+"""
+앱 시작(import) 시간 리포트
+- 새 프로세스에서 `python -X importtime`으로 앱이 시작 시 import하는 모듈을 불러와
+  모듈별 누적 import 시간 상위 N개와 앱 모듈별 wall time을 출력합니다.
+- provider SDK / 문서 리더 / 보고서 렌더러처럼 실제 사용 시점에만 필요한 모듈이
+  시작 시점에 로드되었다면 "즉시 로드된 무거운 모듈"로 표시합니다.
+- --max-seconds를 넘거나 (--strict 시) 무거운 모듈이 즉시 로드되면 종료 코드 1을 반환합니다.
+
+사용 예시:
+    python -m benchmarks.startup_report
+    python -m benchmarks.startup_report --top 30 --out startup.json
+    python -m benchmarks.startup_report --max-seconds 3 --strict
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# webapp/app.py가 시작 시 import하는 모듈 (app.py 자체는 Streamlit 호출을 실행하므로 제외)
+APP_MODULES = [
+    "src.Orc_agent.core.logger",
+    "src.Orc_agent.core.dataset_store",
+    "src.Orc_agent.core.metrics",
+    "src.Orc_agent.Graph.Main_graph",
+    "src.Orc_agent.core.streamlit_callback",
+    "webapp.graph_visualizer",
+]
+
+# 실제 사용 시점에만 필요한 모듈 (시작 시 로드되면 안 됨)
+LAZY_MODULES = [
+    "langchain_openai",
+    "langchain_anthropic",
+    "langchain_google_genai",
+    "fitz",
+    "docx",
+    "pptx",
+    "xhtml2pdf",
+    "reportlab",
+    "markdown",
+    "matplotlib",
+    "seaborn",
+    "koreanize_matplotlib",
+]
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+_CHILD_CODE = """
+import json, sys, time
+timings = {}
+for name in %r:
+    start = time.perf_counter()
+    __import__(name)
+    timings[name] = time.perf_counter() - start
+print(json.dumps({"wall_s": timings, "modules": sorted(sys.modules)}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """-X importtime 출력 → [{module, self_ms, cumulative_ms, depth}]"""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        entries.append(
+            {
+                "module": module,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": max(len(indent) - 1, 0) // 2,
+            }
+        )
+    return entries
+
+
+def measure(modules: List[str]) -> Dict[str, Any]:
+    """새 인터프리터에서 modules를 순서대로 import하고 시간/로드된 모듈을 수집합니다."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_CODE % (modules,)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    entries = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("\n".join(errors[-20:]))
+
+    child = json.loads(proc.stdout.strip().splitlines()[-1])
+    loaded = set(child["modules"])
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    return {
+        "python": sys.version.split()[0],
+        "total_s": sum(child["wall_s"].values()),
+        "app_modules_s": child["wall_s"],
+        "imported_modules": len(entries),
+        "top_level_ms": sum(e["cumulative_ms"] for e in entries if e["depth"] == 0),
+        "eager_heavy_modules": eager,
+        "imports": entries,
+    }
+
+
+def _print_report(report: Dict[str, Any], top: int) -> None:
+    print(f"\n시작 import 시간: {report['total_s']:.2f}s ({report['imported_modules']}개 모듈)")
+    print("\n앱 모듈별 wall time (앞 모듈에서 이미 로드된 의존성은 제외)")
+    for name, seconds in report["app_modules_s"].items():
+        print(f"  {seconds * 1000:>9.1f}ms  {name}")
+
+    # 같은 패키지의 하위 모듈이 상위 목록을 채우지 않도록 최상위 패키지 기준으로도 집계
+    packages: Dict[str, float] = {}
+    for entry in report["imports"]:
+        if entry["depth"] == 0:
+            package = entry["module"].split(".")[0]
+            packages[package] = packages.get(package, 0.0) + entry["cumulative_ms"]
+
+    print(f"\n누적 import 시간 상위 {top}개 (최상위 패키지)")
+    for package, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {ms:>9.1f}ms  {package}")
+
+    print(f"\n자체(self) import 시간 상위 {top}개 (모듈)")
+    for entry in sorted(report["imports"], key=lambda e: e["self_ms"], reverse=True)[:top]:
+        print(f"  {entry['self_ms']:>9.1f}ms  {entry['module']}")
+
+    if report["eager_heavy_modules"]:
+        print(f"\n즉시 로드된 무거운 모듈: {', '.join(report['eager_heavy_modules'])}")
+    else:
+        print("\n즉시 로드된 무거운 모듈: 없음")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="앱 시작 import 시간 리포트")
+    parser.add_argument("--modules", nargs="+", default=APP_MODULES, help="import할 모듈 (기본: 앱 시작 모듈)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    parser.add_argument("--max-seconds", type=float, help="전체 import 시간 허용치 (초)")
+    parser.add_argument("--strict", action="store_true", help="무거운 모듈이 즉시 로드되면 실패")
+    args = parser.parse_args(argv)
+
+    try:
+        report = measure(args.modules)
+    except RuntimeError as e:
+        print(f"import 실패:\n{e}")
+        return 1
+
+    _print_report(report, args.top)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    failed = False
+    if args.max_seconds is not None and report["total_s"] > args.max_seconds:
+        print(f"시작 시간 {report['total_s']:.2f}s가 허용치 {args.max_seconds:.2f}s를 넘었습니다.")
+        failed = True
+    if args.strict and report["eager_heavy_modules"]:
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
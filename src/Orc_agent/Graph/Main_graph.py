@@ -1,23 +1,43 @@
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from src.Orc_agent.core.checkpointer import create_checkpointer
 from src.Orc_agent.State.state import AgentState
 from src.Orc_agent.Node import Main_node 
 from langgraph.graph import START
 from src.Orc_agent.Graph.sub_graph import analyze_data,document_agent,generate_report
 
 def create_main_graph():
-    share_memory=MemorySaver()
-    analyze_app = analyze_data.analyze_data_graph(share_memory)
-    document_app = document_agent.document_agent_graph(share_memory)
-    report_app = generate_report.generate_report_graph(share_memory)
+    return _build_main_graph(use_async=False)
+
+def create_main_graph_async():
+    """
+    ainvoke/astream 기반 비동기 실행 경로.
+    사용 예시: async for event in graph.astream(inputs, config=config): ...
+    """
+    return _build_main_graph(use_async=True)
+
+def _build_main_graph(use_async=False):
+    # CHECKPOINT_BACKEND=sqlite 이면 디스크 기반 체크포인터 (TTL/최신 N개 유지 compaction)
+    share_memory=create_checkpointer(use_async=use_async)
+    analyze_app = analyze_data.analyze_data_graph(share_memory, use_async=use_async)
+    document_app = document_agent.document_agent_graph(share_memory, use_async=use_async)
+    report_app = generate_report.generate_report_graph(share_memory, use_async=use_async)
+    
+    if use_async:
+        file_analyze_node = Main_node.afile_analyze(document_app)
+        analysis_node = Main_node.aanalysis(analyze_app)
+        final_report_node = Main_node.afinal_report(report_app)
+    else:
+        file_analyze_node = Main_node.file_analyze(document_app)
+        analysis_node = Main_node.analysis(analyze_app)
+        final_report_node = Main_node.final_report(report_app)
     
     main_workflow = StateGraph(AgentState)
     main_workflow.add_node("File_type",Main_node.file_type)
-    main_workflow.add_node("File_analysis",Main_node.file_analyze(document_app))
+    main_workflow.add_node("File_analysis",file_analyze_node)
     main_workflow.add_node("Preprocessing",Main_node.preprocessing)#아직 추가 x
-    main_workflow.add_node("Analysis",Main_node.analysis(analyze_app))
+    main_workflow.add_node("Analysis",analysis_node)
     main_workflow.add_node("Wait",Main_node.human_review_wait)
-    main_workflow.add_node("Final_report",Main_node.final_report(report_app))
+    main_workflow.add_node("Final_report",final_report_node)
     main_workflow.add_edge(START,"File_type")
     main_workflow.add_edge("File_analysis",END)
     main_workflow.add_edge("Preprocessing","Analysis")
@@ -4,25 +4,51 @@ from src.Orc_agent.State.state import analyzeState
 from src.Orc_agent.Node.sub_node import analyze_data
 from langgraph.graph import START
 
-def analyze_data_graph(CheckPoint=None):
+def analyze_data_graph(CheckPoint=None, use_async=False):
 
     analyze_workflow = StateGraph(analyzeState)
-    analyze_workflow.add_node("Plan", analyze_data.plan_analysis_code)
-    analyze_workflow.add_node("Make", analyze_data.make_analysis_code)
-    analyze_workflow.add_node("Run", analyze_data.run_code)
-    analyze_workflow.add_node("Insight", analyze_data.derive_insight_node)
-    analyze_workflow.add_node("Eval", analyze_data.evaluation_code)
+    if use_async:
+        analyze_workflow.add_node("Plan", analyze_data.aplan_analysis_code)
+        analyze_workflow.add_node("Make", analyze_data.amake_analysis_code)
+        analyze_workflow.add_node("Validate", analyze_data.avalidate_generated_code)
+        analyze_workflow.add_node("Run", analyze_data.arun_code)
+        analyze_workflow.add_node("Insight", analyze_data.aderive_insight_node)
+        analyze_workflow.add_node("Insight_image", analyze_data.aderive_image_insight_node)
+        analyze_workflow.add_node("Insight_overall", analyze_data.aderive_overall_insight_node)
+        analyze_workflow.add_node("Eval", analyze_data.aevaluation_code)
+    else:
+        analyze_workflow.add_node("Plan", analyze_data.plan_analysis_code)
+        analyze_workflow.add_node("Make", analyze_data.make_analysis_code)
+        analyze_workflow.add_node("Validate", analyze_data.validate_generated_code)
+        analyze_workflow.add_node("Run", analyze_data.run_code)
+        analyze_workflow.add_node("Insight", analyze_data.derive_insight_node)
+        analyze_workflow.add_node("Insight_image", analyze_data.derive_image_insight_node)
+        analyze_workflow.add_node("Insight_overall", analyze_data.derive_overall_insight_node)
+        analyze_workflow.add_node("Eval", analyze_data.evaluation_code)
     analyze_workflow.add_node("Wait", analyze_data.route_wait_node)
     analyze_workflow.add_edge(START, "Plan")
     analyze_workflow.add_edge("Plan", "Make")
-    analyze_workflow.add_edge("Make", "Run")
+    analyze_workflow.add_edge("Make", "Validate")
     analyze_workflow.add_edge("Insight","Eval")
+    # per_image 모드: Send로 분기된 이미지별 태스크가 모두 끝나면 종합 인사이트 후 평가
+    analyze_workflow.add_edge("Insight_image","Insight_overall")
+    analyze_workflow.add_edge("Insight_overall","Eval")
+    # 사전 검증 실패 시 실행하지 않고 바로 Make로 되돌림
+    analyze_workflow.add_conditional_edges(
+        "Validate",
+        analyze_data.router_validate,
+        {
+            "Make":"Make",
+            "Run":"Run"
+        }
+    )
     analyze_workflow.add_conditional_edges(
         "Run",
         analyze_data.router_error,
         {
             "Make":"Make",
-            "Insight":"Insight"
+            "Insight":"Insight",
+            "Insight_image":"Insight_image"
         }
     )
     analyze_workflow.add_conditional_edges(
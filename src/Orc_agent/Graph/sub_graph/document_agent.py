@@ -6,10 +6,14 @@ from langgraph.graph import START
 
 
 
-def document_agent_graph(CheckPoint=None):
+def document_agent_graph(CheckPoint=None, use_async=False):
     document_workflow = StateGraph(DocumentState)
-    document_workflow.add_node("Read", document_agent.read_file_node)
-    document_workflow.add_node("Analyze", document_agent.analyze_doc_node)
+    if use_async:
+        document_workflow.add_node("Read", document_agent.aread_file_node)
+        document_workflow.add_node("Analyze", document_agent.aanalyze_doc_node)
+    else:
+        document_workflow.add_node("Read", document_agent.read_file_node)
+        document_workflow.add_node("Analyze", document_agent.analyze_doc_node)
     document_workflow.add_edge(START, "Read")
     document_workflow.add_edge("Read", "Analyze")
     document_workflow.add_edge("Analyze", END)
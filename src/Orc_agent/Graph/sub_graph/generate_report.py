@@ -2,34 +2,27 @@ from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 from src.Orc_agent.State.state import ReportState
 from src.Orc_agent.Node.sub_node.generate_report import (
-    report_supervisor, generate_content, create_pdf, create_html, create_pptx
+    route_formats, report_join, generate_content, agenerate_content, create_pdf, create_html, create_pptx
 )
 
-def generate_report_graph(CheckPoint=None):
+def generate_report_graph(CheckPoint=None, use_async=False):
     workflow = StateGraph(ReportState)
     
-    # 1. Add Nodes
-    workflow.add_node("supervisor", report_supervisor)
-    workflow.add_node("generate_content", generate_content)
+    # 1. Add Nodes (렌더러는 CPU 작업이므로 async 그래프에서도 동기 노드로 스레드에서 실행)
+    workflow.add_node("generate_content", agenerate_content if use_async else generate_content)
     workflow.add_node("create_pdf", create_pdf)
     workflow.add_node("create_html", create_html)
     workflow.add_node("create_pptx", create_pptx)
+    workflow.add_node("join", report_join)
     
     # 2. Set Entry Point
-    workflow.set_entry_point("supervisor")
+    workflow.set_entry_point("generate_content")
     
-    # 3. Add Edges (Workers -> Supervisor)
-    workflow.add_edge("generate_content", "supervisor")
-    workflow.add_edge("create_pdf", "supervisor")
-    workflow.add_edge("create_html", "supervisor")
-    workflow.add_edge("create_pptx", "supervisor")
-    
-    # 4. Conditional Edges (Supervisor -> Workers)
+    # 3. Fan-out: 요청된 형식의 렌더러를 동시에 실행
     workflow.add_conditional_edges(
-        "supervisor",
-        lambda x: x["next_worker"],
+        "generate_content",
+        route_formats,
         {
-            "generate_content": "generate_content",
             "create_pdf": "create_pdf",
             "create_html": "create_html",
             "create_pptx": "create_pptx",
@@ -37,4 +30,10 @@ def generate_report_graph(CheckPoint=None):
         }
     )
     
-    return workflow.compile(checkpointer=CheckPoint)
\ No newline at end of file
+    # 4. Fan-in: 같은 super-step에서 끝난 렌더러들이 join에서 합류
+    workflow.add_edge("create_pdf", "join")
+    workflow.add_edge("create_html", "join")
+    workflow.add_edge("create_pptx", "join")
+    workflow.add_edge("join", END)
+    
+    return workflow.compile(checkpointer=CheckPoint)
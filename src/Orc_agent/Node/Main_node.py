@@ -6,6 +6,7 @@ from langgraph.errors import NodeInterrupt
 from src.Orc_agent.core.llm_factory import LLMFactory
 from src.Orc_agent.core.observe import langfuse_session, observe
 from src.Orc_agent.core.logger import logger
+from src.Orc_agent.core.stream_writer import stream_writer
 
 class MakeCodeOutput(BaseModel):
     code:str= Field(description="실행 가능한 파이썬 분석 코드. 설명이나 사족은 절대 포함하지 마세요.")
@@ -22,6 +23,18 @@ def file_analyze(sub_app):
         }
     return file_analyze_node
 
+def afile_analyze(sub_app):
+    @observe(name="file_analyze")
+    async def file_analyze_node(state: AgentState, config: RunnableConfig):
+        sub_input ={
+            "file_path":state["file_path"]
+        }
+        result = await sub_app.ainvoke(sub_input,config=config)
+        return{
+            "result_summary":result["analysis_summary"]
+        }
+    return file_analyze_node
+
 # def preprocessing(sub_app):
 #     def preprocessing_node(state: AgentState, config: RunnableConfig):
 #         sub_input ={
@@ -39,99 +52,131 @@ def preprocessing(state: AgentState, config: RunnableConfig):
     logger.info("Preprocessing skipped (Not implemented yet)")
     return {"steps_log": ["Preprocessing skipped (Not implemented yet)"]}
 
+def _analysis_sub_config(config: RunnableConfig) -> RunnableConfig:
+    logger.info(">>> [분석 노드] 서브그래프 상태 확인 중...")
+    logger.info(f">>> [분석 노드] Validating Config Keys: {list(config.get('configurable', {}).keys())}")
+    parent_thread_id = config["configurable"].get("thread_id")
+    parent_session_id = config["configurable"].get("session_id")
+    logger.info(f">>> [분석 노드] Parent Thread ID: {parent_thread_id}, Session ID: {parent_session_id}")
+    
+    sub_thread_id = f"{parent_thread_id}_sub"
+    sub_config = config.copy()
+    sub_config["configurable"] = {
+        "thread_id": sub_thread_id,
+        "session_id": parent_session_id if parent_session_id else parent_thread_id,
+        "user_id": config["configurable"].get("user_id"),
+        "cancel_id": config["configurable"].get("cancel_id")
+    }
+    return sub_config
+
+def _analysis_sub_input(state: AgentState, snapshot):
+    """멈춘 서브그래프가 있으면 None(재개), 없으면 새 입력"""
+    logger.info(f">>> [분석 노드] 다음 서브그래프: {snapshot.next}")
+    if snapshot.next:
+        logger.info(f">>> [분석 노드]  {snapshot.next} 부터 다시 시작합니다.")
+        return None
+    logger.info(">>> [분석 노드] 새로운 서브그래프 시작")
+    return {
+        "preprocessing_data": state["file_path"],
+        "user_query": state["user_query"],
+        "feed_back": [state.get("feed_back","")] if state.get("feed_back") else []
+    }
+
+def _log_analysis_chunk(chunk):
+    # 스트리밍 chunk마다 호출되는 대량 로그 → stream_chunk 샘플링 대상
+    logger.info(f">>> [분석 노드] Step: {list(chunk.keys())}", extra={"category": "stream_chunk"})
+    if "now_log" in chunk and chunk["now_log"]:
+        logger.info(f"    [에러/로그]: {chunk['now_log']}")
+    if "code" in chunk:
+        logger.info(f"    [코드생성]: {chunk['code'][:50]}...", extra={"category": "stream_chunk"})
+
+def _analysis_output(final_snapshot, result):
+    if final_snapshot.next:
+        logger.info(f">>> [분석 노드] 서브그래프가 {final_snapshot.next} 에서 멈췄습니다.")
+        raise NodeInterrupt(f"서브그래프가 {final_snapshot.next} 에서 멈췄습니다.")
+    
+    if result and "final_insight" in result:
+         logger.info(">>> [분석 노드] 서브그래프가 성공적으로 종료되었습니다.")
+         return {
+            "analysis_results": result.get("final_insight", {}),
+            "figure_list": result.get("result_img_paths", [])
+        }
+    else:
+         logger.info(">>> [분석 노드] 서브그래프가 종료되었으나 결과를 찾을 수 없습니다.")
+         return {
+             "analysis_results": {},
+             "figure_list": []
+         }
+
 def analysis(sub_app):
     @observe(name="analysis")
     def analysis_node(state: AgentState, config: RunnableConfig):
-        logger.info(f">>> [분석 노드] 서브그래프 상태 확인 중...")
-        logger.info(f">>> [분석 노드] Validating Config Keys: {list(config.get('configurable', {}).keys())}")
-        parent_thread_id = config["configurable"].get("thread_id")
-        parent_session_id = config["configurable"].get("session_id")
-        logger.info(f">>> [분석 노드] Parent Thread ID: {parent_thread_id}, Session ID: {parent_session_id}")
-        
-        sub_thread_id = f"{parent_thread_id}_sub"
-        sub_config = config.copy()
-        sub_config["configurable"] = {
-            "thread_id": sub_thread_id,
-            "session_id": parent_session_id if parent_session_id else parent_thread_id,
-            "user_id": config["configurable"].get("user_id")
-        }
-
+        sub_config = _analysis_sub_config(config)
         snapshot = sub_app.get_state(sub_config)
-        logger.info(f">>> [분석 노드] 다음 서브그래프: {snapshot.next}")
+        sub_input = _analysis_sub_input(state, snapshot)
         
         result = None
-        
-        if snapshot.next:
-            logger.info(f">>> [분석 노드]  {snapshot.next} 부터 다시 시작합니다.")
-            
-            for chunk in sub_app.stream(None, config=sub_config, stream_mode="values"):
-                result = chunk
-                logger.info(f">>> [분석 노드] Step: {list(chunk.keys())}")
-                if "now_log" in chunk and chunk["now_log"]:
-                    logger.info(f"    [에러/로그]: {chunk['now_log']}")
-        
-        else:
-            logger.info(f">>> [분석 노드] 새로운 서브그래프 시작")
-            sub_input = {
-                "preprocessing_data": state["file_path"],
-                "user_query": state["user_query"],
-                "feed_back": [state.get("feed_back","")] if state.get("feed_back") else []
-            }
-            
-            for chunk in sub_app.stream(sub_input, config=sub_config, stream_mode="values"):
-                result = chunk
-                logger.info(f">>> [분석 노드] Step: {list(chunk.keys())}")
-                if "now_log" in chunk and chunk["now_log"]:
-                    logger.info(f"    [에러/로그]: {chunk['now_log']}")
-                if "code" in chunk:
-                    logger.info(f"    [코드생성]: {chunk['code'][:50]}...")
+        for chunk in sub_app.stream(sub_input, config=sub_config, stream_mode="values"):
+            result = chunk
+            _log_analysis_chunk(chunk)
         
         final_snapshot = sub_app.get_state(sub_config)
-        
-        if final_snapshot.next:
-            logger.info(f">>> [분석 노드] 서브그래프가 {final_snapshot.next} 에서 멈췄습니다.")
-            raise NodeInterrupt(f"서브그래프가 {final_snapshot.next} 에서 멈췄습니다.")
-        
-        if result and "final_insight" in result:
-             logger.info(f">>> [분석 노드] 서브그래프가 성공적으로 종료되었습니다.")
-             return {
-                "analysis_results": result.get("final_insight", {}),
-                "figure_list": result.get("result_img_paths", [])
-            }
-        else:
-             logger.info(f">>> [분석 노드] 서브그래프가 종료되었으나 결과를 찾을 수 없습니다.")
-             return {
-                 "analysis_results": {},
-                 "figure_list": []
-             }
+        return _analysis_output(final_snapshot, result)
+
+    return analysis_node
+
+def aanalysis(sub_app):
+    @observe(name="analysis")
+    async def analysis_node(state: AgentState, config: RunnableConfig):
+        sub_config = _analysis_sub_config(config)
+        snapshot = await sub_app.aget_state(sub_config)
+        sub_input = _analysis_sub_input(state, snapshot)
+
+        result = None
+        async for chunk in sub_app.astream(sub_input, config=sub_config, stream_mode="values"):
+            result = chunk
+            _log_analysis_chunk(chunk)
+
+        final_snapshot = await sub_app.aget_state(sub_config)
+        return _analysis_output(final_snapshot, result)
 
     return analysis_node
 
+def _report_sub_input(state: AgentState):
+    insights = state.get("analysis_results", {})
+    insight_texts = []
+    if insights:
+        overall = insights.get("overall", {}).get("insight", "")
+        if overall: 
+            insight_texts.append(f"## Overall Insight\n{overall}")
+        
+        for key, val in insights.items():
+            if key == "overall": continue
+            insight_texts.append(f"## Analysis: {key}\n{val.get('insight','')}")
+    logger.info(insight_texts, extra={"category": "report_payload"})
+
+    return {
+        "analysis_results": insight_texts,
+        "figure_list": state.get("figure_list", []),
+        "file_path": state.get("file_path", ""),
+        "report_format": state.get("report_type", ["markdown"]),
+        "clean_data": state.get("clean_data")
+    }
+
 def final_report(sub_app):
     @observe(name="final_report")
     def final_report_node(state: AgentState, config: RunnableConfig):
-        insights = state.get("analysis_results", {})
-        insight_texts = []
-        if insights:
-            overall = insights.get("overall", {}).get("insight", "")
-            if overall: 
-                insight_texts.append(f"## Overall Insight\n{overall}")
-            
-            for key, val in insights.items():
-                if key == "overall": continue
-                insight_texts.append(f"## Analysis: {key}\n{val.get('insight','')}")
-        logger.info(insight_texts)
-
-        sub_input = {
-            "analysis_results": insight_texts,
-            "figure_list": state.get("figure_list", []),
-            "file_path": state.get("file_path", ""),
-            "report_format": state.get("report_type", ["markdown"]),
-            "clean_data": state.get("clean_data")
-        }
+        sub_input = _report_sub_input(state)
 
         logger.info(f">>> [최종리포트 노드] 서브그래프 상태 확인 중...")
-        result = sub_app.invoke(sub_input, config=config)
+        # 서브그래프의 보고서 토큰(custom)을 메인 그래프 스트림으로 다시 내보냄
+        writer = stream_writer()
+        result = {}
+        for mode, chunk in sub_app.stream(sub_input, config=config, stream_mode=["values", "custom"]):
+            if mode == "custom":
+                writer(chunk)
+            else:
+                result = chunk
         logger.info(f">>> [최종리포트 노드] 서브그래프가 성공적으로 종료되었습니다.")
         return {
             "final_report": result.get("final_report"),
@@ -139,6 +184,26 @@ def final_report(sub_app):
         }
     return final_report_node
 
+def afinal_report(sub_app):
+    @observe(name="final_report")
+    async def final_report_node(state: AgentState, config: RunnableConfig):
+        sub_input = _report_sub_input(state)
+
+        logger.info(">>> [최종리포트 노드] 서브그래프 상태 확인 중...")
+        writer = stream_writer()
+        result = {}
+        async for mode, chunk in sub_app.astream(sub_input, config=config, stream_mode=["values", "custom"]):
+            if mode == "custom":
+                writer(chunk)
+            else:
+                result = chunk
+        logger.info(">>> [최종리포트 노드] 서브그래프가 성공적으로 종료되었습니다.")
+        return {
+            "final_report": result.get("final_report"),
+            "steps_log": result.get("steps_log", [])
+        }
+    return final_report_node
+
 
 
 
@@ -1,41 +1,57 @@
 
 import re
-import pandas as pd
 from src.Orc_agent.State.state import analyzeState
 
-from src.Orc_agent.core.df_summary import get_df_summary
+from src.Orc_agent.core.df_summary import get_dataset_summary
+from src.Orc_agent.core.image_payload import image_data_url
+from src.Orc_agent.core.dataset_store import dataset_store
+from src.Orc_agent.core.code_library import CODE_LIBRARY_ENABLED, get_code_library, schema_fingerprint
+from src.Orc_agent.core.code_validator import validate_code, validator_stats
+from src.Orc_agent.core.cancellation import current_token, token_from_config
+from src.Orc_agent.core.metrics import record_executor, record_namespaces
 from typing import List, Dict, Any
 from pydantic import BaseModel, Field
 from langchain_core.runnables import RunnableConfig
 
 from src.Orc_agent.core.llm_factory import LLMFactory
-from src.Orc_agent.core.observe import langfuse_session
 from langchain_core.messages import HumanMessage
-import base64
+import asyncio
 import os
 
 from src.Orc_agent.core.observe import langfuse_session, observe
-import  matplotlib
 from src.Orc_agent.core.logger import logger
 from src.Orc_agent.core.executor import executor_instance
+from langgraph.types import Send
+import threading
+import time
+import weakref
+
+# 인사이트 모드: batch(기본, 모든 이미지를 한 번에 요청) / per_image(이미지별 병렬 요청 + 종합 요청)
+INSIGHT_MODE = os.environ.get("INSIGHT_MODE", "batch").lower()
+# per_image 모드에서 동시에 진행되는 이미지 분석 요청 수
+INSIGHT_MAX_CONCURRENCY = int(os.environ.get("INSIGHT_MAX_CONCURRENCY", 4))
+_image_semaphore = threading.BoundedSemaphore(INSIGHT_MAX_CONCURRENCY)
+_async_image_semaphores: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
 
 class MakeCodeOutput(BaseModel):
     code:str= Field(description="실행 가능한 파이썬 분석 코드. 설명이나 사족은 절대 포함하지 마세요.")
     
 ## INPUT : "preprocessing_data": 전처리 데이터 파일 경로(안전 제일 주의) , "user_query":사용자 질문,"feed_back":피드백
 
-@observe(name="Plan")
-def plan_analysis_code(state:analyzeState , config:RunnableConfig)-> analyzeState:
+def _next_roop_back(state:analyzeState) -> int:
     if state.get("user_choice")=="추가":
-        roop_back = state.get("roop_back",0) +1
-    else:
-        roop_back = 0
-    u_id = config["configurable"].get("user_id")
-    s_id = config["configurable"].get("session_id")
-    file_path = state.get("preprocessing_data","")
-    df = pd.read_csv(file_path)
-    df_summary = get_df_summary(df)
-    prompt =  f"""
+        return state.get("roop_back",0) +1
+    return 0
+
+def _schema_fingerprint(file_path: str) -> str:
+    try:
+        return schema_fingerprint(dataset_store.schema(file_path))
+    except Exception as e:
+        logger.warning(f"스키마 지문 계산 실패: {e}")
+        return ""
+
+def _plan_prompt(state:analyzeState, df_summary:str) -> str:
+    return f"""
     당신은 마케팅 데이터 전략가입니다. 제공된 데이터프레임의 요약 정보를 바탕으로 사용자의 질문에 답하기 위한 최적의 분석 시나리오를 설계하고 코드를 작성하세요.
     
  
@@ -49,39 +65,43 @@ def plan_analysis_code(state:analyzeState , config:RunnableConfig)-> analyzeStat
     *주의: 파이썬 코드는 작성하지 말고 오직 '계획'만 작성하세요.*
     이미지 파일은 최대 3개만 만들 수 있도록 계획을 구축하세요. 다만 각각의 이미지 파일은 하나의 그래프 또는 표만 들어가야합니다.
     """
+
+@observe(name="Plan")
+def plan_analysis_code(state:analyzeState , config:RunnableConfig)-> analyzeState:
+    roop_back = _next_roop_back(state)
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    file_path = state.get("preprocessing_data","")
+    df_summary = get_dataset_summary(file_path)
+    prompt = _plan_prompt(state, df_summary)
     llm, callbacks = LLMFactory.create('openai', 'gpt-5-nano', temperature=0.3)
         
     with langfuse_session(session_id=s_id, user_id=u_id):
         response = llm.invoke(prompt, config={'callbacks': callbacks})
 
     plan = response.content
-    return {"plan":plan , "df_summary":df_summary,"roop_back":roop_back,"error_roop": 0}
+    fingerprint = _schema_fingerprint(file_path)
+    return {"plan":plan , "df_summary":df_summary,"roop_back":roop_back,"error_roop": 0,"schema_fingerprint": fingerprint}
 
-@observe(name="Make")
-def make_analysis_code(state:analyzeState,config:RunnableConfig)-> analyzeState:
-    u_id = config["configurable"].get("user_id")
-    s_id = config["configurable"].get("session_id")
-    llm, callbacks = LLMFactory.create('openai', 'gpt-5.2')
-        
+def _data_path(state:analyzeState) -> str:
+    file_path_raw = state.get("preprocessing_data", "")
+    return os.path.abspath(file_path_raw).replace("\\", "/") if file_path_raw else ""
+
+def _make_prompt(state:analyzeState, s_id:str) -> str:
     if state.get("feed_back",None):
         text = f"수정사항: {state['feed_back']} 해당 수정사항을 반영하여 코드를 수정하세요"
     elif state.get("now_log",None):
         text = f"오류 및 수정사항 :{state['now_log']} 해당 오류가 발생 하지 않도록 수정을 진행하세요"
     else:
         text = ""
-    file_path_raw = state.get("preprocessing_data", "")
-    if file_path_raw:
-        file_path = os.path.abspath(file_path_raw).replace("\\", "/")
-    else:
-        file_path = ""
+    file_path = _data_path(state)
     current_dir = os.getcwd().replace("\\", "/") 
     # [Fix] Use session_id for isolation
     img_dir = f"webapp/static/img/{s_id}"
     if not os.path.exists(img_dir):
         os.makedirs(img_dir, exist_ok=True)
     logger.info(f"이미지 저장 경로: {img_dir}")
-    structured_llm = llm.with_structured_output(MakeCodeOutput)
-    prompt = f"""
+    return f"""
     분석 계획: {state['plan']}
     데이터 요약: {state['df_summary']}
     [데이터 파일 경로]: {file_path}
@@ -90,95 +110,110 @@ def make_analysis_code(state:analyzeState,config:RunnableConfig)-> analyzeState:
     
     [필수]
     - 변수명 앞에 _df 이렇게 작성하지마세요 추가적인 df가 필요하다면 copy1_df,copy2_df ... 이렇게 작성하세요 절대로 변수명 앞에 _ 사용하지 마세요.
-    - 코드 시작 부분에서 반드시 데이터를 로드하세요: df = pd.read_csv(r'{file_path}') 
+    - 데이터는 실행 환경에 df(pandas DataFrame)로 미리 로드되어 있습니다. 데이터 파일을 다시 읽지 말고 df를 바로 사용하세요. (df = load_dataset(...), pd.read_csv 호출 금지)
+    - df는 실행마다 원본 데이터 상태로 제공되며, 코드에서 수정해도 원본 데이터에는 영향이 없습니다.
+    - df의 일부 문자열 컬럼은 category 타입입니다. groupby에는 항상 observed=True를 지정하세요. (예: df.groupby('channel', observed=True))
     - 설명이나 마크다운(```python ... ```) 없이 오직 파이썬 코드만 출력하세요. 
     - print 구문 사용 하지 마세요
     [이미지 저장 규칙]
     - 시각화가 필요한 경우, 각 그래프를 '{img_dir}/figure_{state.get("roop_back", 0)}_0.png', '{img_dir}/figure_{state.get("roop_back", 0)}_1.png', ... 와 같이 순서대로 저장하세요. ({state.get("make_insight", 0)}은 현재 인사이트 번호입니다.)
     - 반드시 절대경로를 사용하여 저장하세요: plt.savefig(r'{img_dir}/figure_{state.get("roop_back", 0)}_n.png')
-    - 한글 폰트 깨짐을 방지하기 위해 'koreanize_matplotlib' 라이브러리가 설치되어 있다고 가정하고 import하세요. 또는 폰트 설정을 직접 하세요.
+    - 한글 폰트와 matplotlib/seaborn 스타일은 실행 환경에 이미 설정되어 있습니다. koreanize_matplotlib import, 폰트 탐색/설정(rcParams['font.family'], font_manager), sns.set()/sns.set_theme()/plt.style.use() 호출은 작성하지 마세요.
     
     - 각각의 이미지 파일은 하나의 그래프 또는 표만 들어가야합니다
     - csv파일은 생성하지마세요.
-    - numpy,pandas, matplotlib, seaborn ,koreanize_matplotlib 라이브러리를 사용하세요.
+    - numpy(np), pandas(pd), matplotlib.pyplot(plt), seaborn(sns)은 이미 import되어 있으니 그대로 사용하세요.
     """
-    
+
+def _make_result(state:analyzeState, code:str) -> analyzeState:
+    if state.get("user_choice")=="수정":
+        return {"code": code,"result_img_paths": ["RESET"],"final_insight": {"RESET": True}}
+    else:
+        return {"code": code}
+
+def _library_code(state:analyzeState, s_id:str):
+    """
+    같은 스키마 + 같은 질문으로 승인된 코드가 있으면 현재 경로로 채워 반환합니다.
+    피드백 반영/오류 수정/추가 분석 회차는 항상 LLM으로 작성합니다.
+    """
+    if not CODE_LIBRARY_ENABLED or not state.get("schema_fingerprint"):
+        return None
+    if state.get("feed_back") or state.get("now_log") or state.get("roop_back", 0):
+        return None
+    try:
+        return get_code_library().lookup(
+            state["schema_fingerprint"], state.get("user_query", ""),
+            _data_path(state), f"webapp/static/img/{s_id}", state.get("roop_back", 0),
+        )
+    except Exception as e:
+        logger.warning(f"코드 라이브러리 조회 실패: {e}")
+        return None
+
+def _remember_code(state:analyzeState, s_id:str):
+    """Eval에서 승인된 LLM 작성 코드를 라이브러리에 저장합니다."""
+    if not CODE_LIBRARY_ENABLED or state.get("code_origin") != "llm":
+        return
+    if not state.get("schema_fingerprint") or state.get("roop_back", 0) or state.get("feed_back"):
+        return
+    try:
+        get_code_library().store(
+            state["schema_fingerprint"], state.get("user_query", ""), state.get("code", ""),
+            _data_path(state), f"webapp/static/img/{s_id}", state.get("roop_back", 0),
+        )
+    except Exception as e:
+        logger.warning(f"코드 라이브러리 저장 실패: {e}")
+
+def _make_failed(state:analyzeState, e:Exception) -> analyzeState:
+    return {"now_log": [f"Code Generation Failed: {str(e)}"], "error_roop": state.get("error_roop", 0) + 1}
+
+@observe(name="Make")
+def make_analysis_code(state:analyzeState,config:RunnableConfig)-> analyzeState:
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    code = _library_code(state, s_id)
+    if code:
+        logger.info("[Make] 코드 라이브러리 적중 — LLM 호출 생략")
+        return {**_make_result(state, code), "code_origin": "library"}
+
+    llm, callbacks = LLMFactory.create('openai', 'gpt-5.2')
+    structured_llm = llm.with_structured_output(MakeCodeOutput)
+    prompt = _make_prompt(state, s_id)
+
     try:
         with langfuse_session(session_id=s_id, user_id=u_id):
             response = structured_llm.invoke(prompt, config={'callbacks': callbacks})
         code = response.code
-        font_name = executor_instance.available_font or 'Malgun Gothic' # Fallback
-
-        header = f"""
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import os
-import platform
-import matplotlib.font_manager as fm
-from matplotlib import font_manager
 
-# 1. 시스템 폰트 찾기 (실제 설치된 폰트 확인)
-def get_korean_font():
-    font_list = font_manager.findSystemFonts(fontpaths=None, fontext='ttf')
-    
-    # 우선순위별 한글 폰트
-    preferred_fonts = [
-        'Malgun Gothic', 'NanumGothic', 'NanumBarunGothic', 
-        'AppleGothic', 'Apple SD Gothic Neo',
-        'Noto Sans KR', 'Noto Sans CJK KR',
-        'DejaVu Sans'  # fallback
-    ]
-    
-    for pref_font in preferred_fonts:
-        for font_path in font_list:
-            font_name = fm.FontProperties(fname=font_path).get_name()
-            if pref_font.lower() in font_name.lower():
-                return pref_font
-    
-    # 아무 한글 폰트나 찾기
-    for font_path in font_list:
-        font_name = fm.FontProperties(fname=font_path).get_name()
-        if any(keyword in font_name.lower() for keyword in ['gothic', 'nanum', 'malgun', 'apple']):
-            return font_name
-    
-    return 'DejaVu Sans'  # 최종 fallback
-
-korean_font = get_korean_font()
-
-# 2. Matplotlib 전역 설정 (강제)
-plt.rcParams.update({{
-    'font.family': korean_font,
-    'font.sans-serif': [korean_font, 'DejaVu Sans'],
-    'axes.unicode_minus': False,
-    'figure.autolayout': True
-}})
-
-# 3. Seaborn 설정 (폰트 설정 후에)
-try:
-    sns.set_style("whitegrid")
-    sns.set_context("notebook")
-    # Seaborn이 폰트를 덮어쓰지 않도록 재설정
-    sns.set(font=korean_font, rc={{'font.family': korean_font}})
-except:
-    pass
-
-# 4. 폰트 캐시 무효화 (필요시)
-try:
-    fm._rebuild()
-except:
-    pass
+    except Exception as e:
+        return _make_failed(state, e)
+    return {**_make_result(state, code), "code_origin": "llm"}
 
-print(f"사용 중인 한글 폰트: {{korean_font}}")
-"""
-        code = header + "\n" + code
+@observe(name="Validate")
+def validate_generated_code(state:analyzeState, config: RunnableConfig)->analyzeState:
+    """Make와 Run 사이의 AST 사전 검증. 자동 수정 가능한 문제는 고치고, 나머지는 now_log로 Make에 되돌림"""
+    s_id = config["configurable"].get("session_id")
+    file_path = state.get("preprocessing_data","")
+    try:
+        columns = [name for name, _ in dataset_store.schema(file_path)] if file_path else []
     except Exception as e:
-        return {"now_log": [f"Code Generation Failed: {str(e)}"], "error_roop": state.get("error_roop", 0) + 1}
-    if state.get("user_choice")=="수정":
-        return {"code": code,"result_img_paths": ["RESET"],"final_insight": {"RESET": True}}
-    else:
-        return {"code": code}
+        logger.warning(f"[Validate] 스키마 조회 실패, 컬럼 검사 생략: {e}")
+        columns = []
+
+    code, errors, fixes = validate_code(
+        state.get("code",""), columns, _data_path(state), f"webapp/static/img/{s_id}", state.get("roop_back", 0)
+    )
+    for fix in fixes:
+        logger.info(f"[Validate] 자동 수정: {fix}")
+    logger.info(f"[Validate] 누적 통계: {validator_stats()}")
+
+    if errors:
+        # 실행하지 않은 코드이므로 실행 실패(error_roop)가 아닌 별도 카운터로 집계
+        return {
+            "now_log": [f"[Validate] {e}" for e in errors],
+            "validate_roop": state.get("validate_roop",0) + 1,
+            "code_valid": False
+        }
+    return {"code": code, "code_valid": True, "validate_roop": 0}
 
 @observe(name="Run")
 def run_code(state:analyzeState, config: RunnableConfig)->analyzeState:
@@ -205,10 +240,17 @@ def run_code(state:analyzeState, config: RunnableConfig)->analyzeState:
     # [Safety] 코드 주입 및 로깅
    
     try:
-        # [NEW] Persistent Executor 사용
-        result = executor_instance.run(code)
+        # [NEW] Persistent Executor 사용 (세션별 워커/namespace)
+        # 취소 시 실행 중인 코드를 중단하고 RunCancelled 발생 (except Exception에 잡히지 않음)
+        cancel_token = token_from_config(config) or current_token()
+        started = time.perf_counter()
+        try:
+            result = executor_instance.run(code, session_id=s_id, cancel_token=cancel_token, data_path=_data_path(state))
+        finally:
+            record_executor(time.perf_counter() - started, config["configurable"].get("thread_id"))
+            record_namespaces(executor_instance.namespace_stats())
         
-        logger.info(f"실행 결과: {result[:500]}")
+        logger.info(f"실행 결과: {result[:500]}", extra={"category": "executor_result"})
         if "Traceback" in result:
              return {
                 "now_log": [result], 
@@ -224,11 +266,8 @@ def run_code(state:analyzeState, config: RunnableConfig)->analyzeState:
             "now_log": [str(e)], 
             "error_roop": state.get("error_roop",0)  + 1
         }
-@observe(name="Eval")    
-def evaluation_code(state: analyzeState,config:RunnableConfig):
-    u_id = config["configurable"].get("user_id")
-    s_id = config["configurable"].get("session_id")
-    prompt = f"""
+def _eval_prompt(state: analyzeState) -> str:
+    return f"""
     당신은 마케팅 분석 검증 전문가(LLM-as-a-judge)입니다.
     [분석 계획]: {state['plan']}
     [실행 결과]: {state['final_insight']}
@@ -237,20 +276,39 @@ def evaluation_code(state: analyzeState,config:RunnableConfig):
     결과가 타당하면 'APPROVE', 부족하거나 오류가 보이면 'REJECT'와 이유를 적으세요.
     지금은 테스트 상황이니 'APPROVE'를 반환해주세요.
     """
+
+def _eval_result(response) -> analyzeState:
+    if "APPROVE" in response.content:
+        return {"is_approved": True}
+    else:
+        return {"is_approved": False, "now_log": [response.content]}
+
+@observe(name="Eval")    
+def evaluation_code(state: analyzeState,config:RunnableConfig):
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    prompt = _eval_prompt(state)
     llm, callbacks = LLMFactory.create('openai', 'gpt-5-nano', temperature=0.3)
         
     with langfuse_session(session_id=s_id, user_id=u_id):
         response = llm.invoke(prompt, config={'callbacks': callbacks})
     
-    if "APPROVE" in response.content:
-        return {"is_approved": True}
-    else:
-        return {"is_approved": False, "now_log": [response.content]}
+    result = _eval_result(response)
+    if result["is_approved"]:
+        _remember_code(state, s_id)
+    return result
 
 
 def route_wait_node(state: analyzeState):
     pass
 
+def router_validate(state: analyzeState):
+    if state.get("validate_roop",0) >=3:
+        raise Exception("생성된 분석 코드가 실행 전 사전 검증을 3회 연속 통과하지 못했습니다. 코드를 검토해주세요.")
+    elif not state.get("code_valid", True):
+        return "Make"
+    return "Run"
+
 def router_error(state: analyzeState):
 
     if state.get("error_roop",0) >=3:
@@ -258,6 +316,9 @@ def router_error(state: analyzeState):
     elif state.get("now_log",None):
         return "Make"
 
+    elif INSIGHT_MODE == "per_image" and _current_images(state):
+        # 이미지별 인사이트를 병렬 태스크로 분기 (Insight_image -> Insight_overall)
+        return [Send("Insight_image", _image_task(state, p)) for p in _current_images(state)]
     else:
         return "Insight" 
 
@@ -289,11 +350,15 @@ class InsightOutput(BaseModel):
     image_specific_insights: List[ImageInsight] = Field(description="각 이미지별 개별 분석 결과 리스트")
 
 
-@observe(name="Insight")
-def derive_insight_node(state: analyzeState, config: RunnableConfig):
+def _image_content(img_path: str) -> List[Dict[str, Any]]:
+    """이미지 한 장을 파일명 텍스트 + image_url 파트로 변환합니다. (축소/재인코딩된 캐시 페이로드 사용)"""
+    return [
+        {"type": "text", "text": f"Image Filename: {os.path.basename(img_path)}"},
+        {"type": "image_url", "image_url": {"url": image_data_url(img_path)}},
+    ]
 
-    u_id = config["configurable"].get("user_id")
-    s_id = config["configurable"].get("session_id")
+def _insight_message(state: analyzeState, s_id: str):
+    """현재 루프의 이미지와 분석 배경으로 멀티모달 메시지를 구성합니다. (msg, img_paths) 반환"""
     roop = str(state.get("roop_back", 0))
 
     # 기존에 생성된 이미지 파일이 있다면 삭제 (초기화)
@@ -330,68 +395,290 @@ def derive_insight_node(state: analyzeState, config: RunnableConfig):
     # 2. 이미지 첨부
     for img_path in new_img_paths:
         if os.path.exists(img_path):
-            with open(img_path, "rb") as image_file:
-                image_data = base64.b64encode(image_file.read()).decode("utf-8")
-            
-            messages_content.append({"type": "text", "text": f"Image Filename: {os.path.basename(img_path)}"})
-            messages_content.append({
-                "type": "image_url",
-                "image_url": {"url": f"data:image/png;base64,{image_data}"}
-            })
+            messages_content.extend(_image_content(img_path))
             
     if not new_img_paths:
          messages_content.append({"type": "text", "text": "(생성된 이미지가 없습니다. 텍스트 결과 및 데이터 요약을 바탕으로 분석해 주세요.)"})
 
     msg = HumanMessage(content=messages_content)
+    return msg, img_paths
+
+def _insight_result(response: InsightOutput, img_paths: List[str], roop: str) -> Dict[str, Any]:
+    filename_map = {os.path.basename(p): p for p in img_paths}
+    
+    # [Fix] Overall Insight를 병합하지 않고 회차별로 분리하여 저장
+    overall_key = f"overall_{roop}"
     
+    final_insight = {
+        overall_key: {
+            "insight": response.overall_insight,
+            "img_path": None
+        }
+    }
+    
+    for item in response.image_specific_insights:
+        item_basename = os.path.basename(item.img_name)
+        full_path = filename_map.get(item_basename, None)
+        
+        # fallback: find by partial match
+        if not full_path:
+            for k, v in filename_map.items():
+                if item_basename in k or k in item_basename:
+                    item_basename = k
+                    full_path = v
+                    break
+        
+        final_insight[item_basename] = {
+            "insight": item.insight,
+            "img_path": full_path
+        }
+    return final_insight
+
+def _insight_fallback(plain_response, roop: str) -> Dict[str, Any]:
+    overall_key = f"overall_{roop}"
+    return {
+        overall_key: {
+            "insight": plain_response.content,
+            "img_path": None
+        }
+    }
+
+@observe(name="Insight")
+def derive_insight_node(state: analyzeState, config: RunnableConfig):
+
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    roop = str(state.get("roop_back", 0))
+    msg, img_paths = _insight_message(state, s_id)
+
     llm, callbacks = LLMFactory.create('openai', 'gpt-5-nano', temperature=0.3)
     structured_llm = llm.with_structured_output(InsightOutput)
     
     try:
         with langfuse_session(session_id=s_id, user_id=u_id):
             response = structured_llm.invoke([msg], config={'callbacks': callbacks})
-            
-        filename_map = {os.path.basename(p): p for p in img_paths}
-        
-        # [Fix] Overall Insight를 병합하지 않고 회차별로 분리하여 저장
-        overall_key = f"overall_{roop}"
-        
-        final_insight = {
-            overall_key: {
-                "insight": response.overall_insight,
-                "img_path": None
-            }
-        }
-        
-        for item in response.image_specific_insights:
-            item_basename = os.path.basename(item.img_name)
-            full_path = filename_map.get(item_basename, None)
-            
-            # fallback: find by partial match
-            if not full_path:
-                for k, v in filename_map.items():
-                    if item_basename in k or k in item_basename:
-                        item_basename = k
-                        full_path = v
-                        break
-            
-            final_insight[item_basename] = {
-                "insight": item.insight,
-                "img_path": full_path
-            }
+        final_insight = _insight_result(response, img_paths, roop)
                 
     except Exception as e:
-        print(f"Structured Output Failed: {e}. Fallback to text.")
-        llm, callbacks = LLMFactory.create('openai', 'gpt-5-nano', temperature=0.3)
+        logger.warning(f"[Insight] Structured Output 실패, 텍스트 응답으로 대체: {e}")
+        # 같은 클라이언트를 재사용하여 텍스트로 재요청
         with langfuse_session(session_id=s_id, user_id=u_id):
             plain_response = llm.invoke([msg], config={'callbacks': callbacks})
-            
-        overall_key = f"overall_{roop}"
-        final_insight = {
-            overall_key: {
-                "insight": plain_response.content,
-                "img_path": None
-            }
-        }
+        final_insight = _insight_fallback(plain_response, roop)
 
     return {"final_insight": final_insight}
+
+
+# ---------------------------------------------------------------------------
+# per_image 모드 — 이미지별 요청(Insight_image)을 병렬로 보내고, 종합 요청(Insight_overall)으로 마무리
+# 각 태스크의 결과는 merge_dicts로 final_insight에 도착하는 즉시 기록됨
+# ---------------------------------------------------------------------------
+
+def _current_images(state: analyzeState) -> List[str]:
+    roop = str(state.get("roop_back", 0))
+    paths = state.get("result_img_paths", []) or []
+    return sorted({p for p in paths if os.path.basename(p).startswith(f"figure_{roop}_") and os.path.exists(p)})
+
+def _image_task(state: analyzeState, img_path: str) -> Dict[str, Any]:
+    """Send로 전달할 이미지 단위 입력"""
+    return {
+        "img_path": img_path,
+        "plan": state.get("plan", ""),
+        "df_summary": state.get("df_summary", ""),
+        "roop_back": state.get("roop_back", 0),
+    }
+
+def _image_message(task: Dict[str, Any]) -> HumanMessage:
+    img_name = os.path.basename(task["img_path"])
+    content = [{"type": "text", "text": f"""
+    당신은 수석 데이터 분석가입니다.
+    
+    [분석 배경]
+    - 계획: {task.get("plan", "")}
+    - 데이터 요약 정보: {task.get("df_summary", "")}
+    
+    제공되는 시각화 이미지({img_name}) 한 장에 대해 구체적인 수치와 패턴을 분석하세요.
+    """}]
+    content.extend(_image_content(task["img_path"]))
+    return HumanMessage(content=content)
+
+def _image_result(task: Dict[str, Any], insight: str) -> Dict[str, Any]:
+    img_name = os.path.basename(task["img_path"])
+    return {"final_insight": {img_name: {"insight": insight, "img_path": task["img_path"]}}}
+
+def _image_failed(task: Dict[str, Any], e: Exception) -> Dict[str, Any]:
+    logger.error(f"[Insight] {os.path.basename(task['img_path'])} 분석 실패: {e}")
+    return _image_result(task, f"(이미지 분석 실패: {e})")
+
+def _overall_prompt(state: analyzeState) -> str:
+    roop = str(state.get("roop_back", 0))
+    insights = state.get("final_insight", {}) or {}
+    lines = [
+        f"- {name}: {item.get('insight', '')}"
+        for name, item in sorted(insights.items())
+        if name.startswith(f"figure_{roop}_") and isinstance(item, dict)
+    ]
+    return f"""
+    당신은 수석 데이터 분석가입니다.
+    
+    [분석 계획]: {state.get("plan", "")}
+    [이번 회차({roop}) 이미지별 분석 결과]:
+    {chr(10).join(lines)}
+    
+    위 개별 분석 결과가 전체 분석에 어떤 의미를 주는지 설명하는 **독립적인 종합 인사이트**를 작성하세요. (비즈니스 액션 아이템 포함)
+    """
+
+def _overall_result(state: analyzeState, response) -> Dict[str, Any]:
+    roop = str(state.get("roop_back", 0))
+    return {"final_insight": {f"overall_{roop}": {"insight": response.content, "img_path": None}}}
+
+@observe(name="Insight_image")
+def derive_image_insight_node(task: Dict[str, Any], config: RunnableConfig):
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    llm, callbacks = LLMFactory.create('openai', 'gpt-5-nano', temperature=0.3)
+
+    # 이미지 한 장의 실패는 해당 이미지에만 기록하고 다른 이미지 결과는 그대로 유지
+    try:
+        msg = _image_message(task)
+        with _image_semaphore:
+            with langfuse_session(session_id=s_id, user_id=u_id):
+                response = llm.invoke([msg], config={'callbacks': callbacks})
+    except Exception as e:
+        return _image_failed(task, e)
+    return _image_result(task, response.content)
+
+@observe(name="Insight_overall")
+def derive_overall_insight_node(state: analyzeState, config: RunnableConfig):
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    llm, callbacks = LLMFactory.create('openai', 'gpt-5-nano', temperature=0.3)
+
+    with langfuse_session(session_id=s_id, user_id=u_id):
+        response = llm.invoke(_overall_prompt(state), config={'callbacks': callbacks})
+    return _overall_result(state, response)
+
+
+# ---------------------------------------------------------------------------
+# 비동기(async) 노드 — ainvoke 사용, 블로킹 작업(프로파일링/코드 실행)은 스레드로 위임
+# ---------------------------------------------------------------------------
+
+@observe(name="Plan")
+async def aplan_analysis_code(state:analyzeState , config:RunnableConfig)-> analyzeState:
+    roop_back = _next_roop_back(state)
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    file_path = state.get("preprocessing_data","")
+    df_summary = await asyncio.to_thread(get_dataset_summary, file_path)
+    prompt = _plan_prompt(state, df_summary)
+    llm, callbacks = LLMFactory.create('openai', 'gpt-5-nano', temperature=0.3)
+
+    with langfuse_session(session_id=s_id, user_id=u_id):
+        response = await llm.ainvoke(prompt, config={'callbacks': callbacks})
+
+    plan = response.content
+    fingerprint = await asyncio.to_thread(_schema_fingerprint, file_path)
+    return {"plan":plan , "df_summary":df_summary,"roop_back":roop_back,"error_roop": 0,"schema_fingerprint": fingerprint}
+
+@observe(name="Make")
+async def amake_analysis_code(state:analyzeState,config:RunnableConfig)-> analyzeState:
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    code = await asyncio.to_thread(_library_code, state, s_id)
+    if code:
+        logger.info("[Make] 코드 라이브러리 적중 — LLM 호출 생략")
+        return {**_make_result(state, code), "code_origin": "library"}
+
+    llm, callbacks = LLMFactory.create('openai', 'gpt-5.2')
+    structured_llm = llm.with_structured_output(MakeCodeOutput)
+    prompt = _make_prompt(state, s_id)
+
+    try:
+        with langfuse_session(session_id=s_id, user_id=u_id):
+            response = await structured_llm.ainvoke(prompt, config={'callbacks': callbacks})
+        code = response.code
+
+    except Exception as e:
+        return _make_failed(state, e)
+    return {**_make_result(state, code), "code_origin": "llm"}
+
+async def avalidate_generated_code(state:analyzeState, config: RunnableConfig)->analyzeState:
+    # 스키마 조회(Feather 메타데이터)와 AST 검사는 짧은 블로킹 작업이므로 스레드에서 실행
+    return await asyncio.to_thread(validate_generated_code, state, config)
+
+async def arun_code(state:analyzeState, config: RunnableConfig)->analyzeState:
+    # 코드 실행은 프로세스 풀/exec 블로킹 호출이므로 스레드에서 실행
+    return await asyncio.to_thread(run_code, state, config)
+
+@observe(name="Eval")
+async def aevaluation_code(state: analyzeState,config:RunnableConfig):
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    prompt = _eval_prompt(state)
+    llm, callbacks = LLMFactory.create('openai', 'gpt-5-nano', temperature=0.3)
+
+    with langfuse_session(session_id=s_id, user_id=u_id):
+        response = await llm.ainvoke(prompt, config={'callbacks': callbacks})
+
+    result = _eval_result(response)
+    if result["is_approved"]:
+        await asyncio.to_thread(_remember_code, state, s_id)
+    return result
+
+@observe(name="Insight")
+async def aderive_insight_node(state: analyzeState, config: RunnableConfig):
+
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    roop = str(state.get("roop_back", 0))
+    msg, img_paths = await asyncio.to_thread(_insight_message, state, s_id)
+
+    llm, callbacks = LLMFactory.create('openai', 'gpt-5-nano', temperature=0.3)
+    structured_llm = llm.with_structured_output(InsightOutput)
+
+    try:
+        with langfuse_session(session_id=s_id, user_id=u_id):
+            response = await structured_llm.ainvoke([msg], config={'callbacks': callbacks})
+        final_insight = _insight_result(response, img_paths, roop)
+
+    except Exception as e:
+        logger.warning(f"[Insight] Structured Output 실패, 텍스트 응답으로 대체: {e}")
+        with langfuse_session(session_id=s_id, user_id=u_id):
+            plain_response = await llm.ainvoke([msg], config={'callbacks': callbacks})
+        final_insight = _insight_fallback(plain_response, roop)
+
+    return {"final_insight": final_insight}
+
+
+def _async_image_semaphore() -> asyncio.Semaphore:
+    """이벤트 루프별 동시 요청 제한 (asyncio.Semaphore는 루프에 묶이므로 루프마다 생성)"""
+    loop = asyncio.get_running_loop()
+    sem = _async_image_semaphores.get(loop)
+    if sem is None:
+        sem = _async_image_semaphores[loop] = asyncio.Semaphore(INSIGHT_MAX_CONCURRENCY)
+    return sem
+
+@observe(name="Insight_image")
+async def aderive_image_insight_node(task: Dict[str, Any], config: RunnableConfig):
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    llm, callbacks = LLMFactory.create('openai', 'gpt-5-nano', temperature=0.3)
+
+    try:
+        msg = await asyncio.to_thread(_image_message, task)
+        async with _async_image_semaphore():
+            with langfuse_session(session_id=s_id, user_id=u_id):
+                response = await llm.ainvoke([msg], config={'callbacks': callbacks})
+    except Exception as e:
+        return _image_failed(task, e)
+    return _image_result(task, response.content)
+
+@observe(name="Insight_overall")
+async def aderive_overall_insight_node(state: analyzeState, config: RunnableConfig):
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+    llm, callbacks = LLMFactory.create('openai', 'gpt-5-nano', temperature=0.3)
+
+    with langfuse_session(session_id=s_id, user_id=u_id):
+        response = await llm.ainvoke(_overall_prompt(state), config={'callbacks': callbacks})
+    return _overall_result(state, response)
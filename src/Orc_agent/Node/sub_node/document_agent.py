@@ -1,13 +1,21 @@
+import asyncio
 import os
-import fitz  # PyMuPDF
-from docx import Document
-import base64
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableConfig
 
 from src.Orc_agent.State.state import DocumentState
 from src.Orc_agent.core.llm_factory import LLMFactory
 from src.Orc_agent.core.observe import langfuse_session, observe
+from src.Orc_agent.core.image_payload import ocr_page_data_url
+from src.Orc_agent.core.logger import logger
+
+# OCR 폴백에서 PDF 페이지를 이미지로 렌더링할 해상도 (작은 한글도 판독 가능한 수준)
+OCR_RENDER_DPI = int(os.environ.get("OCR_RENDER_DPI", 200))
+# OCR할 최대 페이지 수 (0: 제한 없음)와 한 번의 Vision 호출에 보낼 페이지 수
+OCR_MAX_PAGES = int(os.environ.get("OCR_MAX_PAGES", 50))
+OCR_PAGES_PER_CALL = max(1, int(os.environ.get("OCR_PAGES_PER_CALL", 5)))
+
+_OCR_PROMPT = "이 PDF 페이지들의 모든 텍스트를 순서대로 추출해서 그대로 반환해주세요. 한국어와 영어 모두 포함하고, 표나 리스트 구조는 가능한 한 유지해주세요."
 
 
 def _extract_pdf_via_gemini(file_path: str, session_id: str = "unknown") -> str:
@@ -17,26 +25,34 @@ def _extract_pdf_via_gemini(file_path: str, session_id: str = "unknown") -> str:
         model="gemini-2.0-flash",
         temperature=0.0,
     )
+    import fitz  # PyMuPDF (문서 업로드 시에만 로드)
 
-    with open(file_path, "rb") as f:
-        pdf_b64 = base64.b64encode(f.read()).decode("utf-8")
-
-    msg = HumanMessage(
-        content=[
-            {
-                "type": "text",
-                "text": "이 PDF 문서의 모든 텍스트를 순서대로 추출해서 그대로 반환해주세요. 한국어와 영어 모두 포함하고, 표나 리스트 구조는 가능한 한 유지해주세요.",
-            },
-            {
-                "type": "image_url",
-                "image_url": {"url": f"data:application/pdf;base64,{pdf_b64}"},
-            },
-        ]
-    )
-
-    with langfuse_session(session_id=session_id, tags=["document_agent", "ocr_fallback"]):
-        resp = llm.invoke([msg], config={"callbacks": callbacks})
-
+    # 페이지를 OCR 예산(큰 해상도 + 무손실)으로 렌더링하고, OCR_PAGES_PER_CALL 페이지씩 나눠 호출
+    # (한 번에 렌더링/전송하는 페이지 수가 제한되어 메모리와 요청 크기가 문서 길이와 무관)
+    doc = fitz.open(file_path)
+    try:
+        total_pages = len(doc)
+        page_count = min(total_pages, OCR_MAX_PAGES) if OCR_MAX_PAGES > 0 else total_pages
+        texts = []
+        for start in range(0, page_count, OCR_PAGES_PER_CALL):
+            content = [{"type": "text", "text": _OCR_PROMPT}]
+            for index in range(start, min(start + OCR_PAGES_PER_CALL, page_count)):
+                pix = doc[index].get_pixmap(dpi=OCR_RENDER_DPI)
+                content.append({"type": "image_url", "image_url": {"url": ocr_page_data_url(pix.tobytes("png"))}})
+
+            with langfuse_session(session_id=session_id, tags=["document_agent", "ocr_fallback"]):
+                resp = llm.invoke([HumanMessage(content=content)], config={"callbacks": callbacks})
+            texts.append(_response_text(resp))
+    finally:
+        doc.close()
+
+    if page_count < total_pages:
+        logger.warning(f"[Document] OCR 페이지 제한: {total_pages}페이지 중 앞 {page_count}페이지만 추출")
+        texts.append(f"(이후 {total_pages - page_count}페이지는 OCR 페이지 제한(OCR_MAX_PAGES)으로 생략되었습니다.)")
+    return "\n\n".join(t for t in texts if t)
+
+
+def _response_text(resp) -> str:
     if hasattr(resp, "content"):
         c = resp.content
         if isinstance(c, str):
@@ -50,6 +66,8 @@ def _extract_pdf_via_gemini(file_path: str, session_id: str = "unknown") -> str:
 
 
 def _extract_pdf_text(file_path: str, session_id: str) -> str:
+    import fitz  # PyMuPDF (문서 업로드 시에만 로드)
+
     doc = fitz.open(file_path)
     pages = list(doc)
     text_parts = [p.get_text("text", sort=True).strip() for p in pages]
@@ -64,6 +82,8 @@ def _extract_pdf_text(file_path: str, session_id: str) -> str:
 
 
 def _extract_word_text(file_path: str) -> str:
+    from docx import Document  # python-docx (Word 업로드 시에만 로드)
+
     doc = Document(file_path)
     return "\n".join(p.text for p in doc.paragraphs)
 
@@ -100,6 +120,22 @@ def read_file_node(state: DocumentState, config: RunnableConfig) -> DocumentStat
         return {"steps_log": [f"ERROR reading file: {str(e)}"]}
 
 
+def _doc_prompt(text: str) -> str:
+    truncated_text = text[:3000] if len(text) > 3000 else text
+    return f"""
+    당신은 문서 분석 전문가입니다.
+    아래 문서를 읽고 다음 정보를 한국어로 구조화해서 반환해 주세요.
+
+    1. **한 문단 요약** (3~5문장)
+    2. **주요 키워드** (5~10개, 쉼표 구분)
+    3. **주요 수치/날짜/고유명사** (불릿 리스트)
+    4. **인사이트** (비즈니스적 함의)
+
+    ## 문서 내용
+    {truncated_text}
+    """
+
+
 def analyze_doc_node(state: DocumentState, config: RunnableConfig) -> DocumentState:
 
     u_id = config["configurable"].get("user_id")
@@ -109,27 +145,13 @@ def analyze_doc_node(state: DocumentState, config: RunnableConfig) -> DocumentSt
     if not raw_data or "content" not in raw_data:
         return {"steps_log": ["파일 분석 전, 파일을 업로드 해주세요."]}
     
-    text = raw_data["content"]
-    truncated_text = text[:3000] if len(text) > 3000 else text
-
     llm, callbacks = LLMFactory.create(
         provider="google",
         model="gemini-2.0-flash",
         temperature=0.0
     )
     
-    prompt = f"""
-    당신은 문서 분석 전문가입니다.
-    아래 문서를 읽고 다음 정보를 한국어로 구조화해서 반환해 주세요.
-
-    1. **한 문단 요약** (3~5문장)
-    2. **주요 키워드** (5~10개, 쉼표 구분)
-    3. **주요 수치/날짜/고유명사** (불릿 리스트)
-    4. **인사이트** (비즈니스적 함의)
-
-    ## 문서 내용
-    {truncated_text}
-    """
+    prompt = _doc_prompt(raw_data["content"])
     
     with langfuse_session(session_id=s_id, user_id=u_id):
         response = llm.invoke(prompt, config={'callbacks': callbacks})
@@ -138,3 +160,38 @@ def analyze_doc_node(state: DocumentState, config: RunnableConfig) -> DocumentSt
         "analysis_summary": response.content,
         "steps_log": ["Document analysis completed"]
     }
+
+
+# ---------------------------------------------------------------------------
+# 비동기(async) 노드
+# ---------------------------------------------------------------------------
+
+async def aread_file_node(state: DocumentState, config: RunnableConfig) -> DocumentState:
+    # PyMuPDF/python-docx 파싱은 블로킹 작업이므로 스레드에서 실행
+    return await asyncio.to_thread(read_file_node, state, config)
+
+
+async def aanalyze_doc_node(state: DocumentState, config: RunnableConfig) -> DocumentState:
+
+    u_id = config["configurable"].get("user_id")
+    s_id = config["configurable"].get("session_id")
+
+    raw_data = state.get("raw_data")
+    if not raw_data or "content" not in raw_data:
+        return {"steps_log": ["파일 분석 전, 파일을 업로드 해주세요."]}
+
+    llm, callbacks = LLMFactory.create(
+        provider="google",
+        model="gemini-2.0-flash",
+        temperature=0.0
+    )
+
+    prompt = _doc_prompt(raw_data["content"])
+
+    with langfuse_session(session_id=s_id, user_id=u_id):
+        response = await llm.ainvoke(prompt, config={'callbacks': callbacks})
+
+    return {
+        "analysis_summary": response.content,
+        "steps_log": ["Document analysis completed"]
+    }
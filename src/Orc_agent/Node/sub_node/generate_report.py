@@ -1,14 +1,12 @@
 import os
 import io
+import time
+import functools
 import pandas as pd
-import markdown
-
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from xhtml2pdf import pisa
 
 from src.Orc_agent.core.llm_factory import LLMFactory
 from src.Orc_agent.core.observe import langfuse_session, observe
+from src.Orc_agent.core.stream_writer import REPORT_TOKEN, stream_writer
 from src.Orc_agent.core.prompt_engineering.prompts import REPORT_PROMPT
 from src.Orc_agent.State.state import ReportState
 
@@ -21,58 +19,132 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 
 from typing import Literal, List
-@observe(name="Supervisor")
-def report_supervisor(state: ReportState) -> ReportState:
+
+# 요청 가능한 보고서 형식 -> 렌더러 노드 이름
+FORMAT_NODES = {
+    "pdf": "create_pdf",
+    "html": "create_html",
+    "pptx": "create_pptx",
+}
+
+
+def route_formats(state: ReportState) -> List[str]:
     """
-    Supervisor node that decides the next step in report generation.
+    generate_content 이후, 요청된 형식의 렌더러 노드를 한 번에 반환합니다.
+    반환된 노드들은 같은 super-step에서 병렬로 실행됩니다. (없으면 FINISH)
     """
-    final_report = state.get("final_report")
     report_format = state.get("report_format", ["markdown"])
     logger.info(f"현재 등록된 보고서 형식 : {report_format}")
 
-    
     # Ensure report_format is a list of lowercase strings
     if isinstance(report_format, str):
         report_format = [report_format]
     report_format = [f.lower() for f in report_format]
+
+    if not state.get("final_report"):
+        return ["FINISH"]
+
+    workers = [node for fmt, node in FORMAT_NODES.items() if fmt in report_format]
+    return workers or ["FINISH"]
+
+
+def timed_format(fmt: str):
+    """렌더러 실행 시간을 steps_log에 기록하는 데코레이터"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(state: ReportState) -> ReportState:
+            start = time.perf_counter()
+            result = fn(state)
+            elapsed = time.perf_counter() - start
+            logger.info(f"[Report] {fmt} 렌더링 시간: {elapsed:.2f}s")
+            result = dict(result)
+            result["steps_log"] = list(result.get("steps_log", [])) + [f"[Report] {fmt} rendered in {elapsed:.2f}s"]
+            return result
+        return wrapper
+    return decorator
+
+
+def report_join(state: ReportState) -> ReportState:
+    """병렬 렌더러가 모두 끝난 뒤 한 번 실행되는 합류 노드"""
+    generated = sorted(set(state.get("generated_formats", [])))
+    return {"steps_log": [f"[Report] All formats rendered: {', '.join(generated) or 'markdown'}"]}
+
+
+def _report_prompt(state: ReportState) -> str:
+    analysis_results = state.get("analysis_results", [])
+    clean_data = state.get("clean_data")
+    file_path = state.get("file_path", "Data")
+    figure_list = state.get("figure_list", [])
+
+    # Data Context
+    data_summary = ""
+    if clean_data:
+        df = pd.DataFrame(clean_data)
+        data_summary = f"""
+- Data Source: {file_path}
+- Rows: {len(df):,}
+- Columns: {len(df.columns)}
+- Column List: {', '.join(df.columns)}
+"""
+        
+
+    # Visualization Context
+    # Streamlit Cloud enableStaticServing: webapp/static/img/... -> /app/static/img/...
+    figure_markdown = ""
+    if figure_list:
+        figure_markdown = "### 시각화 자료 (아래 마크다운 링크를 보고서의 적절한 위치에 복사해서 사용하세요)\n"
+        for fig in figure_list:
+            # fig: 'webapp/static/img/{s_id}/figure.png'
+            # Cloud URL: '/app/static/img/{s_id}/figure.png'
+            web_path = fig.replace("webapp/static/", "/app/static/")
+            if not web_path.startswith("/"): web_path = "/" + web_path
+            
+            figure_markdown += f"![시각화]({web_path})\n"
     
-    generated_formats = state.get("generated_formats", [])
+    all_results = "\n\n---\n\n".join(analysis_results)
     
-    # helper to safely check format validity
-    def needs_format(fmt):
-        return fmt in report_format and fmt not in generated_formats
+    return REPORT_PROMPT.format(
+        data_summary=data_summary,
+        all_results=all_results,
+        figure_markdown=figure_markdown
+    )
+
+
+def _report_content(response) -> str:
+    # Handle response
+    if hasattr(response, 'content'):
+        content = response.content
+    else:
+        content = str(response)
+
+    if isinstance(content, list):
+        content = "".join([str(part) for part in content])
+    return content
+
+
+def _report_missing() -> ReportState:
+    return {
+        "final_report": "# Error\n\nNo analysis results available.",
+        "steps_log": ["[Report] ERROR: No analysis results"]
+    }
+
+
+def _report_failed(e: Exception) -> ReportState:
+    logger.error(f"Report Generation Error: {e}")
+    return {
+        "final_report": f"# Error\n\nReport generation failed: {str(e)}",
+        "steps_log": [f"[Report] ERROR: {str(e)}"]
+    }
+
 
-    # 1. If Markdown content is missing, generate it first
-    if not final_report:
-        return {"next_worker": "generate_content"}
-    
-    # 2. Check for requested formats that haven't been generated yet
-    if "pdf" in report_format and "pdf" not in generated_formats:
-        return {"next_worker": "create_pdf", "generated_formats": ["pdf"]}
-        
-    if "html" in report_format and "html" not in generated_formats:
-        return {"next_worker": "create_html", "generated_formats": ["html"]}
-        
-    if "pptx" in report_format and "pptx" not in generated_formats:
-        return {"next_worker": "create_pptx", "generated_formats": ["pptx"]}
-        
-    # 3. If all done (or just markdown requested), finish
-    return {"next_worker": "FINISH"}
 @observe(name="generate_content")
 def generate_content(state: ReportState) -> ReportState:
     """
     Generates report content in Markdown format using LLM.
+    Tokens are streamed to the "custom" stream as they arrive.
     """
-    analysis_results = state.get("analysis_results", [])
-    clean_data = state.get("clean_data")
-    file_path = state.get("file_path", "Data")
-    figure_list = state.get("figure_list", [])
-    
-    if not analysis_results:
-        return {
-            "final_report": "# Error\n\nNo analysis results available.",
-            "steps_log": ["[Report] ERROR: No analysis results"]
-        }
+    if not state.get("analysis_results", []):
+        return _report_missing()
 
     try:
         # LLM Setup
@@ -81,67 +153,64 @@ def generate_content(state: ReportState) -> ReportState:
             model="gpt-4o",
             temperature=0.3,
         )
-        
-        # Data Context
-        data_summary = ""
-        if clean_data:
-            df = pd.DataFrame(clean_data)
-            data_summary = f"""
-- Data Source: {file_path}
-- Rows: {len(df):,}
-- Columns: {len(df.columns)}
-- Column List: {', '.join(df.columns)}
-"""
-            
-
-        # Visualization Context
-        # Streamlit Cloud enableStaticServing: webapp/static/img/... -> /app/static/img/...
-        figure_markdown = ""
-        if figure_list:
-            figure_markdown = "### 시각화 자료 (아래 마크다운 링크를 보고서의 적절한 위치에 복사해서 사용하세요)\n"
-            for fig in figure_list:
-                # fig: 'webapp/static/img/{s_id}/figure.png'
-                # Cloud URL: '/app/static/img/{s_id}/figure.png'
-                web_path = fig.replace("webapp/static/", "/app/static/")
-                if not web_path.startswith("/"): web_path = "/" + web_path
-                
-                figure_markdown += f"![시각화]({web_path})\n"
-        
-        all_results = "\n\n---\n\n".join(analysis_results)
-        
-        prompt = REPORT_PROMPT.format(
-            data_summary=data_summary,
-            all_results=all_results,
-            figure_markdown=figure_markdown
-        )
+        prompt = _report_prompt(state)
+        writer = stream_writer()
 
+        # 토큰 단위로 스트리밍하며 custom 스트림으로 내보내고, 전체 텍스트는 final_report에 저장
+        parts = []
         with langfuse_session(session_id="generate-report", tags=["generate_report"]):
-            response = llm.invoke(prompt, config={"callbacks": callbacks})
-        
-        # Handle response
-        if hasattr(response, 'content'):
-            content = response.content
-        else:
-            content = str(response)
-
-        if isinstance(content, list):
-            content = "".join([str(part) for part in content])
+            for chunk in llm.stream(prompt, config={"callbacks": callbacks}):
+                token = _report_content(chunk)
+                if token:
+                    parts.append(token)
+                    writer({REPORT_TOKEN: token})
             
         return {
-            "final_report": content,
+            "final_report": "".join(parts),
             "steps_log": ["[Report] Generated Markdown content via LLM with correct static URLs"]
         }
 
     except Exception as e:
-        logger.error(f"Report Generation Error: {e}")
+        return _report_failed(e)
+
+
+@observe(name="generate_content")
+async def agenerate_content(state: ReportState) -> ReportState:
+    """
+    Async variant of generate_content (astream).
+    """
+    if not state.get("analysis_results", []):
+        return _report_missing()
+
+    try:
+        llm, callbacks = LLMFactory.create(
+            provider="openai",
+            model="gpt-4o",
+            temperature=0.3,
+        )
+        prompt = _report_prompt(state)
+        writer = stream_writer()
+
+        parts = []
+        with langfuse_session(session_id="generate-report", tags=["generate_report"]):
+            async for chunk in llm.astream(prompt, config={"callbacks": callbacks}):
+                token = _report_content(chunk)
+                if token:
+                    parts.append(token)
+                    writer({REPORT_TOKEN: token})
+
         return {
-            "final_report": f"# Error\n\nReport generation failed: {str(e)}",
-            "steps_log": [f"[Report] ERROR: {str(e)}"]
+            "final_report": "".join(parts),
+            "steps_log": ["[Report] Generated Markdown content via LLM with correct static URLs"]
         }
 
+    except Exception as e:
+        return _report_failed(e)
+
 
 
 @observe(name="create_pdf")
+@timed_format("pdf")
 def create_pdf(state: ReportState) -> ReportState:
     """
     Converts Markdown report to PDF.
@@ -151,9 +220,11 @@ def create_pdf(state: ReportState) -> ReportState:
         return {"steps_log": ["[Report] PDF Generation Skipped (No Content)"]}
         
     try:
+        # 렌더러는 해당 형식을 요청한 경우에만 로드
         import markdown
         from reportlab.pdfbase import pdfmetrics
         from reportlab.pdfbase.ttfonts import TTFont
+        from xhtml2pdf import pisa
         
         html_content = markdown.markdown(markdown_content)
         
@@ -208,6 +279,7 @@ def create_pdf(state: ReportState) -> ReportState:
     except Exception as e:
         return {"steps_log": [f"[Report] PDF Generation Error: {str(e)}"]}
 @observe(name="create_html")
+@timed_format("html")
 def create_html(state: ReportState) -> ReportState:
     """
     Converts Markdown report to HTML.
@@ -217,6 +289,8 @@ def create_html(state: ReportState) -> ReportState:
         return {"steps_log": ["[Report] HTML Generation Skipped (No Content)"]}
         
     try:
+        import markdown
+
         html_content = markdown.markdown(markdown_content)
         # Add basic styling
         styled_html = f"<html><body><style>body {{ font-family: sans-serif; max-width: 800px; margin: auto; padding: 20px; }} img {{ max-width: 100%; }}</style>{html_content}</body></html>"
@@ -232,6 +306,7 @@ def create_html(state: ReportState) -> ReportState:
     except Exception as e:
         return {"steps_log": [f"[Report] HTML Generation Error: {str(e)}"]}
 @observe(name="create_pptx")
+@timed_format("pptx")
 def create_pptx(state: ReportState) -> ReportState:
     """
     Generates PowerPoint report.
@@ -240,6 +315,9 @@ def create_pptx(state: ReportState) -> ReportState:
     figure_list = state.get("figure_list", [])
     
     try:
+        from pptx import Presentation
+        from pptx.util import Inches, Pt
+
         prs = Presentation()
         
         # Title Slide
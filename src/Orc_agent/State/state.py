@@ -35,6 +35,10 @@ class analyzeState(TypedDict):
     is_approved:bool
     final_insight: Annotated[Dict[str, Any], merge_dicts]
     user_query : str
+    schema_fingerprint: str  # 데이터셋 스키마 지문 (코드 라이브러리 키)
+    code_origin: str         # 현재 code의 출처: "llm" | "library"
+    code_valid: bool         # Validate 노드의 사전 검증 통과 여부
+    validate_roop: int       # 사전 검증 연속 거부 횟수 (실행 실패 error_roop와 별도)
 
 
 
@@ -54,7 +58,6 @@ class ReportState(TypedDict):
     report_format: List[str]     # Requested formats (pdf, html, pptx)
     generated_formats: Annotated[List[str], merge_logs] # Track generated formats
     steps_log: Annotated[List[str], merge_logs]
-    next_worker: str             # Control flow
 
 class DocumentState(TypedDict):
     file_path:str
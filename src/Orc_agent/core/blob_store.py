@@ -0,0 +1,175 @@
+"""
+체크포인트용 blob 오프로딩
+- 직렬화 크기가 CHECKPOINT_BLOB_THRESHOLD를 넘는 상태 값(clean_data, analysis_results, df_summary,
+  final_insight 등)은 내용 해시(sha256) 기준으로 한 번만 압축(zstd, 없으면 zlib)하여 파일로 저장합니다.
+- 체크포인트에는 작은 참조(blobref)만 기록되므로, 값이 바뀌지 않는 한 super-step마다 같은 데이터를
+  다시 쓰지 않습니다.
+- 참조는 체크포인트를 읽을 때 해석되며, 최근 해석한 blob은 메모리 LRU에 보관합니다.
+- 오래 참조되지 않은 blob은 gc()로 삭제합니다. (SQLite 체크포인터의 compaction에서 호출하며,
+  정리 주체가 있는 SQLite 백엔드에서만 사용합니다)
+"""
+
+import hashlib
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    import zstandard
+except ImportError:  # zstandard 미설치 환경 — zlib 폴백
+    zstandard = None
+
+CHECKPOINT_BLOB_THRESHOLD = int(os.environ.get("CHECKPOINT_BLOB_THRESHOLD", 64 * 1024))
+CHECKPOINT_BLOB_DIR = os.environ.get("CHECKPOINT_BLOB_DIR", os.path.join("cache", "blobs"))
+
+BLOBREF_TYPE = "blobref"
+_BLOBREF_KEY = "__blobref__"
+_MEMORY_ENTRIES = 128
+
+
+class BlobStore:
+    """content-addressed 압축 blob 저장소 (파일 1개 = blob 1개)"""
+
+    def __init__(self, root: str = CHECKPOINT_BLOB_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    @staticmethod
+    def _compress(data: bytes) -> bytes:
+        if zstandard is not None:
+            return b"Z" + zstandard.ZstdCompressor(level=3).compress(data)
+        return b"z" + zlib.compress(data, 6)
+
+    @staticmethod
+    def _decompress(data: bytes) -> bytes:
+        if data[:1] == b"Z":
+            if zstandard is None:
+                raise RuntimeError(
+                    "zstd로 압축된 체크포인트 blob을 읽으려면 zstandard 패키지가 필요합니다 (pip install zstandard)."
+                )
+            return zstandard.ZstdDecompressor().decompress(data[1:])
+        return zlib.decompress(data[1:])
+
+    def _remember(self, digest: str, value: Tuple[str, bytes]) -> None:
+        with self._lock:
+            self._memory[digest] = value
+            self._memory.move_to_end(digest)
+            if len(self._memory) > _MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def put(self, type_: str, data: bytes) -> str:
+        """직렬화된 값 저장. 같은 내용이면 기존 파일의 접근 시각만 갱신합니다."""
+        digest = hashlib.sha256(type_.encode("utf-8") + b"\0" + data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            os.utime(path, None)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            payload = type_.encode("utf-8") + b"\0" + self._compress(data)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        self._remember(digest, (type_, data))
+        return digest
+
+    def get(self, digest: str) -> Tuple[str, bytes]:
+        with self._lock:
+            hit = self._memory.get(digest)
+            if hit is not None:
+                self._memory.move_to_end(digest)
+                return hit
+        with open(self._path(digest), "rb") as f:
+            raw = f.read()
+        type_, _, body = raw.partition(b"\0")
+        value = (type_.decode("utf-8"), self._decompress(body))
+        self._remember(digest, value)
+        return value
+
+    def gc(self, max_age_seconds: float) -> int:
+        """max_age_seconds 동안 쓰이지 않은 blob 삭제. 삭제 개수 반환"""
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+class BlobOffloadSerializer:
+    """
+    JsonPlusSerializer를 감싸 큰 값을 BlobStore로 오프로딩하는 체크포인트 serde
+    - 체크포인트 전체(channel_values 포함)를 직렬화할 때: 큰 채널 값만 {"__blobref__": digest}로 치환
+    - 채널 값/pending write를 개별 직렬화할 때: 값 전체를 ("blobref", digest)로 치환
+    """
+
+    def __init__(self, store: BlobStore, threshold: int = CHECKPOINT_BLOB_THRESHOLD, inner: Optional[Any] = None):
+        self.store = store
+        self.threshold = threshold
+        self.inner = inner or JsonPlusSerializer()
+
+    def __getattr__(self, name: str):
+        # dumps/loads 등 나머지 serde API는 내부 serializer에 위임
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def _offload(self, value: Any) -> Optional[str]:
+        type_, data = self.inner.dumps_typed(value)
+        if len(data) < self.threshold:
+            return None
+        return self.store.put(type_, data)
+
+    def _resolve(self, digest: str) -> Any:
+        return self.inner.loads_typed(self.store.get(digest))
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if isinstance(obj, dict) and isinstance(obj.get("channel_values"), dict):
+            channel_values: Dict[str, Any] = {}
+            for key, value in obj["channel_values"].items():
+                digest = self._offload(value)
+                channel_values[key] = value if digest is None else {_BLOBREF_KEY: digest}
+            return self.inner.dumps_typed({**obj, "channel_values": channel_values})
+
+        type_, data = self.inner.dumps_typed(obj)
+        if len(data) < self.threshold:
+            return type_, data
+        return BLOBREF_TYPE, self.store.put(type_, data).encode("utf-8")
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == BLOBREF_TYPE:
+            return self._resolve(payload.decode("utf-8"))
+
+        obj = self.inner.loads_typed(data)
+        if isinstance(obj, dict) and isinstance(obj.get("channel_values"), dict):
+            for key, value in obj["channel_values"].items():
+                if isinstance(value, dict) and len(value) == 1 and _BLOBREF_KEY in value:
+                    obj["channel_values"][key] = self._resolve(value[_BLOBREF_KEY])
+        return obj
+
+    def gc(self, max_age_seconds: float) -> int:
+        return self.store.gc(max_age_seconds)
+
+
+def create_checkpoint_serde() -> Optional[BlobOffloadSerializer]:
+    """CHECKPOINT_BLOB_THRESHOLD > 0 이면 blob 오프로딩 serde, 아니면 None (기본 serde 사용)"""
+    if CHECKPOINT_BLOB_THRESHOLD <= 0:
+        return None
+    return BlobOffloadSerializer(BlobStore(CHECKPOINT_BLOB_DIR), CHECKPOINT_BLOB_THRESHOLD)
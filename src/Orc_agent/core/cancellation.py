@@ -0,0 +1,161 @@
+"""
+실행 취소(cooperative cancellation)
+- 실행마다 CancellationToken을 만들고 config["configurable"]["cancel_id"]로 그래프에 전달합니다.
+- 확인 지점
+  · 그래프/서브그래프의 모든 노드 시작 시 (CancellationCallback.on_chain_start)
+  · LLM 호출 시작 및 스트리밍 토큰마다 (LLMFactory가 붙이는 콜백)
+  · Executor 실행 중 (워커 프로세스 종료 / 인프로세스 실행 스레드에 예외 주입)
+- 취소되면 RunCancelled가 발생하고 그래프는 마지막으로 완료된 super-step의 체크포인트에 멈춥니다.
+  같은 thread_id로 입력 없이(None) 다시 실행하면 중단된 노드부터 재개됩니다.
+- 현재 실행의 토큰은 contextvar로도 전달되어 노드 스레드(LangGraph가 context를 복사)에서 조회할 수 있습니다.
+"""
+
+import contextvars
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class RunCancelled(BaseException):
+    """
+    사용자가 실행을 취소함.
+    asyncio.CancelledError처럼 BaseException을 상속하여, 노드의 `except Exception` 폴백 처리에
+    삼켜지지 않고 그래프 밖까지 전달됩니다.
+    """
+
+
+class CancellationToken:
+    def __init__(self, cancel_id: str):
+        self.cancel_id = cancel_id
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise RunCancelled(f"실행이 취소되었습니다 (cancel_id={self.cancel_id})")
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """취소 시 호출할 함수를 등록하고, 등록 해제 함수를 반환합니다. 이미 취소된 경우 즉시 호출"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+
+                def unregister():
+                    with self._lock:
+                        if callback in self._callbacks:
+                            self._callbacks.remove(callback)
+
+                return unregister
+        callback()
+        return lambda: None
+
+
+_tokens: Dict[str, CancellationToken] = {}
+_tokens_lock = threading.Lock()
+_current: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar("cancel_token", default=None)
+
+
+def create_token(cancel_id: Optional[str] = None) -> CancellationToken:
+    token = CancellationToken(cancel_id or str(uuid.uuid4()))
+    with _tokens_lock:
+        _tokens[token.cancel_id] = token
+    return token
+
+
+def get_token(cancel_id: Optional[str]) -> Optional[CancellationToken]:
+    if not cancel_id:
+        return None
+    with _tokens_lock:
+        return _tokens.get(cancel_id)
+
+
+def cancel(cancel_id: Optional[str]) -> bool:
+    token = get_token(cancel_id)
+    if token is None:
+        return False
+    token.cancel()
+    return True
+
+
+def release(cancel_id: Optional[str]) -> None:
+    with _tokens_lock:
+        _tokens.pop(cancel_id, None)
+
+
+def token_from_config(config: Optional[Dict[str, Any]]) -> Optional[CancellationToken]:
+    if not config:
+        return None
+    return get_token(config.get("configurable", {}).get("cancel_id"))
+
+
+def current_token() -> Optional[CancellationToken]:
+    return _current.get()
+
+
+def check_cancelled(config: Optional[Dict[str, Any]] = None) -> None:
+    token = token_from_config(config) or current_token()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken):
+    """이 블록(및 여기서 시작된 노드 스레드)에서 current_token()이 token을 반환하도록 설정"""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+class CancellationCallback(BaseCallbackHandler):
+    """
+    노드/LLM 이벤트마다 취소 여부를 확인하는 콜백.
+    token을 지정하지 않으면 호출 시점의 current_token()을 사용합니다.
+    """
+
+    raise_error = True
+
+    def __init__(self, token: Optional[CancellationToken] = None):
+        self.token = token
+
+    def _check(self) -> None:
+        token = self.token or current_token()
+        if token is not None:
+            token.raise_if_cancelled()
+
+    def on_chain_start(self, serialized, inputs, **kwargs: Any) -> None:
+        self._check()
+
+    def on_llm_start(self, serialized, prompts, **kwargs: Any) -> None:
+        self._check()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs: Any) -> None:
+        self._check()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self._check()
+
+
+# LLMFactory가 모든 호출에 붙이는 공유 콜백 (current_token() 기준)
+llm_cancellation_callback = CancellationCallback()
@@ -0,0 +1,166 @@
+"""
+그래프 체크포인터 백엔드 선택
+- memory (기본): 프로세스 내 MemorySaver. 재시작 시 모든 체크포인트가 사라집니다.
+- sqlite: 로컬 SQLite 파일(SqliteSaver). 재시작 후에도 일시정지된 HITL 스레드를 재개할 수 있습니다.
+  · 스레드별 마지막 활동 시각을 기록하여 TTL이 지난 스레드를 통째로 삭제
+  · 스레드(+namespace)별 최신 N개 체크포인트만 유지
+  · 위 정리 작업은 백그라운드 스레드에서 주기적으로 실행 (compaction)
+- 비동기 그래프(create_main_graph_async)는 SqliteSaver가 async API를 지원하지 않으므로 MemorySaver를 사용합니다.
+- sqlite 백엔드에서는 큰 상태 값을 blob_store로 오프로딩하여 체크포인트에는 참조만 저장합니다.
+  (blob 정리는 compaction이 담당하므로, 정리 주체가 없는 MemorySaver에서는 오프로딩하지 않음)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.Orc_agent.core.blob_store import create_checkpoint_serde
+from src.Orc_agent.core.logger import logger
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # langgraph-checkpoint-sqlite 미설치 환경
+    SqliteSaver = None
+
+CHECKPOINT_BACKEND = os.environ.get("CHECKPOINT_BACKEND", "memory").lower()
+CHECKPOINT_DB_PATH = os.environ.get("CHECKPOINT_DB_PATH", os.path.join("cache", "checkpoints.sqlite"))
+CHECKPOINT_TTL = float(os.environ.get("CHECKPOINT_TTL", 7 * 24 * 3600))
+CHECKPOINT_KEEP_LATEST = int(os.environ.get("CHECKPOINT_KEEP_LATEST", 20))
+CHECKPOINT_COMPACT_INTERVAL = float(os.environ.get("CHECKPOINT_COMPACT_INTERVAL", 600))
+
+
+if SqliteSaver is not None:
+
+    class CompactingSqliteSaver(SqliteSaver):
+        """SqliteSaver + 스레드 활동 기록 + TTL/최신 N개 유지 정리"""
+
+        def __init__(self, conn: sqlite3.Connection, ttl_seconds: float, keep_latest: int, serde=None):
+            super().__init__(conn, serde=serde)
+            self.ttl_seconds = ttl_seconds
+            self.keep_latest = keep_latest
+            self._stop = threading.Event()
+            self._compactor: Optional[threading.Thread] = None
+            self.setup()
+            with self.lock:
+                self.conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS thread_activity (
+                        thread_id TEXT PRIMARY KEY,
+                        last_seen REAL NOT NULL
+                    )
+                    """
+                )
+                self.conn.commit()
+
+        def _touch(self, config) -> None:
+            thread_id = config.get("configurable", {}).get("thread_id")
+            if thread_id is None:
+                return
+            with self.lock:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO thread_activity (thread_id, last_seen) VALUES (?, ?)",
+                    (str(thread_id), time.time()),
+                )
+                self.conn.commit()
+
+        def put(self, config, *args: Any, **kwargs: Any):
+            result = super().put(config, *args, **kwargs)
+            self._touch(config)
+            return result
+
+        def compact(self) -> Dict[str, int]:
+            """만료 스레드 삭제 후, 스레드별 최신 keep_latest개를 제외한 체크포인트와 writes 삭제"""
+            expired = 0
+            trimmed = 0
+            cutoff = time.time() - self.ttl_seconds
+            with self.lock:
+                cur = self.conn.cursor()
+                rows = cur.execute(
+                    "SELECT thread_id FROM thread_activity WHERE last_seen < ?", (cutoff,)
+                ).fetchall()
+                for (thread_id,) in rows:
+                    cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                    cur.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+                    cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (thread_id,))
+                    expired += 1
+
+                # checkpoint_id는 시간순 정렬되는 uuid6이므로 문자열 역순 = 최신순
+                groups = cur.execute(
+                    "SELECT thread_id, checkpoint_ns FROM checkpoints GROUP BY thread_id, checkpoint_ns HAVING COUNT(*) > ?",
+                    (self.keep_latest,),
+                ).fetchall()
+                for thread_id, checkpoint_ns in groups:
+                    stale = cur.execute(
+                        """
+                        SELECT checkpoint_id FROM checkpoints
+                        WHERE thread_id = ? AND checkpoint_ns = ?
+                        ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?
+                        """,
+                        (thread_id, checkpoint_ns, self.keep_latest),
+                    ).fetchall()
+                    for (checkpoint_id,) in stale:
+                        params = (thread_id, checkpoint_ns, checkpoint_id)
+                        cur.execute(
+                            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                            params,
+                        )
+                        cur.execute(
+                            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                            params,
+                        )
+                    trimmed += len(stale)
+                self.conn.commit()
+                if expired or trimmed:
+                    # WAL 파일이 계속 커지지 않도록 정리 후 truncate
+                    self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+            # 만료된 스레드만 참조하던 blob 정리 (활성 스레드는 체크포인트마다 blob 접근 시각을 갱신)
+            blobs = self.serde.gc(self.ttl_seconds) if hasattr(self.serde, "gc") else 0
+
+            if expired or trimmed or blobs:
+                logger.info(f"[Checkpoint] compaction: 만료 스레드 {expired}개, 오래된 체크포인트 {trimmed}개, blob {blobs}개 삭제")
+            return {"expired_threads": expired, "trimmed_checkpoints": trimmed, "removed_blobs": blobs}
+
+        def _compaction_loop(self, interval: float) -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"[Checkpoint] compaction 실패: {e}")
+
+        def start_compaction(self, interval: float = CHECKPOINT_COMPACT_INTERVAL) -> None:
+            if self._compactor is not None or interval <= 0:
+                return
+            self._compactor = threading.Thread(
+                target=self._compaction_loop, args=(interval,), name="checkpoint-compactor", daemon=True
+            )
+            self._compactor.start()
+
+        def stop_compaction(self) -> None:
+            self._stop.set()
+
+
+def create_checkpointer(use_async: bool = False):
+    """CHECKPOINT_BACKEND 설정에 맞는 체크포인터를 생성합니다."""
+    if CHECKPOINT_BACKEND != "sqlite":
+        return MemorySaver()
+    if SqliteSaver is None:
+        logger.warning("[Checkpoint] langgraph-checkpoint-sqlite 미설치 — MemorySaver 사용")
+        return MemorySaver()
+    if use_async:
+        logger.warning("[Checkpoint] 비동기 그래프는 SqliteSaver를 지원하지 않아 MemorySaver 사용")
+        return MemorySaver()
+
+    os.makedirs(os.path.dirname(CHECKPOINT_DB_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(CHECKPOINT_DB_PATH, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # blob 오프로딩은 compaction(TTL 기반 blob gc)이 있는 SQLite 백엔드에서만 사용
+    saver = CompactingSqliteSaver(conn, CHECKPOINT_TTL, CHECKPOINT_KEEP_LATEST, serde=create_checkpoint_serde())
+    saver.compact()
+    saver.start_compaction()
+    return saver
@@ -0,0 +1,116 @@
+"""
+검증된 분석 코드 라이브러리 (opt-in)
+- 키: 데이터셋 스키마 지문(컬럼명 + dtype) + 정규화한 사용자 질문
+- Eval에서 승인된 코드만 저장합니다. 데이터 경로/이미지 폴더/회차 번호는 템플릿으로 바꿔 저장하고,
+  조회 시 현재 세션 값으로 채워 돌려줍니다.
+- Make 노드는 라이브러리 적중 시 LLM 호출을 건너뛰고, 실행이 실패하면 LLM 경로로 돌아갑니다.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+CODE_LIBRARY_ENABLED = os.environ.get("CODE_LIBRARY_ENABLED", "false").lower() in ("1", "true", "yes")
+CODE_LIBRARY_PATH = os.environ.get("CODE_LIBRARY_PATH", os.path.join("cache", "code_library.sqlite"))
+
+_DATA_PATH = "{{DATA_PATH}}"
+_IMG_DIR = "{{IMG_DIR}}"
+_ROOP = "{{ROOP}}"
+
+
+def schema_fingerprint(schema: List[Tuple[str, str]]) -> str:
+    """(컬럼명, dtype) 목록의 지문. 컬럼 순서는 무시합니다."""
+    canonical = "|".join(f"{name}:{dtype}" for name, dtype in sorted(schema))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def normalize_intent(query: str) -> str:
+    """대소문자/공백/문장부호 차이를 무시한 질문 키"""
+    text = re.sub(r"[^\w\s]", " ", (query or "").lower())
+    return " ".join(text.split())
+
+
+def _templatize(code: str, data_path: str, img_dir: str, roop: int) -> str:
+    code = code.replace(data_path, _DATA_PATH).replace(img_dir, _IMG_DIR)
+    return code.replace(f"figure_{roop}_", f"figure_{_ROOP}_")
+
+
+def _render(template: str, data_path: str, img_dir: str, roop: int) -> str:
+    return (
+        template.replace(_DATA_PATH, data_path)
+        .replace(_IMG_DIR, img_dir)
+        .replace(f"figure_{_ROOP}_", f"figure_{roop}_")
+    )
+
+
+class CodeLibrary:
+    def __init__(self, path: str = CODE_LIBRARY_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS code_library (
+                fingerprint TEXT NOT NULL,
+                intent TEXT NOT NULL,
+                code TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (fingerprint, intent)
+            )
+            """
+        )
+
+    def lookup(self, fingerprint: str, query: str, data_path: str, img_dir: str, roop: int) -> Optional[str]:
+        intent = normalize_intent(query)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT code FROM code_library WHERE fingerprint = ? AND intent = ?",
+                (fingerprint, intent),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE code_library SET hits = hits + 1, last_used = ? WHERE fingerprint = ? AND intent = ?",
+                (time.time(), fingerprint, intent),
+            )
+        return _render(row[0], data_path, img_dir, roop)
+
+    def store(self, fingerprint: str, query: str, code: str, data_path: str, img_dir: str, roop: int) -> None:
+        now = time.time()
+        template = _templatize(code, data_path, img_dir, roop)
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO code_library (fingerprint, intent, code, hits, created, last_used)
+                VALUES (?, ?, ?, 0, ?, ?)
+                ON CONFLICT(fingerprint, intent) DO UPDATE SET code = excluded.code, last_used = excluded.last_used
+                """,
+                (fingerprint, normalize_intent(query), template, now, now),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM code_library"
+            ).fetchone()
+        return {"entries": entries, "hits": hits}
+
+
+_library_instance: Optional[CodeLibrary] = None
+_instance_lock = threading.Lock()
+
+
+def get_code_library() -> CodeLibrary:
+    """프로세스 전역 라이브러리 인스턴스"""
+    global _library_instance
+    with _instance_lock:
+        if _library_instance is None:
+            _library_instance = CodeLibrary()
+        return _library_instance
@@ -0,0 +1,336 @@
+"""
+생성 코드 사전 검증기 (AST 기반, Make와 Run 사이에서 실행)
+- 실행 전에 로컬에서 잡을 수 있는 오류를 찾아 Executor 실행 + Make 재호출 왕복을 줄입니다.
+- 검사 항목
+  · 문법 오류 (SyntaxError)
+  · 데이터셋에 없는 df 컬럼 참조 (코드 안에서 새로 만든 컬럼은 제외)
+  · 미리 로드된 df를 다시 로딩 (df = load_dataset(...) / df = pd.read_csv(...)) → 자동 수정 (해당 문장 제거)
+  · 데이터셋 경로를 pd.read_csv로 읽음 (추가 인자 없음)                     → 자동 수정 (load_dataset으로 교체)
+  · 업로드된 데이터셋이 아닌 경로를 load_dataset / pd.read_csv로 읽음
+  · 금지된 print 호출 / to_csv 저장                                          → 자동 수정 (해당 문장 제거)
+- 자동 수정은 원본 코드의 해당 범위만 바꾸므로 주석과 나머지 코드는 그대로 유지됩니다.
+  · 규칙에 맞지 않는 savefig 경로, 그래프를 그리면서 savefig가 없는 경우
+- 자동 수정으로 해결되지 않는 문제는 now_log 형식의 메시지 목록으로 반환합니다.
+"""
+
+import ast
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# 실제로 그림을 그리는 호출 (plt.style.use / plt.rcParams.update / sns.set_theme / plt.close 등은 제외)
+_PLT_DRAW_CALLS = {
+    "plot", "bar", "barh", "scatter", "hist", "pie", "subplots", "subplot", "figure",
+    "boxplot", "imshow", "fill_between", "stackplot", "step", "errorbar",
+}
+_SNS_DRAW_CALLS = {"heatmap", "clustermap"}
+_AXES_NAME = re.compile(r"^ax(es|s)?\d*$")
+_LOAD_CALLS = {"load_dataset", "pd.read_csv", "pandas.read_csv"}
+_stats_lock = threading.Lock()
+_stats = {
+    "checked": 0,
+    "rejected": 0,
+    "auto_fixed": 0,
+    "saved_executions": 0,
+}
+
+
+def _norm_path(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path)).replace("\\", "/")
+
+
+def _call_name(node: ast.Call) -> str:
+    """print / pd.read_csv / df.to_csv 처럼 호출 대상 이름을 점 표기로 반환"""
+    func = node.func
+    parts = []
+    while isinstance(func, ast.Attribute):
+        parts.append(func.attr)
+        func = func.value
+    if isinstance(func, ast.Name):
+        parts.append(func.id)
+    return ".".join(reversed(parts))
+
+
+def _str_const(node: Optional[ast.AST]) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+class _Fixer:
+    """
+    자동 수정: 금지 문장 제거, df 재로딩 제거, 데이터셋 경로의 pd.read_csv → load_dataset
+    - 수정은 원본 텍스트의 해당 범위만 고칩니다 (주석/나머지 코드는 LLM이 작성한 그대로 유지).
+    - 의미가 바뀔 수 있는 경우(다른 경로 로딩, 인자가 있는 read_csv 등)는 고치지 않고 finding으로 보고합니다.
+    """
+
+    def __init__(self, source: str, data_path: str):
+        self.lines = source.splitlines(keepends=True)
+        self.data_path = data_path
+        self.fixes: List[str] = []
+        self.findings: List[str] = []
+        # (start_offset, end_offset, replacement)
+        self._edits: List[Tuple[int, int, str]] = []
+
+    def _offset(self, lineno: int, col: int) -> int:
+        # ast의 col_offset은 UTF-8 바이트 기준
+        line = self.lines[lineno - 1] if lineno <= len(self.lines) else ""
+        return sum(len(l) for l in self.lines[: lineno - 1]) + len(line.encode("utf-8")[:col].decode("utf-8", "ignore"))
+
+    def _removal_reason(self, stmt: ast.stmt) -> Optional[str]:
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+            name = _call_name(stmt.value)
+            if name == "print" or name.endswith(".to_csv"):
+                return f"'{name}' 호출 제거 (print/CSV 저장 금지 규칙)"
+        # Executor가 df를 미리 로드해 두므로 df 재로딩 문장은 제거
+        if (
+            self.data_path
+            and isinstance(stmt, ast.Assign)
+            and len(stmt.targets) == 1
+            and isinstance(stmt.targets[0], ast.Name)
+            and stmt.targets[0].id == "df"
+            and isinstance(stmt.value, ast.Call)
+            and _call_name(stmt.value) in _LOAD_CALLS
+        ):
+            return "df 재로딩 제거 (미리 로드된 df 사용)"
+        return None
+
+    def _remove(self, stmt: ast.stmt, only_child: bool) -> None:
+        start = self._offset(stmt.lineno, stmt.col_offset)
+        end = self._offset(stmt.end_lineno, stmt.end_col_offset)
+        first = self.lines[stmt.lineno - 1]
+        last = self.lines[stmt.end_lineno - 1]
+        head = first[: len(first.encode("utf-8")[: stmt.col_offset].decode("utf-8", "ignore"))]
+        tail = last[len(last.encode("utf-8")[: stmt.end_col_offset].decode("utf-8", "ignore")):]
+        if only_child or head.strip() or not (tail.strip() == "" or tail.lstrip().startswith("#")):
+            # 블록의 유일한 문장이거나 다른 문장과 같은 줄에 있으면 pass로 대체
+            self._edits.append((start, end, "pass"))
+            return
+        # 해당 줄들을 통째로 삭제
+        line_start = start - len(head)
+        line_end = end + len(tail)
+        self._edits.append((line_start, line_end, ""))
+
+    def _check_load_call(self, node: ast.Call) -> None:
+        name = _call_name(node)
+        if name not in _LOAD_CALLS or not self.data_path or not node.args:
+            return
+        target = _str_const(node.args[0])
+        if target is None:
+            return  # io.StringIO / 변수 등 데이터셋이 아닌 입력은 그대로 둠
+        if _norm_path(target) != _norm_path(self.data_path):
+            self.findings.append(
+                f"Line {node.lineno}: 업로드된 데이터셋이 아닌 경로를 읽습니다 ({target}). 미리 로드된 df를 사용하세요."
+            )
+            return
+        if name != "load_dataset" and len(node.args) == 1 and not node.keywords:
+            replacement = f"load_dataset({self.data_path!r})"
+            self._edits.append(
+                (self._offset(node.lineno, node.col_offset), self._offset(node.end_lineno, node.end_col_offset), replacement)
+            )
+            self.fixes.append(f"Line {node.lineno}: pd.read_csv → load_dataset 으로 교체 (같은 데이터셋, 캐시 사용)")
+
+    def run(self, tree: ast.Module) -> None:
+        removed: List[ast.stmt] = []
+        for node in ast.walk(tree):
+            for field in ("body", "orelse", "finalbody"):
+                stmts = getattr(node, field, None)
+                if not isinstance(stmts, list) or not stmts or not isinstance(stmts[0], ast.stmt):
+                    continue
+                for stmt in stmts:
+                    reason = self._removal_reason(stmt)
+                    if reason:
+                        self._remove(stmt, only_child=len(stmts) == 1 and node is not tree)
+                        self.fixes.append(f"Line {stmt.lineno}: {reason}")
+                        removed.append(stmt)
+        skip = {id(n) for stmt in removed for n in ast.walk(stmt)}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call) and id(node) not in skip:
+                self._check_load_call(node)
+
+    def apply(self, source: str) -> str:
+        for start, end, replacement in sorted(self._edits, reverse=True):
+            source = source[:start] + replacement + source[end:]
+        return source
+
+
+def _is_df(node: ast.AST) -> bool:
+    return isinstance(node, ast.Name) and node.id == "df"
+
+
+def _key_names(node: ast.AST) -> List[str]:
+    """'x' / ['x', 'y'] / ('x', 'y') 형태의 컬럼 키에서 문자열 상수만 추출"""
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [name for elt in node.elts for name in _key_names(elt)]
+    col = _str_const(node)
+    return [col] if col is not None else []
+
+
+def _stored_columns(target: ast.AST) -> List[str]:
+    """대입 대상에서 df에 새로 쓰는 컬럼 (df['x'], df[['x', 'y']], df.loc[:, 'x'], 언패킹 대상 포함)"""
+    if isinstance(target, (ast.Tuple, ast.List)):
+        return [col for elt in target.elts for col in _stored_columns(elt)]
+    if not isinstance(target, ast.Subscript):
+        return []
+    if _is_df(target.value):
+        return _key_names(target.slice)
+    if isinstance(target.value, ast.Attribute) and _is_df(target.value.value) and target.value.attr in ("loc", "at"):
+        # df.loc[rows, cols] → 두 번째 키가 컬럼
+        if isinstance(target.slice, ast.Tuple) and len(target.slice.elts) == 2:
+            return _key_names(target.slice.elts[1])
+    return []
+
+
+def _created_columns(tree: ast.Module) -> set:
+    """
+    코드 어디에서든(if/for/with/함수 안 포함) df에 새로 만드는 컬럼
+    (실행 순서를 추적하지 않으므로, 만들기 전에 읽는 경우는 잡지 못하지만 올바른 코드를 거부하지 않음)
+    """
+    created = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                created.update(_stored_columns(target))
+        elif isinstance(node, (ast.AugAssign, ast.AnnAssign)):
+            created.update(_stored_columns(node.target))
+        elif isinstance(node, ast.Call):
+            name = _call_name(node)
+            if name == "df.assign":
+                created.update(kw.arg for kw in node.keywords if kw.arg)
+            elif name == "df.insert" and len(node.args) >= 2:
+                created.update(_key_names(node.args[1]))
+    return created
+
+
+def _column_findings(tree: ast.Module, columns: List[str]) -> List[str]:
+    """
+    df[...] 로 참조한 컬럼 중 데이터셋에 없는 것을 찾습니다. (코드 안에서 만든 컬럼은 제외)
+    df가 재할당되거나 컬럼이 일괄 변경(rename/columns=)되면 그 이후는 검사하지 않습니다.
+    """
+    known = set(columns) | _created_columns(tree)
+    findings = []
+    for stmt in tree.body:
+        # 1) 이번 문장에서 읽는 컬럼 검사
+        for node in ast.walk(stmt):
+            if not (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "df"):
+                continue
+            if not isinstance(node.ctx, ast.Load):
+                continue
+            keys = node.slice.elts if isinstance(node.slice, ast.List) else [node.slice]
+            for key in keys:
+                col = _str_const(key)
+                if col is not None and col not in known:
+                    findings.append(f"Line {node.lineno}: 데이터에 없는 컬럼 '{col}' 참조 (사용 가능: {', '.join(columns[:30])})")
+
+        # 2) df 재할당 / 컬럼 일괄 변경 이후에는 스키마를 알 수 없으므로 중단
+        for node in ast.walk(stmt):
+            if isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name) and target.id == "df":
+                        value = node.value
+                        if not (isinstance(value, ast.Call) and _call_name(value) == "load_dataset"):
+                            return findings
+                    if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == "df" and target.attr == "columns":
+                        return findings
+            if isinstance(node, ast.Call) and _call_name(node).startswith("df.") and any(
+                kw.arg == "inplace" for kw in node.keywords
+            ):
+                return findings
+    return findings
+
+
+def _draws(name: str) -> bool:
+    """그림을 그리는 호출인지 (plt.plot/plt.subplots, sns.*plot, ax.*, df.plot(...) 등)"""
+    parts = name.split(".")
+    if len(parts) < 2:
+        # 체인 호출(summary['x'].sort_values().plot(...))은 마지막 속성 이름만 남음
+        return name == "plot"
+    root, attr = parts[0], parts[-1]
+    if root == "plt":
+        return len(parts) == 2 and attr in _PLT_DRAW_CALLS
+    if root == "sns":
+        return len(parts) == 2 and (attr.endswith("plot") or attr in _SNS_DRAW_CALLS)
+    if _AXES_NAME.match(root):
+        return True
+    # pandas plotting: df.plot(...), s.plot.bar(...)
+    return "plot" in parts[1:]
+
+
+def _savefig_findings(tree: ast.Module, img_dir: str, roop: int) -> List[str]:
+    findings = []
+    pattern = re.compile(rf"figure_{roop}_\d+\.png$")
+    saves = 0
+    plots = False
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        name = _call_name(node)
+        if name.endswith("savefig"):
+            saves += 1
+            target = _str_const(node.args[0]) if node.args else None
+            if target is None:
+                continue  # f-string/변수 경로는 실행 시 확인
+            if _norm_path(os.path.dirname(target)) != _norm_path(img_dir) or not pattern.search(target):
+                findings.append(f"Line {node.lineno}: savefig 경로가 규칙과 다릅니다 ({target} → {img_dir}/figure_{roop}_n.png)")
+        elif _draws(name):
+            plots = True
+    if plots and saves == 0:
+        findings.append(f"그래프를 그렸지만 plt.savefig 호출이 없습니다. {img_dir}/figure_{roop}_n.png 로 저장하세요.")
+    return findings
+
+
+def validate_code(
+    code: str,
+    columns: List[str],
+    data_path: str,
+    img_dir: str,
+    roop: int,
+) -> Tuple[str, List[str], List[str]]:
+    """
+    Returns:
+        (code, errors, fixes) — code는 자동 수정이 적용된 코드, errors가 비어 있지 않으면 실행하지 않고 Make로 되돌립니다.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        _record(rejected=True)
+        return code, [f"SyntaxError: Line {e.lineno}: {e.msg}"], []
+
+    fixer = _Fixer(code, data_path)
+    fixer.run(tree)
+    if fixer.fixes:
+        fixed = fixer.apply(code)
+        try:
+            tree = ast.parse(fixed)
+            code = fixed
+        except SyntaxError:
+            # 수정 결과가 올바르지 않으면 원본 유지 (수정 없이 검사만)
+            fixer.fixes = []
+
+    errors = list(fixer.findings)
+    if columns:
+        errors.extend(_column_findings(tree, columns))
+    errors.extend(_savefig_findings(tree, img_dir, roop))
+
+    _record(rejected=bool(errors), fixed=bool(fixer.fixes))
+    return code, errors, fixer.fixes
+
+
+def _record(rejected: bool, fixed: bool = False):
+    """
+    절약 집계
+    - 거부: 실패할 코드의 Executor 실행 1회 절약
+    """
+    with _stats_lock:
+        _stats["checked"] += 1
+        if rejected:
+            _stats["rejected"] += 1
+            _stats["saved_executions"] += 1
+        if fixed:
+            _stats["auto_fixed"] += 1
+
+
+def validator_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return dict(_stats)
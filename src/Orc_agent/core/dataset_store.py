@@ -0,0 +1,468 @@
+"""
+업로드 데이터셋 저장소 (Content-addressed columnar cache)
+- 파일 내용의 sha256 해시를 키로, CSV를 한 번만 Arrow(Feather) 파일로 변환합니다.
+- 동일한 파일은 세션이 달라도 하나의 캐시 엔트리를 공유합니다.
+  캐시 디렉터리가 DATASET_CACHE_MAX_MB를 넘으면 변환 직후 오래 사용하지 않은 데이터셋부터 삭제합니다.
+- 미리보기, Plan, Executor 모두 memory-map으로 같은 Feather 파일을 읽습니다.
+- CSV → Feather 변환은 블록 단위 스트리밍으로 수행하여 파일 크기와 무관하게 메모리 사용량이 제한됩니다.
+- 미리보기(head)와 프로파일링(iter_batches)은 전체 DataFrame을 만들지 않습니다.
+- 데이터셋마다 로드 프로파일(dtype 최적화 규칙)을 한 번 계산해 Feather 옆에 JSON으로 저장하고,
+  load/head/iter_batches 모두 같은 규칙을 적용합니다.
+  · 저카디널리티 문자열 → 데이터셋 전체 고유값으로 만든 고정 category (배치/미리보기 간 dtype 동일)
+  · 모든 값이 같은 형식의 날짜로 파싱되는 문자열/date 타입 → datetime64 (하나라도 실패하면 문자열 유지)
+  · 정수는 기본적으로 원본 dtype(int64) 유지 — 생성 코드의 곱셈/누적합 등에서 overflow 방지.
+    DTYPE_DOWNCAST_INTS일 때만 결측 없는 정수를 int32 범위면 int32로 (int8/int16은 DTYPE_DOWNCAST_SMALL_INTS일 때만),
+    실수는 DTYPE_DOWNCAST_FLOATS일 때만 float32
+  · 전부 결측이거나 값이 하나뿐인 컬럼은 unused로 표시 (삭제하지 않음)
+- Executor에는 데이터셋 버전(dataset_id)마다 한 번 로드한 원본 DataFrame을 공유하고, 실행마다
+  사본(frame_handle)을 df로 제공합니다. 생성 코드가 df를 수정해도 원본은 바뀌지 않습니다.
+  (Copy-on-Write는 샌드박스 워커 프로세스에서만 켜며, 그 외 프로세스에서는 깊은 복사)
+- pyarrow가 없으면 pandas.read_csv로 동작합니다 (캐시 없음).
+"""
+
+import codecs
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.feather as feather
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pyarrow 미설치 환경 — pandas 폴백
+    pa = None
+    pc = None
+    pa_csv = None
+    feather = None
+    pa_ipc = None
+
+DATASET_CACHE_DIR = os.environ.get("DATASET_CACHE_DIR", os.path.join("cache", "datasets"))
+DATASET_CACHE_MAX_MB = float(os.environ.get("DATASET_CACHE_MAX_MB", 4096))
+DATASET_DTYPE_PROFILE = os.environ.get("DATASET_DTYPE_PROFILE", "true").lower() in ("1", "true", "yes")
+CATEGORY_MAX_UNIQUE = int(os.environ.get("CATEGORY_MAX_UNIQUE", 1000))
+CATEGORY_MAX_RATIO = float(os.environ.get("CATEGORY_MAX_RATIO", 0.5))
+DTYPE_DOWNCAST_FLOATS = os.environ.get("DTYPE_DOWNCAST_FLOATS", "false").lower() in ("1", "true", "yes")
+DTYPE_DOWNCAST_INTS = os.environ.get("DTYPE_DOWNCAST_INTS", "false").lower() in ("1", "true", "yes")
+DTYPE_DOWNCAST_SMALL_INTS = os.environ.get("DTYPE_DOWNCAST_SMALL_INTS", "false").lower() in ("1", "true", "yes")
+# 프로세스(워커)마다 메모리에 유지할 공유 DataFrame 수
+SHARED_FRAME_CACHE = int(os.environ.get("SHARED_FRAME_CACHE", 2))
+
+_HASH_CHUNK_SIZE = 4 * 1024 * 1024
+_ENCODING_SAMPLE_SIZE = 1024 * 1024
+_CSV_BLOCK_SIZE = 64 * 1024 * 1024
+# pyarrow 미설치 시 pandas chunk 크기 (행)
+_PANDAS_CHUNK_ROWS = 500_000
+# 캐시 정리 시 한도의 이 비율까지 줄임 (변환마다 정리하지 않도록)
+_PRUNE_TARGET = 0.8
+_PROFILE_VERSION = 3
+_DATE_SAMPLE_SIZE = 200
+_YEAR_PATTERN = re.compile(r"\d{4}")
+if DTYPE_DOWNCAST_SMALL_INTS:
+    _INT_TARGETS: Tuple[str, ...] = ("int8", "int16", "int32")
+elif DTYPE_DOWNCAST_INTS:
+    _INT_TARGETS = ("int32",)
+else:
+    _INT_TARGETS = ()
+
+
+def _date_format(values: List[str]) -> Optional[str]:
+    """
+    샘플 문자열이 모두 연도(4자리)를 포함하고 같은 형식의 날짜로 파싱되면 그 형식을 반환합니다.
+    (샘플은 후보 선별용이며, 실제 변환 여부는 전체 값 검사(_all_dates)로 결정)
+    """
+    if not values or not all(_YEAR_PATTERN.search(v) for v in values):
+        return None
+    try:
+        from pandas.tseries.api import guess_datetime_format
+    except ImportError:  # pandas < 2.2
+        from pandas._libs.tslibs.parsing import guess_datetime_format
+    fmt = guess_datetime_format(values[0])
+    if fmt is None or not _all_dates(pd.Series(values), fmt):
+        return None
+    return fmt
+
+
+def _all_dates(values: pd.Series, fmt: str) -> bool:
+    """결측이 아닌 값이 모두 fmt 형식의 날짜로 파싱되는지"""
+    try:
+        pd.to_datetime(values, format=fmt)
+    except (TypeError, ValueError, OverflowError):
+        return False
+    return True
+
+
+def _int_target(lo: int, hi: int) -> Optional[str]:
+    for name in _INT_TARGETS:
+        info = np.iinfo(name)
+        if info.min <= lo and hi <= info.max:
+            return name
+    return None
+
+
+def enable_copy_on_write() -> bool:
+    """
+    pandas Copy-on-Write 모드 활성화 (pandas 2.0+). 지원하지 않으면 False
+    프로세스 전역 설정이므로 생성 코드만 실행하는 샌드박스 워커 프로세스에서만 호출합니다.
+    """
+    try:
+        pd.set_option("mode.copy_on_write", True)
+    except (KeyError, AttributeError):
+        return False
+    return True
+
+
+def _copy_on_write_active() -> bool:
+    """현재 프로세스에서 Copy-on-Write가 켜져 있는지 (pandas 3.0+는 항상 켜짐)"""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    try:
+        return pd.get_option("mode.copy_on_write") is True
+    except (KeyError, AttributeError):
+        return False
+
+
+class DatasetStore:
+    def __init__(self, cache_dir: str = DATASET_CACHE_DIR, cache_max_mb: float = DATASET_CACHE_MAX_MB):
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = int(cache_max_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        # dataset_id -> 로드 프로파일
+        self._load_profiles: Dict[str, Dict[str, Any]] = {}
+        # dataset_id -> 공유 원본 DataFrame (LRU)
+        self._frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._frame_lock = threading.Lock()
+        # abs_path -> (size, mtime_ns, digest): 같은 파일을 매번 다시 해시하지 않도록
+        self._hash_memo: Dict[str, Tuple[int, int, str]] = {}
+
+    def content_hash(self, file_path: str) -> str:
+        """파일 내용의 sha256 해시 (크기/수정시각이 같으면 메모된 값 사용)"""
+        abs_path = os.path.abspath(file_path)
+        stat = os.stat(abs_path)
+        memo = self._hash_memo.get(abs_path)
+        if memo and memo[0] == stat.st_size and memo[1] == stat.st_mtime_ns:
+            return memo[2]
+
+        h = hashlib.sha256()
+        with open(abs_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self._hash_memo[abs_path] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    @staticmethod
+    def detect_encoding(file_path: str) -> str:
+        """앞부분 샘플로 UTF-8 여부를 확인하고, 실패하면 CP949로 간주합니다."""
+        with open(file_path, "rb") as f:
+            sample = f.read(_ENCODING_SAMPLE_SIZE)
+        if sample.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        try:
+            # 샘플 끝에서 잘린 멀티바이트 문자는 무시 (final=False)
+            codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+            return "utf-8"
+        except UnicodeDecodeError:
+            return "cp949"
+
+    def cache_path(self, dataset_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{dataset_id}.feather")
+
+    def _key_lock(self, dataset_id: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(dataset_id, threading.Lock())
+
+    def register(self, file_path: str) -> Optional[str]:
+        """
+        CSV를 캐시에 등록하고 dataset_id(해시)를 반환합니다.
+        이미 변환된 파일이면 변환을 건너뜁니다. pyarrow가 없으면 None.
+        """
+        if feather is None:
+            return None
+        dataset_id = self.content_hash(file_path)
+        target = self.cache_path(dataset_id)
+        if os.path.exists(target):
+            # 사용 시각 갱신 (캐시 정리 순서 기준)
+            try:
+                os.utime(target, None)
+            except OSError:
+                pass
+            return dataset_id
+
+        # 같은 파일을 여러 세션이 동시에 올려도 변환은 한 번만
+        with self._key_lock(dataset_id):
+            if not os.path.exists(target):
+                self._convert(file_path, target)
+                self._prune_cache(keep=dataset_id)
+        return dataset_id
+
+    def _prune_cache(self, keep: str) -> None:
+        """
+        캐시 크기가 한도를 넘으면 Feather 수정 시각(등록 적중 시 갱신)이 오래된 데이터셋부터
+        Feather와 로드 프로파일을 함께 삭제합니다. 방금 변환한 데이터셋(keep)은 남깁니다.
+        삭제된 데이터셋은 다음 register 때 다시 변환됩니다.
+        """
+        if self.cache_max_bytes <= 0:
+            return
+        entries: Dict[str, List[Any]] = {}  # dataset_id -> [mtime, size, paths]
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file() or entry.name.endswith(".tmp"):
+                continue
+            dataset_id = entry.name.split(".", 1)[0]
+            stat = entry.stat()
+            item = entries.setdefault(dataset_id, [0.0, 0, []])
+            if entry.name.endswith(".feather"):
+                item[0] = stat.st_mtime
+            item[1] += stat.st_size
+            item[2].append(entry.path)
+
+        total = sum(size for _, size, _ in entries.values())
+        if total <= self.cache_max_bytes:
+            return
+        for dataset_id, (_, size, paths) in sorted(entries.items(), key=lambda item: item[1][0]):
+            if total <= self.cache_max_bytes * _PRUNE_TARGET:
+                break
+            if dataset_id == keep:
+                continue
+            try:
+                for path in paths:
+                    os.remove(path)
+            except OSError:
+                continue  # 다른 프로세스가 사용 중인 파일 (Windows) 등
+            total -= size
+            self._load_profiles.pop(dataset_id, None)
+
+    def _convert(self, file_path: str, target: str):
+        encoding = self.detect_encoding(file_path)
+        read_options = pa_csv.ReadOptions(
+            use_threads=True,
+            block_size=_CSV_BLOCK_SIZE,
+            encoding="utf-8" if encoding == "utf-8-sig" else encoding,
+        )
+
+        # memory-map 로드를 위해 비압축으로 저장, 임시 파일에 쓴 뒤 원자적으로 교체
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            try:
+                # 블록 단위로 읽어 바로 기록 (Feather V2 = Arrow IPC 파일) — 메모리는 블록 크기로 제한
+                reader = pa_csv.open_csv(file_path, read_options=read_options)
+                with pa.OSFile(tmp_path, "wb") as sink, pa_ipc.new_file(sink, reader.schema) as writer:
+                    for batch in reader:
+                        writer.write_batch(batch)
+            except pa.ArrowInvalid:
+                # 첫 블록에서 추론한 타입과 맞지 않는 값이 뒤에 나오면 전체 읽기로 재시도
+                table = pa_csv.read_csv(file_path, read_options=read_options)
+                feather.write_feather(table, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def profile_path(self, dataset_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{dataset_id}.profile.json")
+
+    def _build_load_profile(self, dataset_id: str) -> Dict[str, Any]:
+        """Feather 파일을 배치 단위로 한 번 훑어 컬럼별 dtype 최적화 규칙을 계산합니다."""
+        with pa.memory_map(self.cache_path(dataset_id), "r") as source:
+            reader = pa_ipc.open_file(source)
+            schema = reader.schema
+            # date_format: None = 아직 판단 전, "" = 날짜 아님
+            stats = {
+                f.name: {"nulls": 0, "min": None, "max": None, "uniques": set(), "overflow": False, "date_format": None}
+                for f in schema
+            }
+            rows = 0
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                rows += batch.num_rows
+                for field, column in zip(schema, batch.columns):
+                    st = stats[field.name]
+                    st["nulls"] += column.null_count
+                    if pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+                        mm = pc.min_max(column).as_py()
+                        if mm["min"] is not None:
+                            st["min"] = mm["min"] if st["min"] is None else min(st["min"], mm["min"])
+                            st["max"] = mm["max"] if st["max"] is None else max(st["max"], mm["max"])
+                    elif pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+                        if not st["overflow"]:
+                            st["uniques"].update(v for v in pc.unique(column).to_pylist() if v is not None)
+                            if len(st["uniques"]) > CATEGORY_MAX_UNIQUE:
+                                st["overflow"], st["uniques"] = True, set()
+                        if st["date_format"] is None and column.null_count < len(column):
+                            # 첫 non-null 배치의 앞부분으로 형식을 정하고, 이후 모든 배치에서 전체 값을 검사
+                            sample = pc.drop_null(column).slice(0, _DATE_SAMPLE_SIZE).to_pylist()
+                            st["date_format"] = _date_format(sample) or ""
+                        if st["date_format"] and not _all_dates(column.to_pandas(), st["date_format"]):
+                            st["date_format"] = ""
+
+        columns: Dict[str, Dict[str, Any]] = {}
+        for field in schema:
+            st = stats[field.name]
+            non_null = rows - st["nulls"]
+            target = None
+            distinct = None
+            rule: Dict[str, Any] = {}
+            if pa.types.is_integer(field.type):
+                if st["nulls"] == 0 and st["min"] is not None:
+                    target = _int_target(st["min"], st["max"])
+                distinct = 1 if st["min"] is not None and st["min"] == st["max"] else None
+            elif pa.types.is_floating(field.type):
+                target = "float32" if DTYPE_DOWNCAST_FLOATS else None
+                distinct = 1 if st["min"] is not None and st["min"] == st["max"] else None
+            elif pa.types.is_date(field.type):
+                target = "datetime"
+            elif pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+                if not st["overflow"]:
+                    distinct = len(st["uniques"])
+                if st["date_format"]:
+                    target = "datetime"
+                    rule["format"] = st["date_format"]
+                elif distinct is not None and non_null and distinct / non_null <= CATEGORY_MAX_RATIO:
+                    target = "category"
+                    rule["categories"] = sorted(st["uniques"])
+            columns[field.name] = {
+                "source": str(field.type),
+                "target": target,
+                "unused": non_null == 0 or distinct == 1,
+                **rule,
+            }
+        return {"version": _PROFILE_VERSION, "rows": rows, "columns": columns}
+
+    def load_profile(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        """데이터셋의 로드 프로파일 (없으면 계산 후 저장). 비활성화 시 None"""
+        if not DATASET_DTYPE_PROFILE or feather is None:
+            return None
+        path = self.profile_path(dataset_id)
+        profile = self._load_profiles.get(dataset_id)
+        if profile is not None:
+            return profile
+        with self._key_lock(dataset_id):
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    profile = json.load(f)
+            if not profile or profile.get("version") != _PROFILE_VERSION:
+                profile = self._build_load_profile(dataset_id)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(profile, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+        self._load_profiles[dataset_id] = profile
+        return profile
+
+    @staticmethod
+    def _to_pandas(table, profile: Optional[Dict[str, Any]]) -> pd.DataFrame:
+        """로드 프로파일을 적용하여 Arrow 테이블을 DataFrame으로 변환합니다."""
+        if not profile:
+            return table.to_pandas()
+        rules = profile["columns"]
+        categories = [c for c in table.column_names if (rules.get(c) or {}).get("target") == "category"]
+        df = table.to_pandas(categories=categories or None)
+        for col in df.columns:
+            rule = rules.get(col) or {}
+            target = rule.get("target")
+            if target is None:
+                continue
+            if target == "category":
+                # 배치마다 다른 category 집합이 생기지 않도록 데이터셋 전체 고유값으로 고정
+                df[col] = df[col].cat.set_categories(rule["categories"])
+            elif target == "datetime":
+                try:
+                    df[col] = pd.to_datetime(df[col], format=rule.get("format"))
+                except (TypeError, ValueError, OverflowError):
+                    continue  # 프로파일과 맞지 않는 값이 있으면 원본 문자열 유지
+            else:
+                df[col] = df[col].astype(target)
+        return df
+
+    def unused_columns(self, file_path: str) -> List[str]:
+        """전부 결측이거나 값이 하나뿐인 컬럼 목록"""
+        dataset_id = self.register(file_path)
+        profile = self.load_profile(dataset_id) if dataset_id else None
+        if not profile:
+            return []
+        return [col for col, rule in profile["columns"].items() if rule.get("unused")]
+
+    def load(self, file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """캐시된 Feather 파일을 memory-map으로 읽어 로드 프로파일을 적용한 DataFrame으로 반환합니다."""
+        dataset_id = self.register(file_path)
+        if dataset_id is None:
+            return pd.read_csv(file_path, usecols=columns, encoding=self.detect_encoding(file_path))
+        table = feather.read_table(self.cache_path(dataset_id), columns=columns, memory_map=True)
+        return self._to_pandas(table, self.load_profile(dataset_id))
+
+    def shared_frame(self, file_path: str) -> pd.DataFrame:
+        """데이터셋 버전마다 한 번만 로드하여 공유하는 원본 DataFrame. 직접 수정하지 마세요."""
+        dataset_id = self.content_hash(file_path)
+        with self._frame_lock:
+            frame = self._frames.get(dataset_id)
+            if frame is None:
+                frame = self.load(file_path)
+                self._frames[dataset_id] = frame
+                while len(self._frames) > max(1, SHARED_FRAME_CACHE):
+                    self._frames.popitem(last=False)
+            self._frames.move_to_end(dataset_id)
+            return frame
+
+    def frame_handle(self, file_path: str) -> pd.DataFrame:
+        """
+        Executor의 df로 주입할 사본.
+        Copy-on-Write가 켜진 프로세스(샌드박스 워커)에서는 얕은 복사로 데이터를 공유하고 수정 시점에만 복사됩니다.
+        (CoW가 꺼진 프로세스 — 인프로세스 실행 등 — 에서는 원본 보호를 위해 깊은 복사)
+        """
+        frame = self.shared_frame(file_path)
+        return frame.copy(deep=not _copy_on_write_active())
+
+    def schema(self, file_path: str) -> List[Tuple[str, str]]:
+        """(컬럼명, dtype) 목록. Feather 스키마만 읽으므로 데이터는 로드하지 않습니다."""
+        dataset_id = self.register(file_path)
+        if dataset_id is None:
+            sample = self.head(file_path, 1000)
+            return [(str(col), str(dtype)) for col, dtype in sample.dtypes.items()]
+        table = feather.read_table(self.cache_path(dataset_id), memory_map=True)
+        return [(field.name, str(field.type)) for field in table.schema]
+
+    def head(self, file_path: str, n: int = 20) -> pd.DataFrame:
+        """미리보기용 상위 n행. 아직 변환되지 않은 파일은 CSV 앞부분만 읽습니다."""
+        if feather is not None:
+            dataset_id = self.content_hash(file_path)
+            target = self.cache_path(dataset_id)
+            if os.path.exists(target):
+                table = feather.read_table(target, memory_map=True)
+                return self._to_pandas(table.slice(0, n), self.load_profile(dataset_id))
+        return pd.read_csv(file_path, nrows=n, encoding=self.detect_encoding(file_path))
+
+    def iter_batches(self, file_path: str, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """레코드 배치 단위 DataFrame 이터레이터 (한 번에 한 배치만 메모리에 올림)"""
+        dataset_id = self.register(file_path)
+        if dataset_id is None:
+            yield from pd.read_csv(
+                file_path, usecols=columns, chunksize=_PANDAS_CHUNK_ROWS, encoding=self.detect_encoding(file_path)
+            )
+            return
+        profile = self.load_profile(dataset_id)
+        with pa.memory_map(self.cache_path(dataset_id), "r") as source:
+            reader = pa_ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    batch = batch.select(columns)
+                yield self._to_pandas(pa.Table.from_batches([batch]), profile)
+
+
+# 싱글톤 인스턴스 생성
+dataset_store = DatasetStore()
+
+
+def load_dataset(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """생성된 분석 코드에서 사용하는 데이터 로더 (Executor globals에 주입됨)"""
+    return dataset_store.load(file_path, columns=columns)
@@ -1,17 +1,256 @@
+"""
+데이터 프로파일러
+- dtype, 결측치, 범주형 고유값(정확값 또는 HyperLogLog 근사), 상위값, 수치 min/mean/max를
+  컬럼 블록 단위의 벡터 연산으로 한 번에 계산합니다.
+- 넓은 테이블은 컬럼 블록을 스레드로 나누어 처리합니다.
+- 큰 파일은 레코드 배치 단위로 통계를 누적/병합하여(건수, 합계, min/max, HLL) 메모리 사용량을 제한합니다.
+- 결과는 데이터셋 해시 기준으로 캐시되며, 프롬프트용 텍스트 형식은 기존과 동일합니다.
+"""
+
+import os
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 import pandas as pd
 
+from src.Orc_agent.core.dataset_store import dataset_store
+
+# 이 행 수를 넘는 범주형 컬럼은 HyperLogLog로 고유값 수를 근사합니다.
+HLL_ROW_THRESHOLD = int(os.environ.get("PROFILE_HLL_ROW_THRESHOLD", 1_000_000))
+# 고유값이 이 값 이하인 범주형 컬럼만 상위값을 보여줍니다.
+LOW_CARDINALITY_LIMIT = 20
+TOP_VALUE_COUNT = 5
+
+# 이 크기(MB)를 넘는 파일은 배치 스트리밍 방식으로 프로파일링합니다.
+PROFILE_STREAM_THRESHOLD_MB = float(os.environ.get("PROFILE_STREAM_THRESHOLD_MB", 256))
+# 스트리밍 프로파일에서 정확한 빈도를 유지하는 범주형 고유값 수 상한 (넘으면 HLL 근사만 유지)
+_EXACT_DISTINCT_LIMIT = 10_000
+
+_COLUMNS_PER_TASK = 32
+_MAX_WORKERS = min(8, os.cpu_count() or 1)
+_CACHE_SIZE = 64
+
+_cache_lock = threading.Lock()
+_profile_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+class HyperLogLog:
+    """
+    64bit 해시 기반 HyperLogLog (병합 가능)
+    p=14 → 레지스터 16384개, 표준오차 약 0.8%
+    """
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add_series(self, series: pd.Series):
+        values = series.dropna()
+        if values.empty:
+            return
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        self.add_hashes(hashes)
+
+    def add_hashes(self, hashes: np.ndarray):
+        suffix_bits = 64 - self.p
+        idx = (hashes >> np.uint64(suffix_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << suffix_bits) - 1)
+        # suffix_bits(50) < 53 이므로 float 변환으로 bit_length를 정확히 구할 수 있음
+        bit_length = np.zeros(rest.shape, dtype=np.int64)
+        nonzero = rest > 0
+        bit_length[nonzero] = np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.int64) + 1
+        rank = (suffix_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m * self.m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros > 0:
+            raw = self.m * np.log(self.m / zeros)
+        return int(round(raw))
+
+
+def _profile_categorical(series: pd.Series) -> Dict[str, Any]:
+    if len(series) > HLL_ROW_THRESHOLD:
+        hll = HyperLogLog()
+        hll.add_series(series)
+        estimate = hll.estimate()
+        # 근사값이 충분히 크면 value_counts를 생략
+        if estimate > LOW_CARDINALITY_LIMIT * 2:
+            return {"nunique": estimate, "approx": True, "top": []}
+
+    counts = series.value_counts(dropna=True, sort=True)
+    return {
+        "nunique": int(len(counts)),
+        "approx": False,
+        "top": list(counts.index[:TOP_VALUE_COUNT]),
+    }
+
+
+def _profile_block(df: pd.DataFrame, columns: List[str]) -> Dict[str, Any]:
+    block = df[columns]
+    nulls = block.isna().sum()
+
+    categorical = {}
+    for col in block.select_dtypes(include=["object", "category"]).columns:
+        categorical[col] = _profile_categorical(block[col])
+
+    numeric = block.select_dtypes(include=["number", "datetime"])
+    if numeric.shape[1] > 0:
+        stats = numeric.agg(["mean", "min", "max"])
+    else:
+        stats = pd.DataFrame(index=["mean", "min", "max"])
+
+    return {"nulls": nulls, "categorical": categorical, "numeric": stats}
+
+
+def profile_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
+    """DataFrame의 프로파일(dict)을 계산합니다."""
+    columns = list(df.columns)
+    blocks = [columns[i:i + _COLUMNS_PER_TASK] for i in range(0, len(columns), _COLUMNS_PER_TASK)]
+
+    if len(blocks) > 1:
+        with ThreadPoolExecutor(max_workers=min(_MAX_WORKERS, len(blocks))) as pool:
+            results = list(pool.map(lambda cols: _profile_block(df, cols), blocks))
+    else:
+        results = [_profile_block(df, cols) for cols in blocks]
 
-def get_df_summary(df: pd.DataFrame):
+    categorical: Dict[str, Any] = {}
+    for r in results:
+        categorical.update(r["categorical"])
 
+    nulls = pd.concat([r["nulls"] for r in results]) if results else pd.Series(dtype="int64")
+    numeric_parts = [r["numeric"] for r in results if r["numeric"].shape[1] > 0]
+    numeric = pd.concat(numeric_parts, axis=1) if numeric_parts else pd.DataFrame(index=["mean", "min", "max"])
+
+    return {
+        "shape": df.shape,
+        "dtypes": df.dtypes,
+        "nulls": nulls,
+        "categorical": categorical,
+        "numeric": numeric,
+        "sample": df.head(3),
+    }
+
+
+class _ColumnAccumulator:
+    """배치별 통계를 누적하는 컬럼 단위 집계기 (결측/합계/min/max/고유값)"""
+
+    def __init__(self):
+        self.nulls = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.is_datetime = False
+        self.hll: Optional[HyperLogLog] = None
+        self.counts: Optional[Counter] = None
+
+    def add_numeric(self, series: pd.Series):
+        values = series.dropna()
+        if values.empty:
+            return
+        if pd.api.types.is_datetime64_any_dtype(values):
+            self.is_datetime = True
+            values = values.astype("int64")
+        self.count += len(values)
+        self.total += float(values.sum())
+        lo, hi = values.min(), values.max()
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+    def add_categorical(self, series: pd.Series):
+        if self.hll is None:
+            self.hll = HyperLogLog()
+            self.counts = Counter()
+        self.hll.add_series(series)
+        if self.counts is not None:
+            counts = series.value_counts(dropna=True)
+            self.counts.update(counts[counts > 0].to_dict())
+            if len(self.counts) > _EXACT_DISTINCT_LIMIT:
+                # 고유값이 너무 많으면 정확한 빈도는 버리고 HLL만 유지 (메모리 상한)
+                self.counts = None
+
+    def numeric_stats(self) -> List[Any]:
+        if not self.count:
+            return [np.nan, np.nan, np.nan]
+        mean = self.total / self.count
+        if self.is_datetime:
+            to_ts = lambda v: pd.Timestamp(int(v))
+            return [to_ts(mean), to_ts(self.min), to_ts(self.max)]
+        return [mean, self.min, self.max]
+
+    def categorical_info(self) -> Dict[str, Any]:
+        if self.counts is not None:
+            return {
+                "nunique": len(self.counts),
+                "approx": False,
+                "top": [value for value, _ in self.counts.most_common(TOP_VALUE_COUNT)],
+            }
+        return {"nunique": self.hll.estimate() if self.hll else 0, "approx": True, "top": []}
+
+
+def profile_batches(batches) -> Dict[str, Any]:
+    """
+    DataFrame 배치 이터레이터로부터 profile_dataframe과 같은 형식의 프로파일을 계산합니다.
+    한 번에 한 배치와 컬럼별 누적 통계만 메모리에 유지합니다.
+    """
+    rows = 0
+    dtypes = None
+    sample = None
+    acc: Dict[str, _ColumnAccumulator] = {}
+
+    for batch in batches:
+        if dtypes is None:
+            dtypes = batch.dtypes
+            sample = batch.head(3)
+            acc = {col: _ColumnAccumulator() for col in batch.columns}
+        rows += len(batch)
+        for col, nulls in batch.isna().sum().items():
+            acc[col].nulls += int(nulls)
+        for col in batch.select_dtypes(include=["number", "datetime"]).columns:
+            acc[col].add_numeric(batch[col])
+        for col in batch.select_dtypes(include=["object", "category"]).columns:
+            acc[col].add_categorical(batch[col])
+
+    if dtypes is None:
+        return profile_dataframe(pd.DataFrame())
+
+    columns = list(dtypes.index)
+    numeric_cols = list(sample.select_dtypes(include=["number", "datetime"]).columns)
+    numeric = pd.DataFrame(
+        {c: acc[c].numeric_stats() for c in numeric_cols}, index=["mean", "min", "max"]
+    )
+    return {
+        "shape": (rows, len(columns)),
+        "dtypes": dtypes,
+        "nulls": pd.Series({c: acc[c].nulls for c in columns}, dtype="int64"),
+        "categorical": {c: acc[c].categorical_info() for c in columns if acc[c].hll is not None},
+        "numeric": numeric,
+        "sample": sample,
+    }
+
+
+def render_summary(profile: Dict[str, Any]) -> str:
+    """프로파일을 프롬프트용 텍스트로 변환합니다."""
     summary = []
-    summary.append(f"- 데이터 형태 (Shape): {df.shape[0]}행, {df.shape[1]}열")
+    rows, cols = profile["shape"]
+    summary.append(f"- 데이터 형태 (Shape): {rows}행, {cols}열")
 
     # 1. 컬럼명과 데이터 타입
     summary.append("\n- 컬럼 정보 및 타입:")
-    summary.append(df.dtypes.to_string())
+    summary.append(profile["dtypes"].to_string())
 
     # 2. 결측치 정보
-    null_info = df.isnull().sum()
+    null_info = profile["nulls"]
     if null_info.sum() > 0:
         summary.append("\n- 결측치 수:")
         summary.append(null_info[null_info > 0].to_string())
@@ -21,22 +260,71 @@ def get_df_summary(df: pd.DataFrame):
     # 3. 범주형 데이터의 고유값(Unique) 개수
     # 고유값이 너무 많지 않은(예: 20개 이하) 컬럼들만 골라 정보를 줍니다.
     summary.append("\n- 주요 범주형 데이터 정보:")
-    cat_cols = df.select_dtypes(include=["object", "category"]).columns
-    for col in cat_cols:
-        unique_count = df[col].nunique()
-        if unique_count <= 20:
+    for col, info in profile["categorical"].items():
+        unique_count = info["nunique"]
+        if info["approx"]:
+            summary.append(f"  * {col}: 약 {unique_count}개의 고유값")
+        elif unique_count <= LOW_CARDINALITY_LIMIT:
             summary.append(
-                f"  * {col}: {unique_count}개의 고유값 ({df[col].unique()[:5]}...)"
+                f"  * {col}: {unique_count}개의 고유값 ({np.array(info['top'], dtype=object)}...)"
             )
         else:
             summary.append(f"  * {col}: {unique_count}개의 고유값")
 
     # 4. 수치형 데이터 통계 요약
     summary.append("\n- 수치 데이터 요약 (describe):")
-    summary.append(df.describe().loc[["mean", "min", "max"]].to_string())
+    summary.append(profile["numeric"].to_string())
 
     # 5. 실제 데이터 샘플 (Top 3)
     summary.append("\n- 데이터 샘플 (Top 3):")
-    summary.append(df.head(3).to_string())
+    summary.append(profile["sample"].to_string())
+
+    return "\n".join(summary)
+
+
+def get_cached_profile(dataset_id: str) -> Optional[Dict[str, Any]]:
+    with _cache_lock:
+        profile = _profile_cache.get(dataset_id)
+        if profile is not None:
+            _profile_cache.move_to_end(dataset_id)
+        return profile
+
 
-    return "\n".join(summary)
\ No newline at end of file
+def _store_profile(dataset_id: str, profile: Dict[str, Any]):
+    with _cache_lock:
+        _profile_cache[dataset_id] = profile
+        _profile_cache.move_to_end(dataset_id)
+        while len(_profile_cache) > _CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+
+
+def get_df_summary(df: pd.DataFrame, dataset_id: Optional[str] = None) -> str:
+    if dataset_id:
+        profile = get_cached_profile(dataset_id)
+        if profile is None:
+            profile = profile_dataframe(df)
+            _store_profile(dataset_id, profile)
+    else:
+        profile = profile_dataframe(df)
+    return render_summary(profile)
+
+
+def get_dataset_summary(file_path: str) -> str:
+    """
+    업로드 파일 경로 기준 요약. 같은 내용의 파일이면 캐시된 프로파일을 재사용하고
+    DataFrame 로드도 생략합니다.
+    """
+    dataset_id = dataset_store.content_hash(file_path)
+    profile = get_cached_profile(dataset_id)
+    if profile is None:
+        if os.path.getsize(file_path) > PROFILE_STREAM_THRESHOLD_MB * 1024 * 1024:
+            # 큰 파일: 배치 단위 누적 통계 (전체 DataFrame을 만들지 않음)
+            profile = profile_batches(dataset_store.iter_batches(file_path))
+        else:
+            profile = profile_dataframe(dataset_store.load(file_path))
+        _store_profile(dataset_id, profile)
+    summary = render_summary(profile)
+    unused = dataset_store.unused_columns(file_path)
+    if unused:
+        summary += f"\n\n- 분석에 쓸모 없는 컬럼 (전부 결측 또는 단일 값): {', '.join(unused)}"
+    return summary
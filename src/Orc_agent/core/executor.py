@@ -1,69 +1,116 @@
-
-import sys
-import io
-import traceback
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import atexit
+import ctypes
 import os
-import koreanize_matplotlib
+import threading
+
+from src.Orc_agent.core.logger import logger
+from src.Orc_agent.core.render_env import bootstrap_rendering
+from src.Orc_agent.core.cancellation import RunCancelled
+from src.Orc_agent.core.sandbox import DEFAULT_SESSION, NamespaceCache, SandboxPool, execute_code, seed_dataset
+
+# process: 사전 준비된 워커 프로세스 풀 (기본) / inprocess: 서버 프로세스 내 exec
+EXECUTOR_BACKEND = os.environ.get("EXECUTOR_BACKEND", "process")
+
 
 class PersistentPythonExecutor:
     def __init__(self):
-        import matplotlib.font_manager as fm
-    
-        font_list = ['Malgun Gothic', 'NanumGothic', 'AppleGothic', 'NanumBarunGothic']
-        self.available_font = None
-    
-        for font in font_list:
-            if any(font in f.name for f in fm.fontManager.ttflist):
-                self.available_font = font
-                break
-        else:
-            self.available_font = None
-
-        if self.available_font:
-            plt.rcParams['font.family'] = self.available_font
-            plt.rcParams['axes.unicode_minus'] = False
-            print(f"한글 폰트 설정: {self.available_font}")
-        else:
-            print("경고: 한글 폰트를 찾을 수 없습니다")
-        
-        self.globals = {
-            "pd": pd,
-            "np": np,
-            "plt": plt,
-            "sns": sns,
-            "os": os,
-            "io": io,
-        }
-        self.globals["__builtins__"] = __builtins__
-
-    def run(self, code: str) -> str:
+        # 한글 폰트/스타일은 부트스트랩에서 한 번만 설정 (디스크 캐시 사용)
+        self.available_font = bootstrap_rendering()
+        logger.info(f"한글 폰트 설정: {self.available_font}")
+
+        # 세션별 namespace (LRU + 유휴 TTL + 메모리 예산으로 정리)
+        self.namespaces = NamespaceCache()
+
+    def run(self, code: str, session_id: str = None, cancel_token=None, data_path: str = None) -> str:
         """
-        코드를 실행하고 표준 출력을 캡처하여 반환합니다.
-        에러 발생 시 Traceback을 반환합니다.
+        코드를 세션의 namespace에서 실행하고 표준 출력을 캡처하여 반환합니다.
+        data_path가 주어지면 df로 미리 로드된 데이터셋(원본과 분리된 사본)을 제공합니다.
+        에러 발생 시 Traceback을 반환합니다. 취소되면 RunCancelled를 발생시킵니다.
         """
-        old_stdout = sys.stdout
-        redirected_output = io.StringIO()
-        sys.stdout = redirected_output
-        
+        with self.namespaces.session(session_id or DEFAULT_SESSION) as namespace:
+            if cancel_token is None:
+                return seed_dataset(namespace, data_path) or execute_code(code, namespace)
+
+            cancel_token.raise_if_cancelled()
+            # 취소 시 실행 중인 스레드에 RunCancelled를 비동기로 주입 (다음 바이트코드에서 발생)
+            # 주입은 코드 실행 중에만 허용하고, 실행이 끝나면 같은 잠금 안에서 대기 중인 주입을 취소하여
+            # 실행 이후의 무관한 위치(namespace 반납 등)에서 RunCancelled가 발생하지 않게 합니다.
+            thread_id = ctypes.c_ulong(threading.get_ident())
+            state_lock = threading.Lock()
+            running = [True]
+
+            def _interrupt():
+                with state_lock:
+                    if running[0]:
+                        ctypes.pythonapi.PyThreadState_SetAsyncExc(thread_id, ctypes.py_object(RunCancelled))
+
+            unregister = cancel_token.on_cancel(_interrupt)
+            try:
+                try:
+                    # 코드 실행 (세션별로 유지되는 globals 사용)
+                    result = seed_dataset(namespace, data_path) or execute_code(code, namespace)
+                finally:
+                    with state_lock:
+                        running[0] = False
+                        ctypes.pythonapi.PyThreadState_SetAsyncExc(thread_id, None)
+            finally:
+                unregister()
+        cancel_token.raise_if_cancelled()
+        return result
+
+    def get_globals_keys(self, session_id: str = None):
+        return self.namespaces.keys(session_id or DEFAULT_SESSION)
+
+    def release_session(self, session_id: str):
+        self.namespaces.drop(session_id)
+
+    def namespace_stats(self):
+        """세션 수 / 대략적인 메모리 / 제거 횟수 / 세션별 크기"""
+        return self.namespaces.stats()
+
+
+def create_executor():
+    """EXECUTOR_BACKEND 설정에 따라 실행기를 생성합니다. 풀 생성 실패 시 in-process로 대체"""
+    if EXECUTOR_BACKEND == "process":
         try:
-            # 코드 실행 (지속되는 globals 사용)
-            exec(code, self.globals)
-            
-            result = redirected_output.getvalue()
-            return result.strip() if result else "Success"
-            
-        except Exception:
-            # 에러 발생 시 Traceback 캡처
-            return traceback.format_exc()
-        finally:
-            sys.stdout = old_stdout
-
-    def get_globals_keys(self):
-        return list(self.globals.keys())
-
-# 싱글톤 인스턴스 생성
-executor_instance = PersistentPythonExecutor()
+            pool = SandboxPool()
+            atexit.register(pool.shutdown)
+            return pool
+        except Exception as e:
+            logger.error(f"샌드박스 프로세스 풀 생성 실패, in-process 실행기로 대체합니다: {e}")
+    return PersistentPythonExecutor()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """싱글톤 실행기 (첫 호출 시 생성: 워커 풀 기동/폰트 부트스트랩을 import 시점에서 분리)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = create_executor()
+    return _executor
+
+
+def warm_up_executor() -> threading.Thread:
+    """백그라운드 스레드에서 실행기를 미리 생성 (앱 첫 화면 표시를 막지 않음)"""
+    thread = threading.Thread(target=get_executor, name="executor-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+class _LazyExecutor:
+    """
+    executor_instance.run(...) 형태의 기존 사용법을 유지하면서 실제 생성은 첫 사용 시점으로 미루는 프록시
+    (속성 조회는 실제 실행기로 위임, 속성 설정은 프록시에 남음)
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_executor(), name)
+
+
+# 싱글톤 인스턴스 (지연 생성)
+executor_instance = _LazyExecutor()
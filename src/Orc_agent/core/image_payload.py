@@ -0,0 +1,204 @@
+"""
+Vision 호출용 이미지 페이로드 준비
+- 원본 PNG(고해상도 seaborn 차트 등)를 최대 변 길이로 축소하고 JPEG/WebP로 재인코딩합니다.
+- 바이트 예산(IMAGE_MAX_BYTES)을 넘으면 품질 → 해상도 순으로 낮춰 다시 인코딩합니다.
+- 결과는 원본 내용 해시 + 설정값을 키로 메모리(LRU)와 디스크에 캐시되므로,
+  다음 루프에서 같은 그림을 다시 분석해도 재인코딩하지 않습니다.
+  디스크 캐시는 IMAGE_CACHE_MAX_MB를 넘으면 오래 사용하지 않은 파일부터 삭제합니다.
+- 차트용(image_payload_cache)과 문서 OCR용(ocr_payload_cache) 예산을 따로 둡니다.
+  OCR은 작은 글자를 읽어야 하므로 더 큰 해상도와 무손실(PNG) 인코딩을 기본으로 사용합니다.
+- Pillow가 없으면 원본 바이트를 그대로 사용합니다.
+"""
+
+import base64
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 미설치 환경 — 원본 전송
+    Image = None
+
+IMAGE_MAX_EDGE = int(os.environ.get("IMAGE_MAX_EDGE", 1024))
+IMAGE_FORMAT = os.environ.get("IMAGE_FORMAT", "jpeg").lower()  # jpeg | webp
+IMAGE_MAX_BYTES = int(os.environ.get("IMAGE_MAX_BYTES", 200 * 1024))
+IMAGE_CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR", os.path.join("cache", "images"))
+IMAGE_CACHE_MAX_MB = float(os.environ.get("IMAGE_CACHE_MAX_MB", 512))
+OCR_MAX_EDGE = int(os.environ.get("OCR_MAX_EDGE", 2480))
+OCR_IMAGE_FORMAT = os.environ.get("OCR_IMAGE_FORMAT", "png").lower()  # png | webp | jpeg
+OCR_MAX_BYTES = int(os.environ.get("OCR_MAX_BYTES", 4 * 1024 * 1024))
+
+_MIME = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+_QUALITY_STEPS = (85, 75, 65, 55, 45)
+_MIN_EDGE = 256
+_OCR_QUALITY_STEPS = (95, 90)
+_MEMORY_ENTRIES = 256
+# 디스크 캐시 정리 시 한도의 이 비율까지 줄임 (매 쓰기마다 정리하지 않도록)
+_PRUNE_TARGET = 0.8
+_disk_lock = threading.Lock()
+_disk_bytes = None
+
+
+def _cache_files(cache_dir: str):
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and not entry.name.endswith(".tmp"):
+            yield entry
+
+
+def _track_disk_write(cache_dir: str, size: int, max_bytes: int) -> None:
+    """디스크 캐시 크기 누적. 한도를 넘으면 수정 시각(캐시 적중 시 갱신)이 오래된 파일부터 삭제"""
+    global _disk_bytes
+    if max_bytes <= 0:
+        return
+    with _disk_lock:
+        if _disk_bytes is None:
+            _disk_bytes = sum(entry.stat().st_size for entry in _cache_files(cache_dir))
+        else:
+            _disk_bytes += size
+        if _disk_bytes <= max_bytes:
+            return
+        files = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in _cache_files(cache_dir)))
+        total = sum(size for _, size, _ in files)
+        for _, file_size, path in files:
+            if total <= max_bytes * _PRUNE_TARGET:
+                break
+            try:
+                os.remove(path)
+                total -= file_size
+            except OSError:
+                continue
+        _disk_bytes = total
+
+
+class ImagePayloadCache:
+    def __init__(
+        self,
+        cache_dir: str = IMAGE_CACHE_DIR,
+        max_edge: int = IMAGE_MAX_EDGE,
+        fmt: str = IMAGE_FORMAT,
+        max_bytes: int = IMAGE_MAX_BYTES,
+        quality_steps: Tuple[int, ...] = _QUALITY_STEPS,
+        cache_max_mb: float = IMAGE_CACHE_MAX_MB,
+    ):
+        self.cache_dir = cache_dir
+        self.max_edge = max_edge
+        self.fmt = fmt if fmt in ("jpeg", "webp", "png") else "jpeg"
+        self.max_bytes = max_bytes
+        self.quality_steps = quality_steps
+        self.cache_max_bytes = int(cache_max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _key(self, raw: bytes) -> str:
+        h = hashlib.sha256(raw)
+        h.update(f"|{self.max_edge}|{self.fmt}|{self.max_bytes}|{self.quality_steps}".encode("utf-8"))
+        return h.hexdigest()
+
+    def _encode(self, raw: bytes) -> Tuple[str, bytes]:
+        """축소 + 재인코딩. 예산을 넘으면 품질을(PNG는 무손실이라 생략), 그래도 넘으면 해상도를 낮춥니다."""
+        img = Image.open(io.BytesIO(raw))
+        img.load()
+        if img.mode in ("RGBA", "LA", "P"):
+            # 투명 배경은 흰색으로 합성 (JPEG는 알파 채널 미지원)
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+
+        edge = self.max_edge
+        data = b""
+        while True:
+            resized = img.copy()
+            resized.thumbnail((edge, edge), Image.LANCZOS)
+            for quality in self.quality_steps if self.fmt != "png" else (None,):
+                buf = io.BytesIO()
+                if quality is None:
+                    resized.save(buf, format="PNG", optimize=True)
+                else:
+                    resized.save(buf, format=self.fmt.upper(), quality=quality, optimize=True)
+                data = buf.getvalue()
+                if len(data) <= self.max_bytes:
+                    return self.fmt, data
+            if edge <= _MIN_EDGE:
+                # 최소 해상도에서도 예산 초과 — 마지막 결과 사용
+                return self.fmt, data
+            edge = max(_MIN_EDGE, int(edge * 0.75))
+
+    def prepare_bytes(self, raw: bytes) -> Tuple[str, str]:
+        """이미지 바이트 → (mime, base64). 캐시 적중 시 인코딩을 건너뜁니다."""
+        if Image is None:
+            return _MIME["png"], base64.b64encode(raw).decode("utf-8")
+
+        key = self._key(raw)
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                self._memory.move_to_end(key)
+                return hit
+
+        disk_path = os.path.join(self.cache_dir, f"{key}.{self.fmt}")
+        if os.path.exists(disk_path):
+            with open(disk_path, "rb") as f:
+                fmt, data = self.fmt, f.read()
+            # 사용 시각 갱신 (디스크 캐시 정리 순서 기준)
+            try:
+                os.utime(disk_path, None)
+            except OSError:
+                pass
+        else:
+            try:
+                fmt, data = self._encode(raw)
+            except Exception:
+                # 디코딩 불가한 이미지는 원본 그대로 전송
+                return _MIME["png"], base64.b64encode(raw).decode("utf-8")
+            tmp_path = f"{disk_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, disk_path)
+            _track_disk_write(self.cache_dir, len(data), self.cache_max_bytes)
+
+        payload = (_MIME[fmt], base64.b64encode(data).decode("utf-8"))
+        with self._lock:
+            self._memory[key] = payload
+            if len(self._memory) > _MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+        return payload
+
+    def prepare_file(self, img_path: str) -> Tuple[str, str]:
+        with open(img_path, "rb") as f:
+            return self.prepare_bytes(f.read())
+
+
+image_payload_cache = ImagePayloadCache()
+# 문서 OCR용: 작은 글자 판독을 위해 큰 해상도 + 무손실(또는 고품질) 인코딩
+ocr_payload_cache = ImagePayloadCache(
+    max_edge=OCR_MAX_EDGE,
+    fmt=OCR_IMAGE_FORMAT,
+    max_bytes=OCR_MAX_BYTES,
+    quality_steps=_OCR_QUALITY_STEPS,
+)
+
+
+def image_data_url(img_path: str) -> str:
+    """이미지 파일 → LLM image_url에 넣을 data URL"""
+    mime, b64 = image_payload_cache.prepare_file(img_path)
+    return f"data:{mime};base64,{b64}"
+
+
+def image_bytes_data_url(raw: bytes) -> str:
+    """이미지 바이트 → data URL (차트 예산)"""
+    mime, b64 = image_payload_cache.prepare_bytes(raw)
+    return f"data:{mime};base64,{b64}"
+
+
+def ocr_page_data_url(raw: bytes) -> str:
+    """PDF 페이지 렌더링 결과 → data URL (OCR 예산)"""
+    mime, b64 = ocr_payload_cache.prepare_bytes(raw)
+    return f"data:{mime};base64,{b64}"
@@ -1,10 +1,77 @@
 import os
+import threading
+from typing import Any, Dict, Optional, Tuple
 
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
 
-from src.Orc_agent.core.observe import create_callback_handler, is_langfuse_enabled
+from src.Orc_agent.core.observe import get_shared_callback_handler, is_langfuse_enabled
+from src.Orc_agent.core.llm_cache import LLM_CACHE_ENABLED, get_llm_cache
+from src.Orc_agent.core.cancellation import llm_cancellation_callback
+from src.Orc_agent.core.metrics import METRICS_ENABLED, metrics_callback
+
+# 공유 HTTP 커넥션 풀 설정 (OpenAI 동기 클라이언트 간 keep-alive 재사용)
+LLM_HTTP_MAX_CONNECTIONS = int(os.environ.get("LLM_HTTP_MAX_CONNECTIONS", 100))
+LLM_HTTP_KEEPALIVE = int(os.environ.get("LLM_HTTP_KEEPALIVE", 20))
+
+# (provider, model, temperature, cache) -> 모델 객체
+_client_registry: Dict[Tuple[str, str, float, bool], Any] = {}
+_registry_lock = threading.Lock()
+_http_client: Optional[Any] = None
+
+
+def _shared_http_client():
+    """
+    프로세스 전역 httpx 동기 클라이언트 (TLS 세션과 커넥션 풀 공유)
+    비동기 클라이언트는 커넥션이 생성된 이벤트 루프에 묶여 다른 루프에서 재사용할 수 없으므로 공유하지 않습니다.
+    (모델 객체는 루프와 무관하게 재사용되므로, 비동기 호출은 SDK 기본 클라이언트를 사용)
+    _build_client 안에서만 호출되며, 호출자가 _registry_lock을 잡고 있어야 합니다.
+    """
+    global _http_client
+    if _http_client is None:
+        import httpx
+
+        _http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_KEEPALIVE,
+                keepalive_expiry=60.0,
+            ),
+            timeout=httpx.Timeout(600.0, connect=10.0),
+        )
+    return _http_client
+
+
+def _build_client(provider: str, model: str, temperature: float, llm_cache):
+    # provider SDK는 해당 provider를 처음 사용할 때 import (쓰지 않는 SDK는 로드하지 않음)
+    if provider == "google":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        return ChatGoogleGenerativeAI(
+            model=model,
+            google_api_key=os.environ.get("GOOGLE_API_KEY"),
+            temperature=temperature,
+            cache=llm_cache,
+        )
+    elif provider == "openai":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=model,
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            temperature=temperature,
+            cache=llm_cache,
+            http_client=_shared_http_client(),
+        )
+    elif provider == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+
+        return ChatAnthropic(
+            model=model,
+            api_key=os.environ.get("ANTHROPIC_API_KEY"),
+            temperature=temperature,
+            cache=llm_cache,
+        )
+    else:
+        raise ValueError(f"Unknown provider: {provider}")
 
 
 class LLMFactory:
@@ -13,24 +80,30 @@ class LLMFactory:
         provider: str,
         model: str,
         temperature: float = 0,
+        cache: Optional[bool] = None,
+        **bind_kwargs: Any,
     ):
         """
-        LLM 객체와 Langfuse Callbacks를 세트로 반환합니다.
-        
+        LLM 객체와 Callbacks(취소 확인 + 지표 수집 + Langfuse)를 세트로 반환합니다.
+        모델 객체는 (provider, model, temperature) 단위로 프로세스 전역에서 재사용되며,
+        Callback Handler도 프로세스당 하나를 공유합니다.
+
         Args:
             provider: 'google', 'openai', 'anthropic' 중 하나
             model: 모델 이름 (예: 'gemma-3-27b-it', 'gpt-4o', 'claude-3-5-sonnet')
             temperature: 생성 온도 (기본값: 0)
-        
+            cache: 응답 캐시 사용 여부 (기본값: LLM_CACHE_ENABLED 환경 변수)
+            bind_kwargs: 호출별 설정 (예: max_tokens). 공유 객체를 복사하지 않고 bind로 적용
+
         Returns:
             tuple: (llm, callbacks)
-        
+
         사용 예시:
             from src.core.llm_factory import LLMFactory
             from src.core.observe import langfuse_session
-            
+
             llm, callbacks = LLMFactory.create('google', 'gemma-3-27b-it')
-            
+
             # session_id를 기록하려면 langfuse_session 컨텍스트 사용
             with langfuse_session(session_id="my-session-id") as lf_metadata:
                 response = llm.invoke(prompt, config={
@@ -38,33 +111,33 @@ class LLMFactory:
                     'metadata': lf_metadata,
                 })
         """
-        # 1. 모델 객체 생성
-        if provider == "google":
-            llm = ChatGoogleGenerativeAI(
-                model=model,
-                google_api_key=os.environ.get("GOOGLE_API_KEY"),
-                temperature=temperature,
-            )
-        elif provider == "openai":
-            llm = ChatOpenAI(
-                model=model,
-                api_key=os.environ.get("OPENAI_API_KEY"),
-                temperature=temperature,
-            )
-        elif provider == "anthropic":
-            llm = ChatAnthropic(
-                model=model,
-                api_key=os.environ.get("ANTHROPIC_API_KEY"),
-                temperature=temperature,
-            )
-        else:
-            raise ValueError(f"Unknown provider: {provider}")
-
-        # 2. Langfuse Callback 생성 (SessionAwareCallbackHandler 사용)
-        callbacks = []
-        
-        handler = create_callback_handler()
+        # 1. 응답 캐시 (opt-in) — False면 전역 캐시도 사용하지 않음
+        use_cache = LLM_CACHE_ENABLED if cache is None else cache
+
+        # 2. 모델 객체 조회 또는 생성 (공유 레지스트리)
+        key = (provider, model, float(temperature), bool(use_cache))
+        llm = _client_registry.get(key)
+        if llm is None:
+            with _registry_lock:
+                llm = _client_registry.get(key)
+                if llm is None:
+                    llm_cache = get_llm_cache() if use_cache else False
+                    llm = _build_client(provider, model, float(temperature), llm_cache)
+                    _client_registry[key] = llm
+
+        if bind_kwargs:
+            llm = llm.bind(**bind_kwargs)
+
+        # 3. 취소 확인 콜백 (호출 시작/스트리밍 토큰마다 현재 실행의 취소 여부 확인)
+        callbacks = [llm_cancellation_callback]
+        # 내장 지표 (LLM 지연/토큰) — Langfuse 설정과 무관하게 수집
+        if METRICS_ENABLED:
+            callbacks.append(metrics_callback)
+
+        # 4. Langfuse Callback (SessionAwareCallbackHandler, 프로세스당 1개 공유)
+
+        handler = get_shared_callback_handler()
         if handler is not None:
             callbacks.append(handler)
-            
-        return llm, callbacks
\ No newline at end of file
+
+        return llm, callbacks
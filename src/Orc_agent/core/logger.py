@@ -1,28 +1,145 @@
+"""
+비동기 구조화 로깅
+- 요청(노드) 스레드는 QueueHandler로 레코드를 큐에 넣기만 하고, 파일/stderr 쓰기는 QueueListener 스레드가 처리합니다.
+- 파일은 JSON Lines(ts, level, msg, session_id, thread_id, node, category)로 기록하고 크기 기준으로 회전합니다.
+- session_id/thread_id/node는 현재 실행 중인 LangGraph 노드의 config에서 자동으로 채웁니다.
+  (extra={"session_id": ...}로 직접 지정 가능)
+- 대량 로그는 extra={"category": "..."}로 분류하고 LOG_SAMPLE_RATES로 N건 중 1건만 남길 수 있습니다.
+  (WARNING 이상은 샘플링하지 않음)
+- LOG_MAX_MESSAGE_CHARS를 넘는 INFO 이하 메시지는 잘라서 기록합니다. (오류 Traceback은 그대로)
+"""
 
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+from typing import Dict, Optional
 
-log_dir = "logs"
-os.makedirs(log_dir, exist_ok=True)
-log_file_path = os.path.join(log_dir, "agent.log")
+try:
+    from langchain_core.runnables.config import var_child_runnable_config
+except ImportError:  # langchain 미설치 환경 (유틸리티 단독 사용)
+    var_child_runnable_config = None
+
+LOG_DIR = os.environ.get("LOG_DIR", "logs")
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", 5))
+LOG_MAX_MESSAGE_CHARS = int(os.environ.get("LOG_MAX_MESSAGE_CHARS", 2000))
+# "category=N,..." → 해당 category의 INFO 이하 로그는 N건 중 1건만 기록
+LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "stream_chunk=10")
+
+os.makedirs(LOG_DIR, exist_ok=True)
+log_file_path = os.path.join(LOG_DIR, "agent.log")
+
+_CONTEXT_FIELDS = ("session_id", "thread_id", "node", "category")
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, int]:
+    rates = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip().isdigit() and int(value) > 1:
+            rates[name.strip()] = int(value)
+    return rates
+
+
+def _current_context() -> Dict[str, Optional[str]]:
+    """현재 스레드에서 실행 중인 LangGraph 노드의 session/thread/node"""
+    if var_child_runnable_config is None:
+        return {}
+    config = var_child_runnable_config.get() or {}
+    configurable = config.get("configurable") or {}
+    metadata = config.get("metadata") or {}
+    return {
+        "session_id": configurable.get("session_id"),
+        "thread_id": configurable.get("thread_id"),
+        "node": metadata.get("langgraph_node"),
+    }
+
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    요청 스레드에서 실행되는 부분: 샘플링 → 실행 컨텍스트 부착 → 메시지 포맷/절단 → 큐 적재
+    (실행 컨텍스트는 contextvar 기반이라 리스너 스레드에서는 알 수 없으므로 여기서 채움)
+    """
+
+    def __init__(self, log_queue, sample_rates: Dict[str, int], max_chars: int):
+        super().__init__(log_queue)
+        self.sample_rates = sample_rates
+        self.max_chars = max_chars
+        self._counts: Dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+
+    def _sampled_out(self, record: logging.LogRecord) -> bool:
+        category = getattr(record, "category", None)
+        rate = self.sample_rates.get(category) if category else None
+        if not rate or record.levelno >= logging.WARNING:
+            return False
+        with self._counts_lock:
+            count = self._counts.get(category, 0)
+            self._counts[category] = count + 1
+        return count % rate != 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._sampled_out(record):
+            return
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        context = _current_context()
+        for field in _CONTEXT_FIELDS:
+            if getattr(record, field, None) is None:
+                setattr(record, field, context.get(field))
+        record = super().prepare(record)
+        if self.max_chars > 0 and record.levelno < logging.WARNING and len(record.msg) > self.max_chars:
+            extra = len(record.msg) - self.max_chars
+            record.msg = record.message = f"{record.msg[:self.max_chars]}... (+{extra} chars)"
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+        }
+        for field in _CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        return json.dumps(payload, ensure_ascii=False, default=str)
 
 
 logger = logging.getLogger(name='AgentLog')
 logger.setLevel(logging.INFO)
 
-
 formatter = logging.Formatter('|%(asctime)s|%(levelname)s| - %(message)s',
                               datefmt='%Y-%m-%d %H:%M:%S')
 
-file_handler = logging.FileHandler(log_file_path, encoding='utf-8')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+file_handler = logging.handlers.RotatingFileHandler(
+    log_file_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+)
+file_handler.setFormatter(JsonFormatter())
 
 stream_handler = logging.StreamHandler()
 stream_handler.setFormatter(formatter)
-logger.addHandler(stream_handler)
 
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+queue_handler = _ContextQueueHandler(_log_queue, _parse_sample_rates(LOG_SAMPLE_RATES), LOG_MAX_MESSAGE_CHARS)
+listener = logging.handlers.QueueListener(_log_queue, file_handler, stream_handler, respect_handler_level=True)
+
+# 모듈 재로드(Streamlit rerun 등) 시 핸들러가 중복되지 않도록 교체
 if logger.hasHandlers():
     logger.handlers.clear()
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
+logger.addHandler(queue_handler)
+listener.start()
+
+
+@atexit.register
+def _flush_on_exit():
+    # 종료 시 큐에 남은 레코드를 모두 기록
+    if listener._thread is not None:
+        listener.stop()
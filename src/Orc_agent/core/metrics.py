@@ -0,0 +1,402 @@
+"""
+내장 지표 수집기 (Langfuse와 독립적으로 동작)
+- MetricsCallback: LangGraph/LLM 콜백 이벤트로 노드 wall time, LLM 지연/토큰, 노드 오류·재실행,
+  error_roop/roop_back 값을 기록합니다. (StreamlitAgentCallback 옆에, 그리고 LLMFactory 콜백에 함께 연결)
+- observe 래퍼: @observe가 붙은 함수(노드/보고서 단계)의 실행 시간을 기록합니다.
+- Executor 실행 시간은 run_code에서 record_executor로, 세션 namespace 수/크기는 record_namespaces로 기록합니다.
+- 모든 값은 프로세스 내 히스토그램/카운터로 집계하고, 실행(thread_id)별 요약도 최근 METRICS_MAX_RUNS개 보관합니다.
+- 노출: render_prometheus() (Prometheus text format), snapshot()/dump_json() (JSON),
+  METRICS_PORT를 지정하면 /metrics, /metrics.json HTTP 엔드포인트를 띄웁니다.
+"""
+
+import bisect
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+METRICS_MAX_RUNS = int(os.environ.get("METRICS_MAX_RUNS", 100))
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+LOOP_BUCKETS = (0, 1, 2, 3, 5, 10)
+
+_HELP = {
+    "agent_node_duration_seconds": "LangGraph 노드 실행 시간",
+    "agent_step_duration_seconds": "@observe 대상 함수 실행 시간",
+    "agent_llm_latency_seconds": "LLM 호출 지연 시간",
+    "agent_llm_tokens_total": "LLM 토큰 수 (prompt/completion)",
+    "agent_executor_duration_seconds": "생성 코드 실행 시간",
+    "agent_error_roop": "노드 종료 시점의 error_roop 값",
+    "agent_roop_back": "Plan 종료 시점의 roop_back 값",
+    "agent_node_errors_total": "예외로 끝난 노드 실행 수",
+    "agent_node_retries_total": "같은 실행에서 다시 실행된 노드 수",
+    "agent_executor_namespaces": "실행기에 보관 중인 세션 namespace 수",
+    "agent_executor_namespace_bytes": "세션 namespace 변수의 대략적인 메모리 (bytes)",
+    "agent_executor_namespace_evictions": "제거된 세션 namespace 수 (ttl/lru/memory)",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def run_key(thread_id: Optional[str]) -> str:
+    """서브그래프 thread_id(<thread>_sub)도 상위 실행으로 묶습니다."""
+    if not thread_id:
+        return "unknown"
+    return thread_id[:-4] if thread_id.endswith("_sub") else thread_id
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[int]:
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class MetricsRegistry:
+    def __init__(self, max_runs: int = METRICS_MAX_RUNS):
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._runs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels: Any) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def record_run(self, run: str, node: Optional[str], **fields: float) -> None:
+        """실행별 요약 누적. 노드 단위 필드는 합산, *_max 필드는 최대값"""
+        with self._lock:
+            item = self._runs.get(run)
+            if item is None:
+                item = self._runs[run] = {"started": time.time(), "nodes": {}}
+                while len(self._runs) > self.max_runs:
+                    self._runs.popitem(last=False)
+            self._runs.move_to_end(run)
+            item["updated"] = time.time()
+            for field, value in fields.items():
+                if field.endswith("_max"):
+                    item[field] = max(item.get(field, 0), value)
+                    continue
+                target = item["nodes"].setdefault(node or "unknown", {})
+                target[field] = target.get(field, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            histograms = {
+                name: [
+                    {"labels": dict(key), "count": h.count, "sum": round(h.sum, 6),
+                     "buckets": dict(zip(map(str, h.buckets), h.cumulative()))}
+                    for key, h in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            gauges = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._gauges.items()
+            }
+            runs = json.loads(json.dumps(self._runs))
+        return {"histograms": histograms, "counters": counters, "gauges": gauges, "runs": runs}
+
+    def dump_json(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    def render_prometheus(self) -> str:
+        def fmt(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ""
+            body = ",".join(f'{k}="{v}"'.replace("\n", " ") for k, v in pairs)
+            return "{" + body + "}"
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in series.items():
+                    for bound, count in zip(h.buckets, h.cumulative()):
+                        lines.append(f"{name}_bucket{fmt(key, (('le', str(bound)),))} {count}")
+                    lines.append(f"{name}_bucket{fmt(key, (('le', '+Inf'),))} {h.count}")
+                    lines.append(f"{name}_sum{fmt(key)} {h.sum}")
+                    lines.append(f"{name}_count{fmt(key)} {h.count}")
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{fmt(key)} {value}")
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} gauge")
+                for key, value in series.items():
+                    lines.append(f"{name}{fmt(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# 싱글톤 인스턴스 생성
+metrics = MetricsRegistry()
+
+
+def record_executor(seconds: float, thread_id: Optional[str] = None, node: str = "Run") -> None:
+    if not METRICS_ENABLED:
+        return
+    metrics.observe("agent_executor_duration_seconds", seconds)
+    metrics.record_run(run_key(thread_id), node, executor_s=seconds, executor_calls=1)
+
+
+def record_namespaces(stats: Dict[str, Any]) -> None:
+    """실행기의 namespace_stats() 결과를 gauge로 기록"""
+    if not METRICS_ENABLED or not stats:
+        return
+    metrics.set_gauge("agent_executor_namespaces", stats.get("sessions", 0))
+    metrics.set_gauge("agent_executor_namespace_bytes", stats.get("bytes", 0))
+    for reason, count in stats.get("evictions", {}).items():
+        metrics.set_gauge("agent_executor_namespace_evictions", count, reason=reason)
+
+
+def _token_usage(response) -> Tuple[int, int]:
+    """LLMResult에서 (prompt, completion) 토큰 수 추출. provider마다 위치가 달라 두 곳을 확인"""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if not prompt and not completion:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt = usage.get("prompt_tokens", 0)
+        completion = usage.get("completion_tokens", 0)
+    return prompt, completion
+
+
+class MetricsCallback(BaseCallbackHandler):
+    """
+    노드/LLM 이벤트를 MetricsRegistry에 기록하는 콜백.
+    그래프 config와 LLMFactory 콜백 양쪽에 연결되어도 run_id 기준으로 한 번만 집계됩니다.
+    """
+
+    def __init__(self, registry: MetricsRegistry = metrics):
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._nodes: Dict[Any, Tuple[str, str, float]] = {}
+        self._llms: Dict[Any, Tuple[str, str, str, float]] = {}
+        # run -> 이미 실행된 노드 (재실행 집계용)
+        self._seen: "OrderedDict[str, set]" = OrderedDict()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs: Any) -> None:
+        name = kwargs.get("name")
+        if not metadata or not name or metadata.get("langgraph_node") != name:
+            return
+        run = run_key(metadata.get("thread_id"))
+        with self._lock:
+            if run_id in self._nodes:
+                return
+            self._nodes[run_id] = (run, name, time.perf_counter())
+            seen = self._seen.setdefault(run, set())
+            self._seen.move_to_end(run)
+            while len(self._seen) > METRICS_MAX_RUNS:
+                self._seen.popitem(last=False)
+            retried = name in seen
+            seen.add(name)
+        if retried:
+            self.registry.inc("agent_node_retries_total", node=name)
+            self.registry.record_run(run, name, retries=1)
+
+    def _finish_node(self, run_id, failed: bool, outputs: Any = None) -> None:
+        with self._lock:
+            started = self._nodes.pop(run_id, None)
+        if started is None:
+            return
+        run, name, start = started
+        elapsed = time.perf_counter() - start
+        self.registry.observe("agent_node_duration_seconds", elapsed, node=name)
+        self.registry.record_run(run, name, calls=1, wall_s=elapsed)
+        if failed:
+            self.registry.inc("agent_node_errors_total", node=name)
+            self.registry.record_run(run, name, errors=1)
+        if isinstance(outputs, dict):
+            if isinstance(outputs.get("error_roop"), int):
+                self.registry.observe("agent_error_roop", outputs["error_roop"], LOOP_BUCKETS, node=name)
+                self.registry.record_run(run, None, error_roop_max=outputs["error_roop"])
+            if isinstance(outputs.get("roop_back"), int):
+                self.registry.observe("agent_roop_back", outputs["roop_back"], LOOP_BUCKETS)
+                self.registry.record_run(run, None, roop_back_max=outputs["roop_back"])
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs: Any) -> None:
+        self._finish_node(run_id, failed=False, outputs=outputs)
+
+    def on_chain_error(self, error, *, run_id, **kwargs: Any) -> None:
+        # NodeInterrupt(HITL 대기)는 오류가 아님
+        self._finish_node(run_id, failed=type(error).__name__ not in ("NodeInterrupt", "GraphInterrupt"))
+
+    def _start_llm(self, serialized, run_id, metadata, kwargs) -> None:
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or (serialized or {}).get("name") or "unknown"
+        with self._lock:
+            if run_id not in self._llms:
+                self._llms[run_id] = (
+                    run_key(metadata.get("thread_id")),
+                    metadata.get("langgraph_node", "unknown"),
+                    str(model),
+                    time.perf_counter(),
+                )
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs: Any) -> None:
+        self._start_llm(serialized, run_id, metadata, kwargs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs: Any) -> None:
+        self._start_llm(serialized, run_id, metadata, kwargs)
+
+    def _finish_llm(self, run_id, response=None) -> None:
+        with self._lock:
+            started = self._llms.pop(run_id, None)
+        if started is None:
+            return
+        run, node, model, start = started
+        elapsed = time.perf_counter() - start
+        self.registry.observe("agent_llm_latency_seconds", elapsed, node=node, model=model)
+        prompt, completion = _token_usage(response) if response is not None else (0, 0)
+        if prompt:
+            self.registry.inc("agent_llm_tokens_total", prompt, node=node, model=model, kind="prompt")
+        if completion:
+            self.registry.inc("agent_llm_tokens_total", completion, node=node, model=model, kind="completion")
+        self.registry.record_run(
+            run, node, llm_calls=1, llm_s=elapsed, prompt_tokens=prompt, completion_tokens=completion
+        )
+
+    def on_llm_end(self, response, *, run_id, **kwargs: Any) -> None:
+        self._finish_llm(run_id, response)
+
+    def on_llm_error(self, error, *, run_id, **kwargs: Any) -> None:
+        self._finish_llm(run_id)
+
+
+# 그래프 config / LLMFactory가 공유하는 콜백
+metrics_callback = MetricsCallback()
+
+
+def timed(name: Optional[str]):
+    """@observe 대상 함수의 실행 시간을 agent_step_duration_seconds로 기록하는 데코레이터"""
+
+    def decorator(fn):
+        if not METRICS_ENABLED or inspect.isgeneratorfunction(fn) or inspect.isasyncgenfunction(fn):
+            return fn
+        step = name or fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    metrics.observe("agent_step_duration_seconds", time.perf_counter() - start, step=step)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe("agent_step_duration_seconds", time.perf_counter() - start, step=step)
+
+        return wrapper
+
+    return decorator
+
+
+_server_lock = threading.Lock()
+_server = None
+
+
+def start_metrics_server(port: int = METRICS_PORT):
+    """/metrics (Prometheus text), /metrics.json 엔드포인트를 백그라운드 스레드로 제공. port가 0이면 미사용"""
+    global _server
+    if not port or not METRICS_ENABLED:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode("utf-8")
+                    content_type = "application/json; charset=utf-8"
+                elif self.path.startswith("/metrics"):
+                    body = metrics.render_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _Handler)
+        except OSError:
+            # Streamlit 재실행 / 다른 프로세스가 이미 포트를 사용 중
+            return None
+        threading.Thread(target=_server.serve_forever, daemon=True, name="metrics-server").start()
+        return _server
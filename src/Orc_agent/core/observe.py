@@ -1,15 +1,19 @@
 """
 Langfuse Observability 중앙 모듈
-- observe: @observe 데코레이터 래퍼 (credentials 미설정 시 no-op)
+- observe: @observe 데코레이터 래퍼 (내장 지표 수집은 항상, Langfuse는 credentials 설정 시에만)
 - langfuse_session: 세션/메타데이터 컨텍스트 매니저
 - is_langfuse_enabled: credentials 유효성 검증
 - SessionAwareCallbackHandler: 모든 LLM provider에서 session_id가 적용되는 CallbackHandler
+- get_shared_callback_handler: 프로세스당 하나의 CallbackHandler 재사용
 """
 
 import os
+import threading
 from contextlib import contextmanager
 from typing import Any, Callable, Dict, List, Optional
 
+from src.Orc_agent.core.metrics import timed
+
 _observe_fn: Optional[Callable] = None
 
 
@@ -53,8 +57,13 @@ def _get_observe():
 
 
 def observe(name: Optional[str] = None):
-    """Langfuse observe 또는 no-op (credentials 미설정 시)"""
-    return _get_observe()(name=name)
+    """실행 시간 지표(metrics.timed) + Langfuse observe (credentials 미설정 시 지표만)"""
+    langfuse_observe = _get_observe()(name=name)
+
+    def decorator(fn):
+        return langfuse_observe(timed(name)(fn))
+
+    return decorator
 
 
 # ---------------------------------------------------------------------------
@@ -119,6 +128,26 @@ def create_callback_handler():
         return None
 
 
+_shared_handler: Optional[Any] = None
+_shared_handler_ready = False
+_shared_handler_lock = threading.Lock()
+
+
+def get_shared_callback_handler():
+    """
+    프로세스 전역에서 공유하는 SessionAwareCallbackHandler (없으면 None).
+    session_id 등은 호출별 metadata로 전달되므로 핸들러를 공유해도 무방합니다.
+    """
+    global _shared_handler, _shared_handler_ready
+    if _shared_handler_ready:
+        return _shared_handler
+    with _shared_handler_lock:
+        if not _shared_handler_ready:
+            _shared_handler = create_callback_handler()
+            _shared_handler_ready = True
+    return _shared_handler
+
+
 # ---------------------------------------------------------------------------
 # 세션 컨텍스트 매니저 (llm_factory.py에서 분리)
 # ---------------------------------------------------------------------------
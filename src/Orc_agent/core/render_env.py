@@ -0,0 +1,121 @@
+"""
+렌더링 환경 부트스트랩
+- 한글 폰트를 한 번만 찾고 결과를 작은 디스크 캐시(JSON)에 저장합니다.
+- matplotlib/seaborn rc 설정은 프로세스(실행기 워커)당 한 번만 적용합니다.
+- 생성 코드에는 더 이상 폰트 탐색 헤더를 붙이지 않습니다.
+"""
+
+import json
+import os
+import threading
+from typing import Optional
+
+RENDER_ENV_CACHE = os.environ.get("RENDER_ENV_CACHE", os.path.join("cache", "render_env.json"))
+
+# 우선순위별 한글 폰트
+PREFERRED_FONTS = [
+    'Malgun Gothic', 'NanumGothic', 'NanumBarunGothic',
+    'AppleGothic', 'Apple SD Gothic Neo',
+    'Noto Sans KR', 'Noto Sans CJK KR',
+]
+_FONT_KEYWORDS = ['gothic', 'nanum', 'malgun', 'apple']
+FALLBACK_FONT = 'DejaVu Sans'
+
+_lock = threading.Lock()
+_applied_font: Optional[str] = None
+
+
+def _load_cache(mpl_version: str) -> Optional[str]:
+    try:
+        with open(RENDER_ENV_CACHE, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("matplotlib") != mpl_version:
+        return None
+    path = cached.get("path")
+    if path and not os.path.exists(path):
+        return None
+    return cached.get("font")
+
+
+def _save_cache(font: str, path: Optional[str], mpl_version: str):
+    try:
+        os.makedirs(os.path.dirname(RENDER_ENV_CACHE) or ".", exist_ok=True)
+        tmp_path = f"{RENDER_ENV_CACHE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"font": font, "path": path, "matplotlib": mpl_version}, f, ensure_ascii=False)
+        os.replace(tmp_path, RENDER_ENV_CACHE)
+    except OSError:
+        pass  # 캐시 저장 실패는 무시 (다음 프로세스에서 다시 탐색)
+
+
+def resolve_korean_font() -> str:
+    """
+    사용할 한글 폰트 이름을 반환합니다.
+    matplotlib이 이미 파싱해 둔 fontManager.ttflist만 조회하며, 결과는 디스크에 캐시합니다.
+    """
+    import matplotlib
+    from matplotlib import font_manager as fm
+
+    cached = _load_cache(matplotlib.__version__)
+    if cached:
+        return cached
+
+    fonts = {f.name: f.fname for f in fm.fontManager.ttflist}
+    font, path = None, None
+    for pref_font in PREFERRED_FONTS:
+        for name, fname in fonts.items():
+            if pref_font.lower() in name.lower():
+                font, path = pref_font, fname
+                break
+        if font:
+            break
+
+    # 아무 한글 폰트나 찾기
+    if font is None:
+        for name, fname in fonts.items():
+            if any(keyword in name.lower() for keyword in _FONT_KEYWORDS):
+                font, path = name, fname
+                break
+
+    if font is None:
+        font = FALLBACK_FONT
+
+    _save_cache(font, path, matplotlib.__version__)
+    return font
+
+
+def bootstrap_rendering() -> str:
+    """
+    한글 폰트와 matplotlib/seaborn 전역 설정을 적용합니다 (프로세스당 1회).
+    적용된 폰트 이름을 반환합니다.
+    """
+    global _applied_font
+    with _lock:
+        if _applied_font is not None:
+            return _applied_font
+
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        try:
+            # NanumGothic 폰트를 fontManager에 등록
+            import koreanize_matplotlib  # noqa: F401
+        except ImportError:
+            pass
+
+        korean_font = resolve_korean_font()
+
+        # set_theme은 rcParams를 초기화하므로 먼저 적용
+        sns.set_theme(style="whitegrid", context="notebook", font=korean_font)
+        plt.rcParams.update({
+            'font.family': korean_font,
+            'font.sans-serif': [korean_font, FALLBACK_FONT],
+            'axes.unicode_minus': False,
+            'figure.autolayout': True,
+        })
+
+        _applied_font = korean_font
+        return korean_font
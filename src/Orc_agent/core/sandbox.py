@@ -0,0 +1,550 @@
+"""
+프로세스 풀 기반 코드 실행 샌드박스
+- pandas/numpy/matplotlib(Agg)/seaborn/koreanize_matplotlib을 미리 import한 워커 프로세스 풀
+- 세션별 워커 고정(affinity): 같은 세션의 Run 호출은 같은 워커의 같은 namespace에서 실행되어
+  변수(copy1_df ...)가 유지됩니다.
+- 세션 namespace는 NamespaceCache가 관리합니다: 세션마다 분리되고, 변수의 대략적인 메모리를 집계하며,
+  유휴 TTL / 최대 세션 수(LRU) / 메모리 예산을 넘으면 오래 쓰지 않은 세션부터 제거합니다.
+- 데이터셋은 실행마다 다시 읽지 않습니다. 워커가 데이터셋 버전마다 한 번 로드해 두고,
+  실행 직전에 namespace의 df를 원본과 분리된 사본으로 교체합니다.
+- 실행별 제한: wall-clock / RSS 초과 시 워커를 종료 후 재생성, CPU 시간은 RLIMIT_CPU
+- run(code) -> str 계약은 PersistentPythonExecutor와 동일합니다.
+
+이 모듈은 워커 프로세스에서도 import되므로 import 시점에 부수효과가 없어야 합니다.
+"""
+
+import io
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+import types
+import multiprocessing as mp
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SANDBOX_WORKERS = int(os.environ.get("SANDBOX_WORKERS", os.cpu_count() or 2))
+SANDBOX_START_METHOD = os.environ.get("SANDBOX_START_METHOD", "")
+SANDBOX_WALL_TIMEOUT = float(os.environ.get("SANDBOX_WALL_TIMEOUT", 300))
+SANDBOX_CPU_LIMIT = int(os.environ.get("SANDBOX_CPU_LIMIT", 600))
+SANDBOX_MAX_RSS_MB = int(os.environ.get("SANDBOX_MAX_RSS_MB", 4096))
+SANDBOX_STARTUP_TIMEOUT = 120.0
+# 세션 namespace 보관 정책 (워커/실행기마다 적용)
+NAMESPACE_MAX_SESSIONS = int(os.environ.get("NAMESPACE_MAX_SESSIONS", 16))
+NAMESPACE_IDLE_TTL = float(os.environ.get("NAMESPACE_IDLE_TTL", 1800))
+NAMESPACE_MAX_MB = float(os.environ.get("NAMESPACE_MAX_MB", 2048))
+
+_WATCH_INTERVAL = 0.5
+_SWEEP_INTERVAL = 30.0
+# object 컬럼 크기 추정에 사용할 표본 행 수
+_SIZE_SAMPLE_ROWS = 1000
+# namespace 크기 집계에서 제외: 데이터셋 캐시와 버퍼를 공유하고 매 실행 다시 설정되는 값
+_SHARED_KEYS = frozenset({"df", "DATA_PATH"})
+CANCELLED = "RunCancelled"
+DEFAULT_SESSION = "default"
+
+
+class CpuLimitExceeded(Exception):
+    pass
+
+
+def build_namespace() -> Dict[str, object]:
+    """생성 코드가 실행되는 globals의 기본 구성"""
+    import pandas as pd
+    import numpy as np
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from src.Orc_agent.core.dataset_store import load_dataset
+
+    namespace = {
+        "pd": pd,
+        "np": np,
+        "plt": plt,
+        "sns": sns,
+        "os": os,
+        "io": io,
+        "load_dataset": load_dataset,
+    }
+    namespace["__builtins__"] = __builtins__
+    return namespace
+
+
+def seed_dataset(namespace: Dict[str, object], data_path: Optional[str]) -> Optional[str]:
+    """
+    namespace의 df를 데이터셋의 원본과 분리된 사본으로 설정합니다.
+    이전 실행에서 df를 수정했더라도 매 실행은 원본 데이터로 시작합니다. 로드 실패 시 Traceback 반환
+    """
+    if not data_path:
+        return None
+    from src.Orc_agent.core.dataset_store import dataset_store
+
+    try:
+        namespace["df"] = dataset_store.frame_handle(data_path)
+    except Exception:
+        return traceback.format_exc()
+    namespace["DATA_PATH"] = data_path
+    return None
+
+
+def execute_code(code: str, namespace: Dict[str, object]) -> str:
+    """
+    코드를 실행하고 표준 출력을 캡처하여 반환합니다.
+    에러 발생 시 Traceback을 반환합니다.
+    """
+    old_stdout = sys.stdout
+    redirected_output = io.StringIO()
+    sys.stdout = redirected_output
+
+    try:
+        exec(code, namespace)
+
+        result = redirected_output.getvalue()
+        return result.strip() if result else "Success"
+
+    except Exception:
+        return traceback.format_exc()
+    finally:
+        sys.stdout = old_stdout
+
+
+def _frame_bytes(frame) -> int:
+    """pandas DataFrame/Series 크기. object 컬럼은 표본으로 문자열 크기를 추정 (deep=True 전체 스캔 회피)"""
+    if frame.ndim == 1:
+        total = int(frame.memory_usage(index=True, deep=False))
+        objects = frame.to_frame() if frame.dtype == object else None
+    else:
+        total = int(frame.memory_usage(index=True, deep=False).sum())
+        objects = frame.select_dtypes(include="object")
+    if objects is not None and objects.shape[1] and len(objects):
+        sample = objects.iloc[:_SIZE_SAMPLE_ROWS]
+        extra = sample.memory_usage(index=False, deep=True).sum() - sample.memory_usage(index=False, deep=False).sum()
+        total += int(extra / len(sample) * len(objects))
+    return total
+
+
+def _value_bytes(value, depth: int = 0) -> int:
+    """변수 하나가 차지하는 대략적인 메모리 (bytes)"""
+    if isinstance(value, (types.ModuleType, types.FunctionType, types.BuiltinFunctionType, type)):
+        return 0
+    if hasattr(value, "memory_usage") and hasattr(value, "ndim"):
+        return _frame_bytes(value)
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if hasattr(value, "get_size_inches") and hasattr(value, "dpi"):
+        # matplotlib Figure: 렌더링 버퍼(RGBA) 기준
+        width, height = value.get_size_inches()
+        return int(width * height * value.dpi * value.dpi * 4)
+    size = sys.getsizeof(value)
+    if depth < 2 and isinstance(value, (list, tuple, set, frozenset, dict)):
+        items = value.values() if isinstance(value, dict) else value
+        size += sum(_value_bytes(item, depth + 1) for item in items)
+    return size
+
+
+class _Namespace:
+    __slots__ = ("globals", "base_keys", "bytes", "last_used", "active")
+
+    def __init__(self, namespace: Dict[str, object]):
+        self.globals = namespace
+        self.base_keys = frozenset(namespace)
+        self.bytes = 0
+        self.last_used = time.monotonic()
+        self.active = 0
+
+    def user_keys(self) -> List[str]:
+        return [k for k in list(self.globals) if k not in self.base_keys and not k.startswith("__")]
+
+    def measure(self) -> int:
+        total = 0
+        for key in self.user_keys():
+            if key in _SHARED_KEYS:
+                continue
+            try:
+                total += _value_bytes(self.globals[key])
+            except Exception:
+                continue
+        return total
+
+
+class NamespaceCache:
+    """
+    세션별 실행 namespace 저장소
+    - session(session_id)로 namespace를 빌려 쓰고, 반납 시 변수 크기를 다시 집계합니다.
+    - 실행 중이 아닌 세션은 유휴 TTL 초과 → 최대 세션 수 초과(LRU) → 메모리 예산 초과(LRU) 순으로 제거합니다.
+      (방금 사용한 세션은 메모리 예산 때문에 제거하지 않음. 프로세스 전체 한도는 SANDBOX_MAX_RSS_MB가 담당)
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = NAMESPACE_MAX_SESSIONS,
+        idle_ttl: float = NAMESPACE_IDLE_TTL,
+        max_mb: float = NAMESPACE_MAX_MB,
+        factory=build_namespace,
+    ):
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl = idle_ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._factory = factory
+        self._items: "OrderedDict[str, _Namespace]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = {"ttl": 0, "lru": 0, "memory": 0}
+        # 마지막 stats() 이후 제거된 세션 (풀의 affinity 정리용)
+        self._evicted: List[str] = []
+
+    @contextmanager
+    def session(self, session_id: str):
+        with self._lock:
+            entry = self._items.get(session_id)
+            if entry is None:
+                entry = self._items[session_id] = _Namespace(self._factory())
+            self._items.move_to_end(session_id)
+            entry.active += 1
+        try:
+            yield entry.globals
+        finally:
+            size = entry.measure()
+            with self._lock:
+                entry.active -= 1
+                entry.bytes = size
+                entry.last_used = time.monotonic()
+                self._enforce_limits()
+
+    def keys(self, session_id: str) -> List[str]:
+        with self._lock:
+            entry = self._items.get(session_id)
+            return list(entry.globals) if entry else []
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._items.pop(session_id, None)
+
+    def evict_idle(self) -> None:
+        with self._lock:
+            self._enforce_limits()
+
+    def _evict(self, session_id: str, reason: str) -> None:
+        del self._items[session_id]
+        self.evictions[reason] += 1
+        self._evicted.append(session_id)
+
+    def _enforce_limits(self) -> None:
+        if self.idle_ttl > 0:
+            now = time.monotonic()
+            for session_id, entry in list(self._items.items()):
+                if not entry.active and now - entry.last_used > self.idle_ttl:
+                    self._evict(session_id, "ttl")
+
+        idle = [sid for sid, entry in self._items.items() if not entry.active]
+        while len(self._items) > self.max_sessions and idle:
+            self._evict(idle.pop(0), "lru")
+
+        if self.max_bytes > 0:
+            recent = next(reversed(self._items), None)
+            total = sum(entry.bytes for entry in self._items.values())
+            for session_id in [sid for sid in idle if sid in self._items and sid != recent]:
+                if total <= self.max_bytes:
+                    break
+                total -= self._items[session_id].bytes
+                self._evict(session_id, "memory")
+
+    def stats(self) -> Dict[str, Any]:
+        """세션 수 / 대략적인 메모리 / 제거 횟수 / 세션별 크기"""
+        with self._lock:
+            now = time.monotonic()
+            namespaces = [
+                {
+                    "session_id": session_id,
+                    "bytes": entry.bytes,
+                    "variables": len(entry.user_keys()),
+                    "idle_s": round(now - entry.last_used, 1),
+                }
+                for session_id, entry in self._items.items()
+            ]
+            evicted, self._evicted = self._evicted, []
+            return {
+                "sessions": len(namespaces),
+                "bytes": sum(item["bytes"] for item in namespaces),
+                "evictions": dict(self.evictions),
+                "evicted": evicted,
+                "namespaces": namespaces,
+            }
+
+
+def _traceback_message(error: str, detail: str) -> str:
+    # run_code는 "Traceback" 포함 여부로 실패를 판단합니다.
+    return f"Traceback (most recent call last):\n{error}: {detail}"
+
+
+# ---------------------------------------------------------------------------
+# 워커 프로세스
+# ---------------------------------------------------------------------------
+
+def _warm_imports():
+    import pandas  # noqa: F401
+    import numpy  # noqa: F401
+    from src.Orc_agent.core.render_env import bootstrap_rendering
+
+    # matplotlib(Agg)/seaborn/koreanize_matplotlib import 및 폰트/rc 설정을 워커당 1회 적용
+    bootstrap_rendering()
+
+
+def _on_cpu_limit(signum, frame):
+    raise CpuLimitExceeded(f"CPU 시간 제한({SANDBOX_CPU_LIMIT}초)을 초과했습니다.")
+
+
+def _run_with_cpu_limit(code: str, namespace: Dict[str, object], cpu_limit: int) -> str:
+    if resource is None or cpu_limit <= 0:
+        return execute_code(code, namespace)
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = used + cpu_limit
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    try:
+        return execute_code(code, namespace)
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _close_figures():
+    # 워커의 실행은 직렬이므로 실행 후 남은 figure를 모두 닫아도 다른 세션에 영향 없음
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    if pyplot is not None:
+        pyplot.close("all")
+
+
+def _worker_main(conn):
+    _warm_imports()
+    # 워커는 생성 코드만 실행하므로 CoW를 켜서 df 사본(frame_handle)을 얕은 복사로 제공
+    from src.Orc_agent.core.dataset_store import enable_copy_on_write
+
+    enable_copy_on_write()
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+
+    namespaces = NamespaceCache()
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            # 요청이 없을 때도 주기적으로 유휴 세션 정리
+            if not conn.poll(_SWEEP_INTERVAL):
+                namespaces.evict_idle()
+                continue
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+
+        op = message[0]
+        if op == "run":
+            _, session_id, code, cpu_limit, data_path = message
+            with namespaces.session(session_id) as namespace:
+                error = seed_dataset(namespace, data_path)
+                result = error or _run_with_cpu_limit(code, namespace, cpu_limit)
+                _close_figures()
+            conn.send(("result", result, namespaces.stats()))
+        elif op == "drop":
+            namespaces.drop(message[1])
+        elif op == "stop":
+            break
+
+
+# ---------------------------------------------------------------------------
+# 부모 프로세스 측 풀
+# ---------------------------------------------------------------------------
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """Linux /proc 기반 RSS(MB). 확인할 수 없으면 None"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Worker:
+    def __init__(self, ctx, index: int):
+        parent_conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn,), daemon=True, name=f"sandbox-worker-{index}"
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.index = index
+        self.ready = False
+        self.sessions = set()
+        # 마지막 실행 결과와 함께 받은 NamespaceCache.stats()
+        self.namespace_stats: Dict[str, Any] = {}
+
+    def ensure_ready(self):
+        if self.ready:
+            return
+        if not self.conn.poll(SANDBOX_STARTUP_TIMEOUT):
+            raise RuntimeError(f"샌드박스 워커 {self.index} 시작 시간 초과")
+        self.conn.recv()
+        self.ready = True
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(timeout=5)
+        except Exception:
+            pass
+        self.conn.close()
+
+
+class SandboxPool:
+    def __init__(
+        self,
+        size: int = SANDBOX_WORKERS,
+        wall_timeout: float = SANDBOX_WALL_TIMEOUT,
+        cpu_limit: int = SANDBOX_CPU_LIMIT,
+        max_rss_mb: int = SANDBOX_MAX_RSS_MB,
+        start_method: str = SANDBOX_START_METHOD,
+    ):
+        method = start_method or ("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+        self._ctx = mp.get_context(method)
+        if method == "forkserver":
+            # forkserver에서 한 번만 import → 이후 워커 fork 시 재사용
+            self._ctx.set_forkserver_preload(["pandas", "numpy", "matplotlib", "src.Orc_agent.core.sandbox"])
+
+        self.wall_timeout = wall_timeout
+        self.cpu_limit = cpu_limit
+        self.max_rss_mb = max_rss_mb
+        self._lock = threading.Lock()
+        self._affinity: Dict[str, int] = {}
+        self._workers = [_Worker(self._ctx, i) for i in range(max(1, size))]
+        # 워커 재생성 시에도 유지되도록 잠금은 슬롯(index) 단위로 관리
+        self._slot_locks = [threading.Lock() for _ in self._workers]
+
+    def _assign(self, session_id: str) -> int:
+        with self._lock:
+            index = self._affinity.get(session_id)
+            if index is None:
+                index = min(range(len(self._workers)), key=lambda i: len(self._workers[i].sessions))
+                self._affinity[session_id] = index
+                self._workers[index].sessions.add(session_id)
+            return index
+
+    def _respawn(self, index: int) -> str:
+        """워커를 재생성하고, 해당 워커에 묶여 있던 세션 상태는 초기화됩니다."""
+        old = self._workers[index]
+        old.kill()
+        new = _Worker(self._ctx, index)
+        new.sessions = old.sessions
+        self._workers[index] = new
+        return "워커가 재시작되어 이전 실행에서 만든 변수는 초기화되었습니다."
+
+    def _wait_result(self, worker: _Worker, cancel_token=None) -> Optional[tuple]:
+        """결과를 기다리며 wall-clock/RSS 제한과 취소 여부를 감시합니다. 제한 초과 시 (error, detail)"""
+        deadline = time.monotonic() + self.wall_timeout
+        while True:
+            if worker.conn.poll(_WATCH_INTERVAL):
+                return None
+            if cancel_token is not None and cancel_token.cancelled:
+                return (CANCELLED, "사용자가 실행을 취소했습니다.")
+            if not worker.alive():
+                return ("WorkerCrashed", "실행 중 워커 프로세스가 종료되었습니다 (메모리/CPU 제한 초과 가능).")
+            if time.monotonic() > deadline:
+                return ("TimeoutError", f"코드 실행 시간이 {self.wall_timeout:.0f}초를 초과했습니다.")
+            if self.max_rss_mb > 0:
+                rss = _rss_mb(worker.process.pid)
+                if rss is not None and rss > self.max_rss_mb:
+                    return ("MemoryError", f"메모리 사용량이 {self.max_rss_mb}MB를 초과했습니다 (현재 {rss:.0f}MB).")
+
+    def run(self, code: str, session_id: Optional[str] = None, cancel_token=None, data_path: Optional[str] = None) -> str:
+        """
+        data_path가 주어지면 df로 미리 로드된 데이터셋을 제공합니다.
+        취소되면 워커를 종료/재생성한 뒤 RunCancelled를 발생시킵니다.
+        """
+        session_id = session_id or DEFAULT_SESSION
+        index = self._assign(session_id)
+
+        with self._slot_locks[index]:
+            worker = self._workers[index]
+            if not worker.alive():
+                self._respawn(index)
+                worker = self._workers[index]
+            try:
+                worker.ensure_ready()
+                worker.conn.send(("run", session_id, code, self.cpu_limit, data_path))
+                violation = self._wait_result(worker, cancel_token)
+                if violation is None:
+                    _, payload, stats = worker.conn.recv()
+                    worker.namespace_stats = stats
+                    self._forget(index, stats.get("evicted", ()))
+                    return payload
+            except (EOFError, OSError, BrokenPipeError) as e:
+                violation = ("WorkerCrashed", str(e))
+
+            note = self._respawn(index)
+            if violation[0] == CANCELLED:
+                from src.Orc_agent.core.cancellation import RunCancelled
+
+                raise RunCancelled(f"{violation[1]} {note}")
+            return _traceback_message(violation[0], f"{violation[1]} {note}")
+
+    def _forget(self, index: int, session_ids) -> None:
+        """워커가 제거한 세션의 affinity 해제 (다음 실행 시 여유 있는 워커로 다시 배정)"""
+        if not session_ids:
+            return
+        with self._lock:
+            for session_id in session_ids:
+                if self._affinity.get(session_id) == index:
+                    del self._affinity[session_id]
+                self._workers[index].sessions.discard(session_id)
+
+    def namespace_stats(self) -> Dict[str, Any]:
+        """워커별 namespace 현황 합계 (마지막 실행 시점 기준, 실행 중인 워커를 기다리지 않음)"""
+        workers = [worker.namespace_stats for worker in self._workers]
+        evictions: Dict[str, int] = {}
+        for stats in workers:
+            for reason, count in stats.get("evictions", {}).items():
+                evictions[reason] = evictions.get(reason, 0) + count
+        return {
+            "sessions": sum(stats.get("sessions", 0) for stats in workers),
+            "bytes": sum(stats.get("bytes", 0) for stats in workers),
+            "evictions": evictions,
+            "namespaces": [item for stats in workers for item in stats.get("namespaces", [])],
+        }
+
+    def release_session(self, session_id: str):
+        with self._lock:
+            index = self._affinity.pop(session_id, None)
+            if index is None:
+                return
+            self._workers[index].sessions.discard(session_id)
+        with self._slot_locks[index]:
+            worker = self._workers[index]
+            try:
+                if worker.ready:
+                    worker.conn.send(("drop", session_id))
+            except (OSError, BrokenPipeError):
+                pass
+
+    def shutdown(self):
+        for worker in self._workers:
+            try:
+                worker.conn.send(("stop",))
+            except (OSError, BrokenPipeError):
+                pass
+            worker.process.join(timeout=2)
+            if worker.alive():
+                worker.kill()
@@ -0,0 +1,28 @@
+"""
+LangGraph custom 스트림 헬퍼
+- 노드 안에서 get_stream_writer()로 토큰 등 부분 결과를 내보냅니다. (stream_mode에 "custom" 포함 시 전달)
+- 그래프 밖에서 호출되거나 langgraph 버전이 지원하지 않으면 아무것도 하지 않는 writer를 반환합니다.
+"""
+
+from typing import Any, Callable
+
+try:
+    from langgraph.config import get_stream_writer
+except ImportError:  # 구버전 langgraph
+    get_stream_writer = None
+
+# 보고서 토큰 이벤트 키: {"report_token": "..."}
+REPORT_TOKEN = "report_token"
+
+
+def _noop(_: Any) -> None:
+    return None
+
+
+def stream_writer() -> Callable[[Any], None]:
+    if get_stream_writer is None:
+        return _noop
+    try:
+        return get_stream_writer()
+    except Exception:
+        return _noop
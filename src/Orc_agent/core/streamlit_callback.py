@@ -1,16 +1,24 @@
-from typing import Any, Dict, Optional
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
 import streamlit as st
 from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.outputs import LLMResult
 # graph_visualizer 모듈 임포트 (경로 주의: app.py와 같은 위치라고 가정하거나 path 추가 필요)
 try:
-    from webapp.graph_visualizer import generate_highlighted_graph
+    from webapp.graph_visualizer import highlighted_graph_source, precompute_graph_sources
 except ImportError:
     # 절대 경로 등으로 import 시도 또는 예외 처리
     import sys
-    import os
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../../')))
-    from webapp.graph_visualizer import generate_highlighted_graph
+    from webapp.graph_visualizer import highlighted_graph_source, precompute_graph_sources
+
+# 그래프 다시 그리기 최소 간격 (초). 이보다 짧은 간격의 변경은 마지막 상태만 모아서 그림
+GRAPH_RENDER_INTERVAL = float(os.environ.get("GRAPH_RENDER_INTERVAL", 0.3))
+
+# 모든 강조 조합의 DOT 소스를 프로세스당 한 번만 생성
+precompute_graph_sources()
 
 class StreamlitAgentCallback(BaseCallbackHandler):
     """
@@ -21,6 +29,40 @@ class StreamlitAgentCallback(BaseCallbackHandler):
         self.log_container = log_container
         self.graph_container = graph_container
         self.current_step = None
+        # 그래프 갱신 coalescing: 마지막으로 그린 상태 / 아직 그리지 않은 최신 상태
+        self._graph_lock = threading.Lock()
+        self._drawn_key: Optional[Tuple[str, Optional[str]]] = st.session_state.get("last_graph_key")
+        self._pending_key: Optional[Tuple[str, Optional[str]]] = None
+        self._last_draw = 0.0
+
+    def _update_graph(self, current_node: str, sub_status: Optional[str] = None, force: bool = False):
+        """
+        강조 상태가 실제로 바뀐 경우에만 다시 그립니다.
+        GRAPH_RENDER_INTERVAL 안에 연달아 바뀌면 최신 상태만 보류했다가 다음 이벤트에서 그립니다.
+        """
+        if not self.graph_container:
+            return
+        with self._graph_lock:
+            if current_node is not None:
+                self._pending_key = (current_node, sub_status)
+            key = self._pending_key
+            if key is None or key == self._drawn_key:
+                self._pending_key = None
+                return
+            now = time.monotonic()
+            if not force and now - self._last_draw < GRAPH_RENDER_INTERVAL:
+                return
+            self._pending_key = None
+            self._drawn_key = key
+            self._last_draw = now
+        try:
+            dot = highlighted_graph_source(*key)
+            st.session_state["last_graph_dot"] = dot
+            st.session_state["last_graph_key"] = key
+            with self.graph_container:
+                st.graphviz_chart(dot, width='stretch')
+        except Exception:
+            pass # 그래프 업데이트 실패해도 로그는 남기도록
 
     def on_chain_start(self, serialized: Optional[Dict[str, Any]], inputs: Dict[str, Any], **kwargs: Any) -> Any:
         # 체인 이름이 있는 경우 (Graph의 Node 이름 등)
@@ -30,14 +72,9 @@ class StreamlitAgentCallback(BaseCallbackHandler):
             chain_name = kwargs.get("name", "Agent Step")
         
         # 1. 그래프 업데이트 (Main Agent Node인 경우만)
-        if self.graph_container and chain_name in ["File_type", "File_analysis", "Preprocessing", "Analysis", "Final_report", "Wait"]:
-            try:
-                dot = generate_highlighted_graph(chain_name)
-                st.session_state["last_graph_dot"] = dot
-                with self.graph_container:
-                    st.graphviz_chart(dot, width='stretch')
-            except Exception as e:
-                pass # 그래프 업데이트 실패해도 로그는 남기도록
+        if chain_name in ["File_type", "File_analysis", "Preprocessing", "Analysis", "Final_report", "Wait"]:
+            # 메인 노드 전환은 throttle 없이 바로 반영
+            self._update_graph(chain_name, force=True)
 
         # 2. 로그 메세지 출력
         # Main Agent Nodes
@@ -55,26 +92,26 @@ class StreamlitAgentCallback(BaseCallbackHandler):
              self.log_container.warning("⏳ [Main] 사용자의 최종 검토를 기다리고 있습니다...")
 
         # Sub Agent Nodes (Analysis)
-        elif chain_name in ["Plan", "Make", "Run", "Insight"]:
+        elif chain_name in ["Plan", "Make", "Validate", "Run", "Insight", "Insight_overall"]:
             if chain_name == "Plan":
                 self.log_container.info("  📅 [Sub] 상세 분석 계획을 수립하고 있습니다...")
             elif chain_name == "Make":
                 self.log_container.info("  💻 [Sub] 분석 코드를 작성하고 있습니다...")
+            elif chain_name == "Validate":
+                self.log_container.info("  🔍 [Sub] 생성된 코드를 실행 전에 검증합니다...")
             elif chain_name == "Run":
                 self.log_container.info("  🚀 [Sub] 코드를 실행하고 데이터를 시각화합니다...")
             elif chain_name == "Insight":
                 self.log_container.info("  💡 [Sub] 결과를 분석하여 인사이트를 도출합니다...")
+            elif chain_name == "Insight_overall":
+                self.log_container.info("  💡 [Sub] 이미지별 인사이트를 종합하고 있습니다...")
                 
-            # Analysis 노드가 활성화된 상태에서 내부 상태 업데이트
-            if self.graph_container:
-                try:
-                    # Main Node는 여전히 'Analysis'
-                    dot = generate_highlighted_graph("Analysis", sub_status=chain_name)
-                    st.session_state["last_graph_dot"] = dot
-                    with self.graph_container:
-                        st.graphviz_chart(dot, width='stretch')
-                except Exception:
-                    pass
+            # Analysis 노드가 활성화된 상태에서 내부 상태 업데이트 (Main Node는 여전히 'Analysis')
+            self._update_graph("Analysis", chain_name)
+
+    def on_chain_end(self, outputs: Dict[str, Any], **kwargs: Any) -> Any:
+        # throttle로 보류된 최신 그래프 상태가 있으면 간격이 지난 시점에 반영
+        self._update_graph(None)
 
     def on_llm_end(self, response: LLMResult, **kwargs: Any) -> Any:
         # LLM 응답이 끝났을 때 (디버깅용 로그 또는 결과 표시)
@@ -0,0 +1,134 @@
+import ast
+
+from src.Orc_agent.core.code_validator import validate_code
+
+DATA_PATH = "uploads/data.csv"
+IMG_DIR = "webapp/static/img/s1"
+COLUMNS = ["region", "sales"]
+
+
+def _validate(code, columns=COLUMNS, roop=1):
+    return validate_code(code, columns, DATA_PATH, IMG_DIR, roop)
+
+
+# --- 컬럼 검사 ---
+
+def test_unknown_column_is_reported():
+    _, errors, _ = _validate("total = df['revenue'].sum()\n")
+    assert len(errors) == 1
+    assert "'revenue'" in errors[0]
+
+
+def test_columns_created_in_code_are_known():
+    code = (
+        "df['ratio'] = df['sales'] / df['sales'].sum()\n"
+        "if len(df) > 0:\n"
+        "    df.loc[:, 'flag'] = df['sales'] > 0\n"
+        "df = df.assign(share=1)\n"
+    )
+    code += "summary = df[['ratio', 'flag']]\n"
+    _, errors, _ = _validate(code)
+    assert errors == []
+
+
+def test_nested_and_list_column_references_are_checked():
+    code = "for col in ['x']:\n    subset = df[['region', 'missing']]\n"
+    _, errors, _ = _validate(code)
+    assert len(errors) == 1
+    assert "'missing'" in errors[0]
+
+
+def test_column_check_stops_after_rename():
+    code = "df.columns = ['a', 'b']\nvalue = df['a'].sum()\n"
+    _, errors, _ = _validate(code)
+    assert errors == []
+
+
+# --- savefig 규칙 ---
+
+def test_style_calls_do_not_require_savefig():
+    code = "plt.style.use('ggplot')\nsns.set_theme()\nplt.rcParams.update({'font.size': 10})\nplt.close('all')\n"
+    _, errors, _ = _validate(code)
+    assert errors == []
+
+
+def test_drawing_without_savefig_is_reported():
+    _, errors, _ = _validate("plt.plot([1, 2, 3])\n")
+    assert len(errors) == 1
+    assert "savefig" in errors[0]
+
+
+def test_chained_pandas_plot_counts_as_drawing():
+    _, errors, _ = _validate("df['region'].value_counts().plot(kind='bar')\n")
+    assert any("savefig" in e for e in errors)
+
+
+def test_savefig_path_must_follow_rule():
+    ok = f"fig, ax = plt.subplots()\nax.bar(['a'], [1])\nplt.savefig('{IMG_DIR}/figure_2_1.png')\n"
+    _, errors, _ = _validate(ok, roop=2)
+    assert errors == []
+
+    wrong = "fig, ax = plt.subplots()\nax.bar(['a'], [1])\nplt.savefig('out.png')\n"
+    _, errors, _ = _validate(wrong, roop=2)
+    assert len(errors) == 1
+    assert "savefig 경로" in errors[0]
+
+
+# --- 자동 수정 ---
+
+def test_fixer_removes_print_and_keeps_comments():
+    code = "# 지역별 합계\ntotal = df['sales'].sum()  # 합계\nprint(total)\n"
+    fixed, errors, fixes = _validate(code)
+    assert errors == []
+    assert fixes
+    assert fixed == "# 지역별 합계\ntotal = df['sales'].sum()  # 합계\n"
+
+
+def test_fixer_leaves_pass_in_emptied_block():
+    code = "if len(df) > 0:\n    print(len(df))\nvalue = 1\n"
+    fixed, errors, _ = _validate(code)
+    assert errors == []
+    ast.parse(fixed)
+    assert "print" not in fixed
+    assert "    pass\n" in fixed
+
+
+def test_fixer_removes_dataset_reload():
+    code = f"import pandas as pd\ndf = pd.read_csv('{DATA_PATH}')\nvalue = df['sales'].mean()\n"
+    fixed, errors, fixes = _validate(code)
+    assert errors == []
+    assert fixes
+    assert "read_csv" not in fixed
+    assert "value = df['sales'].mean()" in fixed
+
+
+def test_fixer_rewrites_dataset_read_to_load_dataset():
+    code = f"raw = pd.read_csv('{DATA_PATH}')\n"
+    fixed, errors, _ = _validate(code)
+    assert errors == []
+    assert fixed == f"raw = load_dataset('{DATA_PATH}')\n"
+
+
+def test_fixer_leaves_other_reads_untouched():
+    code = (
+        "lookup = pd.read_csv(io.StringIO('a,b\\n1,2'))\n"
+        f"subset = pd.read_csv('{DATA_PATH}', usecols=['sales'])\n"
+    )
+    fixed, errors, fixes = _validate(code)
+    assert errors == []
+    assert fixes == []
+    assert fixed == code
+
+
+def test_reading_another_file_is_reported():
+    _, errors, _ = _validate("other = pd.read_csv('/tmp/other.csv')\n")
+    assert len(errors) == 1
+    assert "/tmp/other.csv" in errors[0]
+
+
+def test_syntax_error_is_reported():
+    code = "value = (\n"
+    fixed, errors, fixes = _validate(code)
+    assert fixed == code
+    assert errors[0].startswith("SyntaxError")
+    assert fixes == []
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from src.Orc_agent.core import dataset_store as ds  # noqa: E402
+from src.Orc_agent.core.dataset_store import DatasetStore  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(cache_dir=str(tmp_path / "cache"))
+
+
+def _write_csv(tmp_path, name, frame):
+    path = tmp_path / name
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def test_integers_keep_source_dtype_by_default(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(ds, "_INT_TARGETS", ())
+    path = _write_csv(tmp_path, "ints.csv", pd.DataFrame({"qty": [1, 2, 3, 40000]}))
+    assert store.load(path)["qty"].dtype == "int64"
+
+
+def test_int_downcast_is_opt_in(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(ds, "_INT_TARGETS", ("int32",))
+    path = _write_csv(tmp_path, "ints.csv", pd.DataFrame({"qty": [1, 2, 3, 40000]}))
+    assert store.load(path)["qty"].dtype == "int32"
+
+
+def test_dates_are_parsed_only_when_every_value_parses(store, tmp_path):
+    dates = [f"2024/01/{day:02d}" for day in range(1, 29)]
+    good = _write_csv(tmp_path, "good.csv", pd.DataFrame({"day": dates}))
+    assert pd.api.types.is_datetime64_any_dtype(store.load(good)["day"])
+
+    # 샘플(_DATE_SAMPLE_SIZE) 밖에 있는 잘못된 값 하나 때문에 변환하지 않음
+    values = [f"2024/01/{day % 28 + 1:02d}" for day in range(300)] + ["2024/13/45"]
+    bad = _write_csv(tmp_path, "bad.csv", pd.DataFrame({"day": values}))
+    assert not pd.api.types.is_datetime64_any_dtype(store.load(bad)["day"])
+
+
+def test_categories_are_fixed_across_head_and_load(store, tmp_path):
+    values = ["a"] * 50 + ["b"] * 30 + ["c"] * 20
+    path = _write_csv(tmp_path, "cats.csv", pd.DataFrame({"grade": values}))
+    store.register(path)
+
+    full = store.load(path)["grade"]
+    preview = store.head(path, 5)["grade"]
+    assert full.dtype == "category"
+    assert list(preview.cat.categories) == ["a", "b", "c"]
+    assert list(preview.cat.categories) == list(full.cat.categories)
+    for batch in store.iter_batches(path):
+        assert list(batch["grade"].cat.categories) == ["a", "b", "c"]
+
+
+def test_frame_handle_does_not_modify_shared_frame(store, tmp_path):
+    path = _write_csv(tmp_path, "frame.csv", pd.DataFrame({"sales": [1.0, 2.0, 3.0]}))
+    handle = store.frame_handle(path)
+    handle.loc[0, "sales"] = 100.0
+    assert store.shared_frame(path).loc[0, "sales"] == 1.0
+
+
+def test_cache_is_pruned_over_budget(tmp_path):
+    store = DatasetStore(cache_dir=str(tmp_path / "cache"), cache_max_mb=0)
+    first = _write_csv(tmp_path, "first.csv", pd.DataFrame({"v": range(1000)}))
+    first_id = store.register(first)
+    store.load(first)
+    entry_bytes = sum(e.stat().st_size for e in os.scandir(store.cache_dir))
+
+    # 데이터셋 하나 반 크기의 한도 → 두 번째 변환 시 첫 데이터셋 삭제
+    store.cache_max_bytes = int(entry_bytes * 1.5)
+    second = _write_csv(tmp_path, "second.csv", pd.DataFrame({"v": range(1000, 2000)}))
+    second_id = store.register(second)
+
+    assert not os.path.exists(store.cache_path(first_id))
+    assert not os.path.exists(store.profile_path(first_id))
+    assert os.path.exists(store.cache_path(second_id))
+    # 삭제된 데이터셋은 다시 등록하면 재변환
+    assert store.register(first) == first_id
+    assert os.path.exists(store.cache_path(first_id))
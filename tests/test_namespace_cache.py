@@ -0,0 +1,79 @@
+import time
+
+from src.Orc_agent.core.sandbox import NamespaceCache
+
+
+def _cache(**kwargs):
+    kwargs.setdefault("max_sessions", 4)
+    kwargs.setdefault("idle_ttl", 0)
+    kwargs.setdefault("max_mb", 0)
+    return NamespaceCache(factory=lambda: {"pd": None}, **kwargs)
+
+
+def test_sessions_are_isolated():
+    cache = _cache()
+    with cache.session("a") as ns:
+        ns["x"] = 1
+    with cache.session("b") as ns:
+        assert "x" not in ns
+    with cache.session("a") as ns:
+        assert ns["x"] == 1
+
+
+def test_lru_evicts_least_recently_used_session():
+    cache = _cache(max_sessions=2)
+    for session_id in ("a", "b"):
+        with cache.session(session_id):
+            pass
+    with cache.session("a"):
+        pass
+    with cache.session("c"):
+        pass
+
+    stats = cache.stats()
+    assert [item["session_id"] for item in stats["namespaces"]] == ["a", "c"]
+    assert stats["evictions"]["lru"] == 1
+    assert stats["evicted"] == ["b"]
+    # evicted 목록은 한 번 보고되면 비워짐
+    assert cache.stats()["evicted"] == []
+
+
+def test_idle_ttl_evicts_stale_sessions():
+    cache = _cache(idle_ttl=0.05)
+    with cache.session("old"):
+        pass
+    time.sleep(0.1)
+    cache.evict_idle()
+
+    stats = cache.stats()
+    assert stats["sessions"] == 0
+    assert stats["evictions"]["ttl"] == 1
+
+
+def test_memory_budget_evicts_idle_sessions_but_keeps_latest():
+    cache = _cache(max_mb=3000 / (1024 * 1024))
+    for session_id in ("a", "b", "c"):
+        with cache.session(session_id) as ns:
+            ns["blob"] = bytes(2000)
+
+    stats = cache.stats()
+    assert [item["session_id"] for item in stats["namespaces"]] == ["c"]
+    assert stats["evictions"]["memory"] == 2
+
+
+def test_active_session_is_not_evicted():
+    cache = _cache(max_sessions=1)
+    with cache.session("busy") as ns:
+        ns["x"] = 1
+        with cache.session("other"):
+            pass
+        assert "busy" in [item["session_id"] for item in cache.stats()["namespaces"]]
+    assert cache.keys("busy")
+
+
+def test_drop_removes_session():
+    cache = _cache()
+    with cache.session("a") as ns:
+        ns["x"] = 1
+    cache.drop("a")
+    assert cache.keys("a") == []
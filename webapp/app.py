@@ -15,7 +15,6 @@ sys.path.insert(0, str(project_root))
 load_dotenv(dotenv_path=project_root / ".env")
 import base64
 import streamlit as st
-import pandas as pd
 import uuid
 import time
 from typing import Generator
@@ -24,7 +23,14 @@ from langchain_core.runnables import RunnableConfig
 # === 2. 모듈 임포트 ===
 from src.Orc_agent.Graph.Main_graph import create_main_graph
 from src.Orc_agent.core.streamlit_callback import StreamlitAgentCallback
-from webapp.graph_visualizer import generate_highlighted_graph
+from src.Orc_agent.core.dataset_store import dataset_store
+from src.Orc_agent.core.stream_writer import REPORT_TOKEN
+from src.Orc_agent.core.metrics import METRICS_ENABLED, metrics_callback, start_metrics_server
+from src.Orc_agent.core.executor import warm_up_executor
+from src.Orc_agent.core.cancellation import (
+    CancellationCallback, RunCancelled, cancel, cancellation_scope, create_token, release
+)
+from webapp.graph_visualizer import highlighted_graph_source
 
 # === 3. 페이지 설정 ===
 st.set_page_config(
@@ -64,6 +70,10 @@ def init_session():
         st.session_state.logs = []
     if "is_running" not in st.session_state:
         st.session_state.is_running = False
+    if "cancel_id" not in st.session_state:
+        st.session_state.cancel_id = None
+    if "run_cancelled" not in st.session_state:
+        st.session_state.run_cancelled = False
     
     # HITL Control States
     if "hitl_active" not in st.session_state:
@@ -75,11 +85,19 @@ def init_session():
 
 init_session()
 
+# 미리보기로 읽는 행 수
+PREVIEW_ROWS = 20
+
 # === 5. 그래프 캐싱 및 로드 ===
 @st.cache_resource
 def get_graph():
+    # 코드 실행기(워커 풀)는 첫 분석 전까지 백그라운드에서 준비
+    warm_up_executor()
     return create_main_graph()
 
+# METRICS_PORT 지정 시 /metrics 엔드포인트 (프로세스당 1회, Streamlit 재실행 시 무시)
+start_metrics_server()
+
 # === 6. UI 레이아웃 구성 ===
 def main():
     # 3단 컬럼 구성 (좌: 1, 중: 2, 우: 1)
@@ -109,14 +127,21 @@ def main():
                     
                     st.session_state.uploaded_file_path = file_path
                     
-                    # 미리보기 데이터 로드
-                    df = pd.read_csv(file_path)
-                    st.session_state.df_preview = df
+                    # 미리보기는 앞부분 행만 읽어 세션에 보관 (전체 DataFrame은 보관하지 않음)
+                    st.session_state.df_preview = dataset_store.head(file_path, PREVIEW_ROWS)
             
             report_format = st.multiselect("보고서 파일 형태", ["Markdown", "PDF", "PPTX", "HTML"], default=["Markdown"])
             
+            if st.session_state.is_running:
+                # 실행 중 취소: 토큰을 취소하면 노드/LLM/Executor가 중단되고 체크포인트는 재개 가능한 상태로 남음
+                st.button("⏹️ 실행 취소", on_click=cancel_run)
+            elif st.session_state.run_cancelled:
+                st.warning("실행이 취소되었습니다. 마지막 체크포인트부터 이어서 실행할 수 있습니다.")
+                st.button("▶️ 이어서 실행", on_click=resume_run)
+
             if st.button("🚀 분석 시작", type="primary"):
                 st.session_state.is_running = True
+                st.session_state.run_cancelled = False
                 st.session_state.hitl_active = False
                 st.session_state.analysis_results = {}
                 st.session_state.figure_list = []
@@ -171,7 +196,7 @@ def main():
         if "last_graph_dot" in st.session_state:
              graph_placeholder.graphviz_chart(st.session_state["last_graph_dot"], width='stretch')
         elif not st.session_state.is_running:
-            dot = generate_highlighted_graph("Start") 
+            dot = highlighted_graph_source("Start")
             graph_placeholder.graphviz_chart(dot, width='stretch')
 
 
@@ -191,17 +216,19 @@ def main():
             render_visualization_tab()
 
         with tab3:
+            # 보고서 생성 중에는 run_engine이 이 placeholder에 토큰을 누적 렌더링
+            report_placeholder = st.empty()
             if st.session_state.final_report:
-                st.markdown(st.session_state.final_report, unsafe_allow_html=True)
+                report_placeholder.markdown(st.session_state.final_report, unsafe_allow_html=True)
             elif st.session_state.analysis_results:
-                st.info("최종 보고서가 아직 생성되지 않았습니다.")
+                report_placeholder.info("최종 보고서가 아직 생성되지 않았습니다.")
             else:
-                st.info("분석 결과가 없습니다.")
+                report_placeholder.info("분석 결과가 없습니다.")
 
 
     # === Auto-Run Logic ===
     if st.session_state.is_running:
-        run_engine(log_container, graph_placeholder, user_query, report_format)
+        run_engine(log_container, graph_placeholder, user_query, report_format, report_placeholder)
 
 
 # def render_markdown_with_images(markdown_text):
@@ -236,7 +263,10 @@ def main():
 
 
 # === 7. 실행 엔진 ===
-def run_engine(log_container, graph_placeholder, user_query, report_format):
+# 스트리밍 보고서 재렌더링 최소 간격 (초)
+REPORT_RENDER_INTERVAL = 0.15
+
+def run_engine(log_container, graph_placeholder, user_query, report_format, report_placeholder=None):
     graph, sub_apps = get_graph()
     analyze_app = sub_apps['analyze']
     
@@ -250,7 +280,16 @@ def run_engine(log_container, graph_placeholder, user_query, report_format):
     
     # Callback setup (Graph Placeholder 전달)
     st_callback = StreamlitAgentCallback(log_container, graph_placeholder)
-    config["callbacks"] = [st_callback]
+
+    # 실행별 취소 토큰 (노드 시작마다 CancellationCallback이 확인)
+    token = create_token()
+    st.session_state.cancel_id = token.cancel_id
+    config["configurable"]["cancel_id"] = token.cancel_id
+    config["callbacks"] = [st_callback, CancellationCallback(token)]
+    if METRICS_ENABLED:
+        # 노드별 wall time / error_roop·roop_back / 재실행 수 (Langfuse 없이도 수집)
+        config["callbacks"].append(metrics_callback)
+    finished = False
     
     # 초기 실행인지, 재개하는 것인지 확인
     if st.session_state.get("resume_mode", False):
@@ -269,19 +308,36 @@ def run_engine(log_container, graph_placeholder, user_query, report_format):
         input_data = None
 
     try:
-        # 스트리밍 실행
-        for event in graph.stream(input_data, config=config):
-            for key, value in event.items():
-                # 로그 저장
-                msg = f"Completed Node: {key}"
+        # 스트리밍 실행 (updates: 노드 결과 / custom: 보고서 토큰)
+        report_buffer = []
+        last_render = 0.0
+        # current_token()이 노드 스레드(LLM 콜백/Executor)까지 전달되도록 스트림 전체를 scope로 감쌈
+        with cancellation_scope(token):
+            for mode, event in graph.stream(input_data, config=config, stream_mode=["updates", "custom"]):
+                if mode == "custom":
+                    if report_placeholder is not None and isinstance(event, dict) and REPORT_TOKEN in event:
+                        report_buffer.append(event[REPORT_TOKEN])
+                        now = time.monotonic()
+                        if now - last_render >= REPORT_RENDER_INTERVAL:
+                            report_placeholder.markdown("".join(report_buffer) + " ▌", unsafe_allow_html=True)
+                            last_render = now
+                    continue
+
+                for key, value in event.items():
+                    # 로그 저장
+                    msg = f"Completed Node: {key}"
                 
-                # 분석 결과 저장 (실시간 업데이트)
-                if key == "Analysis" and "analysis_results" in value:
-                    st.session_state.analysis_results = value["analysis_results"]
-                    st.session_state.figure_list = value["figure_list"]
+                    # 분석 결과 저장 (실시간 업데이트)
+                    if key == "Analysis" and "analysis_results" in value:
+                        st.session_state.analysis_results = value["analysis_results"]
+                        st.session_state.figure_list = value["figure_list"]
                 
-                if key == "Final_report" and "final_report" in value:
-                    st.session_state.final_report = value["final_report"]
+                    if key == "Final_report" and "final_report" in value:
+                        st.session_state.final_report = value["final_report"]
+                        if report_placeholder is not None and value["final_report"]:
+                            report_placeholder.markdown(value["final_report"], unsafe_allow_html=True)
+
+        finished = True
 
         # 스트림 루프 종료 후 상태 체크 (Interrupt 확인)
         snapshot = graph.get_state(config)
@@ -343,6 +399,27 @@ def run_engine(log_container, graph_placeholder, user_query, report_format):
         else:
             st.error(f"실행 중 오류 발생: {e}")
             st.session_state.is_running = False
+    except RunCancelled:
+        # 체크포인트는 마지막으로 완료된 단계에 남아 있으므로 "이어서 실행"으로 재개 가능
+        st.session_state.is_running = False
+        st.session_state.run_cancelled = True
+        st.rerun()
+    finally:
+        # 스트림이 끝나기 전에 빠져나온 경우(취소 버튼, 다른 위젯 조작으로 인한 rerun 등)
+        # 백그라운드에서 계속 도는 노드/LLM/코드 실행을 중단
+        if not finished:
+            token.cancel()
+        release(token.cancel_id)
+
+def cancel_run():
+    cancel(st.session_state.cancel_id)
+    st.session_state.is_running = False
+    st.session_state.run_cancelled = True
+
+def resume_run():
+    st.session_state.run_cancelled = False
+    st.session_state.is_running = True
+    st.session_state.resume_mode = True
 
 # === 8. 서브함수 (피드백 처리) ===
 def handle_sub_feedback(action, text):
@@ -1,5 +1,11 @@
+import functools
+
 import graphviz
 
+# 강조 상태의 전체 조합 (메인 노드 × Analysis 내부 단계) — DOT 소스를 미리 만들어 캐시
+MAIN_NODES = ("Start", "File_type", "File_analysis", "Preprocessing", "Analysis", "Final_report", "Wait", "END")
+SUB_STATUSES = ("Plan", "Make", "Validate", "Run", "Insight", "Insight_overall")
+
 def get_base_graph():
     """
     Orc_agent의 Main_graph 구조를 정의하는 Graphviz 객체 생성
@@ -99,3 +105,22 @@ def generate_highlighted_graph(current_node: str, sub_status: str = None):
             dot.node('Analysis', label=new_label, color='#FF4B4B', penwidth='3.0', fillcolor='#FFF9C4')
     
     return dot
+
+
+@functools.lru_cache(maxsize=None)
+def highlighted_graph_source(current_node: str, sub_status: str = None) -> str:
+    """
+    generate_highlighted_graph의 DOT 소스 문자열 (조합별 1회만 생성)
+    st.graphviz_chart는 DOT 문자열을 그대로 받으므로 Digraph를 다시 만들 필요가 없습니다.
+    """
+    if current_node != "Analysis":
+        sub_status = None
+    return generate_highlighted_graph(current_node, sub_status).source
+
+
+def precompute_graph_sources() -> None:
+    """모든 (메인 노드, 서브 상태) 조합의 DOT 소스를 미리 캐시합니다."""
+    for node in MAIN_NODES:
+        highlighted_graph_source(node)
+    for sub_status in SUB_STATUSES:
+        highlighted_graph_source("Analysis", sub_status)